@@ -6,19 +6,308 @@ Flask app that displays Imperial threats from the Dark Side
 Entry point for the Darth Vader threat generator application.
 """
 
-from flask import Flask, jsonify, render_template
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from functools import lru_cache, wraps
+import hashlib
+import hmac
+import json
 import os
 import sys
+import threading
+import time
 from pathlib import Path
 
 # Add modules directory to path
 sys.path.insert(0, str(Path(__file__).parent / "modules"))
 
 # Import your modules here
-from core import get_random_threat, get_threat_count
+from core import (add_swap_listener, cached_search_index, clear_search_index, get_corpus,
+                  get_random_threat, get_threat_at, get_threat_count, iter_threats, list_threats,
+                  publish_corpus, retired_snapshots, search_threats, swap_corpus, trim_snapshot_history)
 from utils import get_timestamp
+from config import get_config_service
+from tracing import tracer, span, get_recent_traces, export_chrome_trace
+from profiling import ContinuousProfiler, profile_for
+from analytics import AnalyticsRecorder
+from importer import CorpusWatcher, ImportManager, UploadTooLarge, detect_format, load_corpus
+from dedupe import DEFAULT_THRESHOLD, DuplicateReports
+from generator import cached_model, get_generated_threat, get_model, refresh_model
+from sharedstats import open_shared_stats
+from corpusmap import SnapshotError, load_snapshot
+from readiness import Readiness, check_dependencies
+from shutdown import GracefulServer, InFlightTracker
+from capture import TrafficCapture
+from memory import (CacheRegistry, MemoryGuard, stop_tracemalloc, tracemalloc_snapshot,
+                    tracemalloc_status)
+
+class TracedJSONProvider(DefaultJSONProvider):
+    """JSON provider that records serialization time as a trace span"""
+
+    def dumps(self, obj, **kwargs):
+        with span("json.encode"):
+            return super().dumps(obj, **kwargs)
 
 app = Flask(__name__)
+app.json = TracedJSONProvider(app)
+config_service = get_config_service(cli_args=sys.argv[1:])
+tracer.configure(buffer_size=config_service.snapshot.get("trace_buffer_size", 256))
+analytics = AnalyticsRecorder(
+    directory=config_service.snapshot.get("analytics_dir", "analytics"),
+    flush_interval=config_service.snapshot.get("analytics_flush_interval", 1.0),
+    compact_interval=config_service.snapshot.get("analytics_compact_interval", 30),
+    retention_minutes=config_service.snapshot.get("analytics_retention_minutes", 10080),
+    max_keys=config_service.snapshot.get("analytics_max_keys", 100000))
+
+# Cross-worker counters; None if the segment can't be mapped (stats are then omitted)
+shared_stats = open_shared_stats(config_service.snapshot.get("shared_stats_path"),
+                                 config_service.snapshot.get("service_name", "hello_world_app"),
+                                 int(config_service.snapshot.port))
+if shared_stats:
+    add_swap_listener(lambda snapshot: shared_stats.set("corpus_version", int(snapshot.version, 16)))
+    shared_stats.set("corpus_version", int(get_corpus().version, 16))
+
+def load_saved_corpus(corpus_file, snapshot_file, verify=True):
+    """
+    Publish the saved corpus, preferring the mmap snapshot unless the NDJSON file is newer
+    
+    Returns:
+        str: Where the corpus came from ("snapshot", "ndjson" or "builtin")
+    """
+    ndjson_mtime = os.path.getmtime(corpus_file) if corpus_file and os.path.exists(corpus_file) else None
+    if snapshot_file and os.path.exists(snapshot_file):
+        if ndjson_mtime is None or os.path.getmtime(snapshot_file) >= ndjson_mtime:
+            try:
+                publish_corpus(load_snapshot(snapshot_file, verify))
+                return "snapshot"
+            except SnapshotError as e:
+                print(f"⚠️ Ignoring corpus snapshot: {e}")
+        else:
+            print(f"⚠️ Corpus snapshot {snapshot_file} is older than {corpus_file}; rebuild it")
+    if ndjson_mtime is not None:
+        saved_threats = load_corpus(corpus_file)
+        if saved_threats:
+            swap_corpus(saved_threats)
+            return "ndjson"
+    return "builtin"
+
+corpus_file = config_service.snapshot.get("corpus_file")
+snapshot_file = config_service.snapshot.get("corpus_snapshot")
+# Where the served corpus came from; None until the corpus warmup step loads it
+corpus_source = None
+# Set once the corpus warmup step has run; non-health requests wait for it
+corpus_loaded = threading.Event()
+
+def reload_corpus(verify=False):
+    """Publish the saved corpus files and remember where the corpus came from"""
+    global corpus_source
+    corpus_source = load_saved_corpus(corpus_file, snapshot_file, verify)
+    return corpus_source
+
+# Picks up imports made by sibling workers (they rewrite the corpus files under a lock)
+corpus_watcher = CorpusWatcher((corpus_file, snapshot_file), reload_corpus, lock_file=corpus_file)
+importer = ImportManager(
+    corpus_file=corpus_file,
+    near_duplicate_threshold=config_service.snapshot.get("import_near_duplicate_threshold"),
+    snapshot_file=snapshot_file,
+    max_upload_bytes=config_service.snapshot.get("import_max_bytes", 256 * 1024 * 1024),
+    watcher=corpus_watcher,
+    model_order=lambda: config_service.snapshot.get("generator_order", 1))
+
+def app_shell_version():
+    """Hash of the static files and page template, used to version the service worker cache"""
+    digest = hashlib.sha256()
+    root = Path(app.root_path)
+    paths = sorted(Path(app.static_folder).rglob("*")) + [root / "templates" / "index.html"]
+    for path in paths:
+        if path.is_file():
+            digest.update(str(path.relative_to(root)).encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+@lru_cache(maxsize=1)
+def service_worker_script():
+    """sw.js with its cache version filled in (built once, by warmup or the first request)"""
+    return (Path(app.static_folder) / "js" / "sw.js").read_text(encoding="utf-8").replace(
+        "__APP_SHELL_VERSION__", app_shell_version())
+
+# Routes exercised in-process during warmup (GET only, no side effects beyond caches)
+WARMUP_ROUTES = ("/", "/api/threat", "/api/threat?mode=generated", "/api/threat/count",
+                 "/api/threats/batch?count=1", "/api/threats/all?limit=1",
+                 "/api/threats/search?q=dark", "/api", "/health")
+
+# Near-duplicate reports by (corpus version, threshold), computed on a background thread
+duplicate_reports = DuplicateReports()
+
+readiness = Readiness()
+# Counts requests until their response is fully sent, so shutdown can drain them
+in_flight = InFlightTracker(app.wsgi_app)
+# Samples request metadata for python -m modules.replay (off unless capture_sample_rate > 0)
+traffic_capture = TrafficCapture(
+    in_flight,
+    directory=config_service.snapshot.get("capture_dir", "captures"),
+    sample_rate=lambda: config_service.snapshot.get("capture_sample_rate", 0.0),
+    headers=config_service.snapshot.get("capture_headers", ["Accept", "User-Agent"]),
+    max_bytes=config_service.snapshot.get("capture_max_bytes", 16 * 1024 * 1024),
+    max_files=config_service.snapshot.get("capture_max_files", 10),
+    skip=lambda environ: environ.get("app.warmup", False)
+)
+app.wsgi_app = traffic_capture
+
+# Everything this worker caches, cheapest to rebuild first (the eviction order)
+caches = CacheRegistry()
+# Snapshots are immutable, so their sizes are only recomputed when the version changes
+caches.register("corpus", lambda: get_corpus().threats, version=lambda: get_corpus().version)
+caches.register("traces", lambda: tracer.recent, tracer.clear)
+caches.register("analytics_buffer", lambda: analytics.buffer, analytics.flush)
+caches.register("capture_buffer", lambda: traffic_capture.buffer, traffic_capture.flush)
+caches.register("retired_snapshots", retired_snapshots, trim_snapshot_history,
+                version=lambda: tuple(snapshot.version for snapshot in retired_snapshots()))
+caches.register("import_indexes", importer.caches, importer.clear_caches)
+caches.register("search_index", cached_search_index, clear_search_index)
+# Report only: rebuilding means retraining unless the snapshot carries the model
+caches.register("generator_model", cached_model)
+# Requests keep getting the previous model while this one trains off the request path
+add_swap_listener(refresh_model)
+caches.register("duplicate_reports", duplicate_reports.reports, duplicate_reports.clear)
+
+budget_mb = config_service.snapshot.get("memory_budget_mb")
+memory_guard = MemoryGuard(
+    caches,
+    budget_bytes=int(budget_mb * 2**20) if budget_mb else None,
+    evict_at=config_service.snapshot.get("memory_evict_at", 0.85),
+    max_requests=config_service.snapshot.get("max_requests", 0),
+    max_requests_jitter=config_service.snapshot.get("max_requests_jitter", 0),
+    check_interval=config_service.snapshot.get("memory_check_interval", 5.0),
+    recycle_retry=config_service.snapshot.get("memory_recycle_retry", 60.0)
+)
+
+def is_warmup_request():
+    """Warmup traffic is marked in the WSGI environ, which clients can't set"""
+    return request.environ.get("app.warmup", False)
+
+def warmup_steps():
+    """Startup work that must finish before the worker reports ready"""
+    order = config_service.snapshot.get("generator_order", 1)
+
+    def corpus():
+        verify = config_service.snapshot.get("corpus_snapshot_verify", True)
+        try:
+            source = corpus_watcher.load(lambda: reload_corpus(verify))
+        finally:
+            corpus_loaded.set()
+        corpus = get_corpus()
+        prefetch = getattr(corpus.threats, "prefetch", None)
+        if prefetch:
+            prefetch()
+        return {"source": source, "threats": len(corpus.threats), "version": corpus.version}
+
+    def generator():
+        return {"states": get_model(order).state_count}
+
+    def search_index():
+        return {"matches": search_threats("dark")["total"]}
+
+    def templates():
+        app.jinja_env.get_template('index.html')
+        service_worker_script()
+
+    def json_encoder():
+        app.json.dumps({**get_random_threat(), "cluster": shared_stats_summary()})
+
+    def routes():
+        client = app.test_client()
+        for path in WARMUP_ROUTES:
+            with client.get(path, environ_overrides={"app.warmup": True}) as response:
+                if response.status_code >= 500:
+                    raise RuntimeError(f"{path} returned HTTP {response.status_code}")
+        return {"routes": len(WARMUP_ROUTES)}
+
+    return [("corpus", corpus), ("generator", generator), ("search_index", search_index),
+            ("templates", templates), ("json_encoder", json_encoder), ("routes", routes)]
+
+def warm_up():
+    """Run warmup synchronously (the server does this on a thread at startup)"""
+    return readiness.run_warmup(warmup_steps())
+
+def record_delivery(threat_data):
+    """Log a served threat for analytics (no-op when analytics is disabled)"""
+    if is_warmup_request():
+        return
+    if shared_stats:
+        shared_stats.incr("threats_served")
+    if config_service.snapshot.get("analytics_enabled", True):
+        analytics.record(threat_data["threat"], request.remote_addr or "")
+
+def require_admin(view):
+    """Allow a debug view only with the configured admin token (or from localhost if unset)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = config_service.snapshot.get("admin_token")
+        if token:
+            allowed = hmac.compare_digest(request.headers.get("X-Admin-Token", ""), str(token))
+        else:
+            allowed = request.remote_addr in ("127.0.0.1", "::1")
+        if not allowed:
+            return jsonify({"error": "Admin access required"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.before_request
+def start_request_trace():
+    """Start a sampled trace for this request (debug endpoints are never traced)"""
+    if request.path.startswith('/debug'):
+        return
+    tracer.start_trace(f"{request.method} {request.path}",
+                       config_service.snapshot.get("trace_sample_rate", 0.0))
+
+@app.before_request
+def count_request():
+    """Count every request in this worker's shared stats slot and toward max_requests"""
+    if is_warmup_request():
+        return
+    memory_guard.note_request()
+    if shared_stats:
+        shared_stats.incr("requests")
+
+@app.before_request
+def start_background_work():
+    """
+    Start warmup and corpus polling on the first request (in each worker, after any fork)
+    
+    WSGI servers import the app without running __main__, and nothing is
+    loaded at import time, so the first request of any kind kicks off warmup.
+    """
+    if readiness.state == "starting":
+        readiness.start_warmup(warmup_steps())
+    if not corpus_watcher.running:
+        corpus_watcher.start(config_service.snapshot.get("corpus_watch_interval", 2.0))
+    # Probes answer straight away; everything else waits for the saved corpus
+    # (unless the worker began draining before warmup could start)
+    if not request.path.startswith("/health") and readiness.state != "draining":
+        corpus_loaded.wait()
+
+@app.after_request
+def count_error(response):
+    """Count server errors in this worker's shared stats slot"""
+    if shared_stats and response.status_code >= 500:
+        shared_stats.incr("errors")
+    return response
+
+def shared_stats_summary():
+    """Cross-worker totals for /health and /api/threat/count (None when unavailable)"""
+    if not shared_stats:
+        return None
+    with span("sharedstats.snapshot"):
+        snapshot = shared_stats.snapshot()
+    return {"workers": snapshot["workers"],
+            "consistent_corpus": snapshot["corpus_versions"] <= 1,
+            **snapshot["totals"]}
+
+@app.teardown_request
+def end_request_trace(exc):
+    """Finish the current trace and store it in the ring buffer"""
+    tracer.end_trace()
 
 @app.route('/health')
 def health():
@@ -26,30 +315,278 @@ def health():
     return jsonify({
         "status": "healthy",
         "service": "vader_threat_generator",
-        "timestamp": get_timestamp()
+        "timestamp": get_timestamp(),
+        "ready": readiness.ready,
+        "cluster": shared_stats_summary()
+    })
+
+@app.route('/health/live')
+def health_live():
+    """Liveness: the process is up and answering (never depends on warmup)"""
+    return jsonify({
+        "status": "alive",
+        "pid": os.getpid(),
+        "uptime_seconds": round(time.time() - readiness.started_at, 3),
+        "service": "vader_threat_generator"
     })
 
+def dependency_checks():
+    """Quick per-request checks behind /health/ready (each is timed)"""
+    def corpus():
+        corpus = get_corpus()
+        if not len(corpus.threats):
+            raise RuntimeError("Threat pool is empty")
+        return {"threats": len(corpus.threats), "version": corpus.version}
+
+    def cluster_stats():
+        if not shared_stats:
+            return {"enabled": False}
+        return {"enabled": True, "workers": shared_stats.snapshot()["workers"]}
+
+    def analytics_dir():
+        directory = analytics.directory
+        if config_service.snapshot.get("analytics_enabled", True) and os.path.isdir(directory) \
+                and not os.access(directory, os.W_OK):
+            raise PermissionError(f"{directory} is not writable")
+        return {"buffered": len(analytics.buffer)}
+
+    return [("corpus", corpus), ("shared_stats", cluster_stats), ("analytics", analytics_dir)]
+
+@app.route('/health/ready')
+def health_ready():
+    """Readiness: 200 only after warmup and while not draining; reports dependency timings"""
+    dependencies = check_dependencies(dependency_checks())
+    ready = readiness.ready and all(check["ok"] for check in dependencies.values())
+    return jsonify({
+        **readiness.status(),
+        "ready": ready,
+        "dependencies": dependencies,
+        "service": "vader_threat_generator"
+    }), 200 if ready else 503
+
 @app.route('/')
 def home():
     """Main threat display page"""
-    threat_data = get_random_threat()
-    return render_template('index.html', 
-                         threat=threat_data['threat'],
-                         threat_count=get_threat_count())
+    with span("core.get_random_threat"):
+        threat_data = get_random_threat()
+    record_delivery(threat_data)
+    with span("core.get_threat_count"):
+        threat_count = get_threat_count()
+    with span("render_template"):
+        return render_template('index.html', 
+                             threat=threat_data['threat'],
+                             threat_count=threat_count)
+
+@app.route('/sw.js')
+def service_worker():
+    """Service worker script, served from the root so it can control '/'"""
+    return Response(service_worker_script(), mimetype='application/javascript',
+                    headers={"Cache-Control": "no-cache", "Service-Worker-Allowed": "/"})
 
 @app.route('/api/threat')
 def api_threat():
-    """API endpoint for getting a random threat"""
-    return jsonify(get_random_threat())
+    """API endpoint for getting a random threat (?mode=random|generated)"""
+    mode = request.args.get('mode', 'random')
+    if mode == 'generated':
+        with span("generator.get_generated_threat"):
+            threat_data = get_generated_threat(config_service.snapshot.get("generator_order", 1))
+        if shared_stats and not is_warmup_request():
+            shared_stats.incr("generated_served")
+        return jsonify(threat_data)
+    if mode != 'random':
+        return jsonify({"error": "mode must be 'random' or 'generated'"}), 400
+    with span("core.get_random_threat"):
+        threat_data = get_random_threat()
+    record_delivery(threat_data)
+    return jsonify(threat_data)
+
+# Upper bound for /api/threats/batch, so one request can't drain a worker
+MAX_BATCH_THREATS = 50
+
+@app.route('/api/threats/batch')
+def api_threats_batch():
+    """
+    Several threats plus the threat count in one response (?count=N, ?mode=random|generated)
+    
+    The frontend prefetches these, so they are not counted as deliveries here;
+    it reports the ones it actually displays to /api/threats/shown.
+    """
+    count = max(1, min(request.args.get('count', default=10, type=int), MAX_BATCH_THREATS))
+    mode = request.args.get('mode', 'random')
+    if mode == 'generated':
+        order = config_service.snapshot.get("generator_order", 1)
+        with span("generator.get_generated_threat"):
+            threats = [get_generated_threat(order) for _ in range(count)]
+        if shared_stats and not is_warmup_request():
+            shared_stats.incr("generated_served", count)
+    elif mode == 'random':
+        with span("core.get_random_threat"):
+            threats = [get_random_threat() for _ in range(count)]
+    else:
+        return jsonify({"error": "mode must be 'random' or 'generated'"}), 400
+    return jsonify({
+        "threats": threats,
+        "total_threats": get_threat_count(),
+        "service": "vader_threat_generator"
+    })
+
+# Upper bound for one /api/threats/shown report
+MAX_SHOWN_THREATS = 100
+
+@app.route('/api/threats/shown', methods=['POST'])
+def api_threats_shown():
+    """
+    Record deliveries for batch threats the frontend has displayed
+    
+    Body: {"threats": [{"corpus_version": "...", "threat_id": N}, ...]}, as
+    sent by navigator.sendBeacon. Ids resolve against the version they were
+    issued with; ids from a retired version are dropped.
+    """
+    data = request.get_json(force=True, silent=True)
+    shown = data.get("threats") if isinstance(data, dict) else None
+    if not isinstance(shown, list) or len(shown) > MAX_SHOWN_THREATS:
+        return jsonify({"error": f"threats must be a list of at most {MAX_SHOWN_THREATS} items"}), 400
+    recorded = 0
+    for item in shown:
+        if not isinstance(item, dict):
+            continue
+        version, threat_id = item.get("corpus_version"), item.get("threat_id")
+        if not isinstance(version, str) or type(threat_id) is not int:
+            continue
+        threat = get_threat_at(version, threat_id)
+        if threat:
+            record_delivery({"threat": threat})
+            recorded += 1
+    return jsonify({"recorded": recorded, "service": "vader_threat_generator"})
 
 @app.route('/api/threat/count')
 def api_threat_count():
     """API endpoint for threat count"""
+    with span("core.get_threat_count"):
+        total_threats = get_threat_count()
     return jsonify({
-        "total_threats": get_threat_count(),
+        "total_threats": total_threats,
+        "cluster": shared_stats_summary(),
         "service": "vader_threat_generator"
     })
 
+@app.route('/api/threat/stats')
+def api_threat_stats():
+    """Delivery stats from compacted analytics (?top=K, ?window=seconds), keyed by threat text hash"""
+    stats = analytics.stats(top=request.args.get('top', default=10, type=int),
+                            window_seconds=request.args.get('window', type=int))
+    return jsonify({**stats, "service": "vader_threat_generator"})
+
+# Lines per chunk when streaming NDJSON exports
+EXPORT_CHUNK_LINES = 1000
+
+@app.route('/api/threats/all')
+def api_threats_all():
+    """Cursor-paginated corpus listing (?cursor=, ?limit=, ?format=ndjson for full export)"""
+    cursor = request.args.get('cursor')
+    try:
+        if request.args.get('format') == 'ndjson':
+            threats = iter_threats(cursor)
+            
+            def generate():
+                chunk = []
+                for threat_id, threat in threats:
+                    chunk.append(json.dumps({"threat_id": threat_id, "threat": threat}) + "\n")
+                    if len(chunk) >= EXPORT_CHUNK_LINES:
+                        yield "".join(chunk)
+                        chunk = []
+                if chunk:
+                    yield "".join(chunk)
+            
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        page = list_threats(cursor, request.args.get('limit', default=100, type=int))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 410
+    
+    return jsonify({**page, "service": "vader_threat_generator"})
+
+@app.route('/api/threats/search')
+def api_threats_search():
+    """Threats containing every word of ?q= (?limit=N)"""
+    query = request.args.get('q', '')
+    if not query.strip():
+        return jsonify({"error": "q is required"}), 400
+    with span("core.search_threats"):
+        result = search_threats(query, request.args.get('limit', default=20, type=int))
+    return jsonify({**result, "service": "vader_threat_generator"})
+
+# Longest a duplicates request waits for a report before answering 202
+MAX_DUPLICATES_WAIT = 10.0
+
+@app.route('/api/threats/duplicates')
+@require_admin
+def api_threats_duplicates():
+    """Near-duplicate clusters in the corpus (?threshold=0.0-1.0, ?limit=N, ?wait=seconds)"""
+    threshold = request.args.get('threshold', default=DEFAULT_THRESHOLD, type=float)
+    if not 0.0 < threshold <= 1.0:
+        return jsonify({"error": "threshold must be in (0, 1]"}), 400
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        limit = -1
+    if limit < 0:
+        return jsonify({"error": "limit must be a non-negative integer"}), 400
+    # Reports keep at most duplicate_reports.limit clusters
+    limit = min(limit, duplicate_reports.limit)
+    corpus = get_corpus()
+    wait = max(0.0, min(request.args.get('wait', default=0.0, type=float), MAX_DUPLICATES_WAIT))
+    job = duplicate_reports.get(corpus.threats, corpus.version, threshold, wait)
+    if job["status"] != "done":
+        # Clustering runs in the background; poll again (the report is cached per corpus version)
+        return jsonify({
+            "status": job["status"],
+            "error": job["error"],
+            "threshold": threshold,
+            "corpus_version": corpus.version,
+            "service": "vader_threat_generator"
+        }), 202 if job["status"] == "running" else 500
+    report = job["report"]
+    return jsonify({
+        **report,
+        "status": "done",
+        "clusters": report["clusters"][:limit],
+        "corpus_version": corpus.version,
+        "service": "vader_threat_generator"
+    })
+
+@app.route('/api/admin/import', methods=['POST'])
+@require_admin
+def api_admin_import():
+    """Stream an NDJSON/CSV upload to disk and queue a background import job"""
+    fmt = request.args.get('format') or detect_format(request.content_type)
+    if (request.content_length or 0) > importer.max_upload_bytes:
+        return jsonify({"error": f"Upload exceeds {importer.max_upload_bytes:,} bytes"}), 413
+    try:
+        job = importer.submit(request.stream, fmt)
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({**job.to_dict(), "status_url": f"/api/admin/import/{job.job_id}"}), 202
+
+@app.route('/api/admin/import')
+@require_admin
+def api_admin_import_jobs():
+    """Recent import jobs, newest first"""
+    return jsonify({"jobs": importer.list_jobs(), "service": "vader_threat_generator"})
+
+@app.route('/api/admin/import/<job_id>')
+@require_admin
+def api_admin_import_status(job_id):
+    """Poll one import job"""
+    job = importer.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown import job {job_id}"}), 404
+    return jsonify(job.to_dict())
+
 @app.route('/api')
 def api_docs():
     """API documentation endpoint"""
@@ -60,19 +597,121 @@ def api_docs():
         "endpoints": [
             {"path": "/", "method": "GET", "description": "Main threat display page"},
             {"path": "/health", "method": "GET", "description": "Health check"},
-            {"path": "/api/threat", "method": "GET", "description": "Get random threat"},
+            {"path": "/health/live", "method": "GET", "description": "Liveness probe"},
+            {"path": "/health/ready", "method": "GET", "description": "Readiness probe (503 until warm, or while draining)"},
+            {"path": "/api/threat", "method": "GET", "description": "Get random threat (?mode=generated for a synthesized one)"},
             {"path": "/api/threat/count", "method": "GET", "description": "Get threat count"},
-            {"path": "/api", "method": "GET", "description": "API documentation"}
+            {"path": "/api/threats/batch", "method": "GET", "description": "Several threats plus the count (?count=N, max 50)"},
+            {"path": "/api/threat/stats", "method": "GET", "description": "Served-threat stats (?top=K, ?window=seconds)"},
+            {"path": "/api/threats/all", "method": "GET", "description": "Paginated corpus listing (?cursor=, ?limit=, ?format=ndjson)"},
+            {"path": "/api/threats/search", "method": "GET", "description": "Search threats (?q=words, ?limit=N)"},
+            {"path": "/api/threats/duplicates", "method": "GET", "description": "Near-duplicate clusters (?threshold=, ?limit=, ?wait=; 202 while computing, admin)"},
+            {"path": "/api/admin/import", "method": "POST", "description": "Bulk import threats (NDJSON/CSV body, admin)"},
+            {"path": "/api/admin/import", "method": "GET", "description": "List import jobs (admin)"},
+            {"path": "/api/admin/import/<job_id>", "method": "GET", "description": "Import job status (admin)"},
+            {"path": "/api", "method": "GET", "description": "API documentation"},
+            {"path": "/debug/traces", "method": "GET", "description": "Recent request traces"},
+            {"path": "/debug/traces/export", "method": "GET", "description": "Export traces (Chrome trace format)"},
+            {"path": "/debug/profile", "method": "GET", "description": "Sampling profile as collapsed stacks (?seconds=N)"},
+            {"path": "/debug/memory", "method": "GET", "description": "Worker RSS, memory budget and cache sizes"},
+            {"path": "/debug/memory/snapshot", "method": "GET", "description": "tracemalloc top allocations and diff (?top=N&group=lineno)"}
         ]
     })
 
+@app.route('/debug/traces')
+@require_admin
+def debug_traces():
+    """Recent sampled request traces (?limit=N, ?format=chrome)"""
+    limit = request.args.get('limit', default=50, type=int)
+    if request.args.get('format') == 'chrome':
+        return jsonify(tracer.to_chrome_trace(tracer.get_recent(limit)))
+    return jsonify({
+        "sample_rate": config_service.snapshot.get("trace_sample_rate", 0.0),
+        "buffered": len(tracer.recent),
+        "traces": get_recent_traces(limit)
+    })
+
+@app.route('/debug/traces/export')
+@require_admin
+def debug_traces_export():
+    """Write buffered traces to the configured Chrome trace file"""
+    path = config_service.snapshot.get("trace_export_path", "traces.json")
+    count = export_chrome_trace(path)
+    return jsonify({
+        "exported": count,
+        "path": os.path.abspath(path),
+        "format": "chrome_trace_event"
+    })
+
+@app.route('/debug/profile')
+@require_admin
+def debug_profile():
+    """Sample this worker's threads for ?seconds=N and return collapsed stacks"""
+    result = profile_for(request.args.get('seconds', default=5.0, type=float),
+                         interval=request.args.get('interval', default=0.005, type=float),
+                         include_idle=request.args.get('idle') == '1')
+    if request.args.get('format') == 'json':
+        return jsonify(result)
+    return Response(result["collapsed"], mimetype='text/plain',
+                    headers={"X-Profile-Samples": str(result["samples"])})
+
+@app.route('/debug/memory')
+@require_admin
+def debug_memory():
+    """This worker's RSS, budget, recycling state and the size of each cache"""
+    return jsonify({
+        "worker": memory_guard.status(),
+        "caches": caches.report(),
+        "tracemalloc": tracemalloc_status()
+    })
+
+@app.route('/debug/memory/snapshot')
+@require_admin
+def debug_memory_snapshot():
+    """tracemalloc top allocation sites, diffed against the previous snapshot (?stop=1 ends tracing)"""
+    if request.args.get('stop') == '1':
+        stop_tracemalloc()
+        return jsonify(tracemalloc_status())
+    try:
+        result = tracemalloc_snapshot(top=request.args.get('top', default=20, type=int),
+                                      group_by=request.args.get('group', default='lineno'),
+                                      frames=config_service.snapshot.get("tracemalloc_frames", 1))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result)
+
 if __name__ == '__main__':
-    port = int(os.getenv('PORT', 5000))
-    debug = os.getenv('DEBUG', 'False').lower() == 'true'
+    config = config_service.snapshot
+    port = int(config.port)
+    debug = bool(config.debug)
+    config_service.start_watching()
+    # Analytics and capture start their writers on first use; flush them on the way out
+    exit_hooks = [traffic_capture.stop, analytics.stop]
+    
+    readiness.start_warmup(warmup_steps())
+    
+    if config.get("profile_continuous"):
+        profiler = ContinuousProfiler(output_dir=config.get("profile_dir", "profiles"),
+                                      interval=config.get("profile_interval", 0.1),
+                                      window=config.get("profile_window", 60),
+                                      keep=config.get("profile_keep", 60))
+        profiler.start()
+        exit_hooks.append(profiler.stop)
     
-    print(f"⚫ Starting Darth Vader Threat Generator on port {port}")
-    print(f"🌐 Server: http://localhost:5000")
-    print(f"🔍 Health check: http://localhost:5000/health")
-    print(f"⚔️ Threat API: http://localhost:5000/api/threat")
+    print(f"⚫ Starting Darth Vader Threat Generator on port {port} (PID: {os.getpid()})")
+    print(f"🌐 Server: http://localhost:{port}")
+    print(f"🔍 Health check: http://localhost:{port}/health")
+    print(f"⚔️ Threat API: http://localhost:{port}/api/threat")
     
-    app.run(host='0.0.0.0', port=port, debug=debug)
+    if debug:
+        # The reloader restarts the process itself; no graceful drain in debug mode
+        app.run(host='0.0.0.0', port=port, debug=debug)
+    else:
+        server = GracefulServer(app, '0.0.0.0', port, readiness, in_flight,
+                                drain_timeout=float(config.get("shutdown_drain_timeout", 10.0)),
+                                grace_period=float(config.get("shutdown_grace_period", 0.0)),
+                                exit_hooks=exit_hooks)
+        # Past the memory budget or max_requests, hand the socket to a fresh worker
+        memory_guard.on_recycle = server.spawn_replacement
+        memory_guard.start()
+        sys.exit(server.serve())
@@ -18,6 +18,8 @@ The generated files can be customized later as your project grows.
 import os
 import sys
 import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 def get_user_input():
@@ -107,85 +109,170 @@ def get_project_config(target_dir, user_config):
     
     return config
 
-def replace_placeholders(file_path, config):
-    """Replace template placeholders in a file"""
+# {{KEY}} markers; Jinja expressions like {{ threat }} have spaces/lowercase and never match
+PLACEHOLDER_PATTERN = re.compile(r'\{\{([A-Z][A-Z0-9_]*)\}\}')
+
+# Files whose content gets placeholder substitution (everything else is copied verbatim)
+TEXT_EXTENSIONS = ('.md', '.py', '.sh', '.txt', '.json', '.yml', '.yaml')
+
+# Directories never copied from the template
+SKIP_DIRS = ['__pycache__', '.git', '.pytest_cache']
+
+def substitute_placeholders(content, config, unknown=None):
+    """
+    Replace every {{KEY}} marker in a single pass over content
+    
+    Cost is O(size) regardless of how many keys config has.
+    Unknown markers are left in place and their keys added to `unknown`.
+    """
+    # split() with a capture group alternates text, key, text, key, ... in C
+    parts = PLACEHOLDER_PATTERN.split(content)
+    if len(parts) == 1:
+        return content
+    
+    keys = parts[1::2]
+    parts[1::2] = [config[key] if key in config else f"{{{{{key}}}}}" for key in keys]
+    if unknown is not None:
+        unknown.update(set(keys) - config.keys())
+    
+    return ''.join(parts)
+
+def is_binary(data):
+    """Heuristic: NUL bytes in the first 8 KiB mean binary content"""
+    return b'\0' in data[:8192]
+
+def replace_placeholders(file_path, config, unknown=None, dst_path=None):
+    """
+    Replace template placeholders in a file
+    
+    Reads file_path and writes the result to dst_path (default: in place).
+    Binary or non-UTF-8 files are left untouched.
+    """
+    dst_path = dst_path or file_path
     try:
-        with open(file_path, 'r') as f:
-            content = f.read()
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        
+        try:
+            if is_binary(raw):
+                raise UnicodeDecodeError('utf-8', raw, 0, 1, 'binary content')
+            content = raw.decode('utf-8')
+        except UnicodeDecodeError:
+            if dst_path != file_path:
+                shutil.copy2(file_path, dst_path)
+            return True
         
         # Replace all placeholders
-        for key, value in config.items():
-            placeholder = f"{{{{{key}}}}}"
-            content = content.replace(placeholder, value)
+        rendered = substitute_placeholders(content, config, unknown)
         
-        with open(file_path, 'w') as f:
-            f.write(content)
+        if rendered != content or dst_path != file_path:
+            with open(dst_path, 'w', encoding='utf-8', newline='') as f:
+                f.write(rendered)
+            if dst_path != file_path:
+                shutil.copystat(file_path, dst_path)
         
         return True
     except Exception as e:
         print(f"❌ Error processing {file_path}: {e}")
         return False
 
-def initialize_project(template_dir, target_dir, config):
-    """Initialize a new project from template"""
-    print(f"\n🚀 Initializing project in {target_dir}")
-    print("=" * 50)
-
-    # Create target directory
-    os.makedirs(target_dir, exist_ok=True)
-
-    # Initialize git repo if not present
-    git_dir = os.path.join(target_dir, '.git')
-    if not os.path.exists(git_dir):
-        import subprocess
-        try:
-            subprocess.run(['git', 'init'], cwd=target_dir, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            print("✅ Initialized empty git repository.")
-        except Exception as e:
-            print(f"⚠️  Could not initialize git repository: {e}")
-
-    # Copy template files
-    import shutil
-
+def copy_template_tree(template_dir, target_dir, config, workers=None):
+    """
+    Copy the template tree into target_dir, rendering placeholders in parallel
+    
+    Returns:
+        Tuple of (relative paths copied, unknown placeholder keys, failed paths)
+    """
+    jobs = []
     for root, dirs, files in os.walk(template_dir):
         # Skip __pycache__ and .git directories
-        dirs[:] = [d for d in dirs if d not in ['__pycache__', '.git', '.pytest_cache']]
-
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        
         for file in files:
             if file.endswith('.pyc'):
                 continue
-
+            
             # Skip the template's main README (keep it for template users only)
             if file == 'README.md':
                 continue
-
+            
             src_path = os.path.join(root, file)
             rel_path = os.path.relpath(src_path, template_dir)
-
+            
             # Handle special case: PROJECT_README.md becomes README.md in generated project
             if file == 'PROJECT_README.md':
                 rel_path = rel_path.replace('PROJECT_README.md', 'README.md')
-
+            
             # Handle placeholder filenames
             if '{{' in rel_path:
-                # Replace placeholders in path
-                for key, value in config.items():
-                    rel_path = rel_path.replace(f"{{{{{key}}}}}", value)
-
-            dst_path = os.path.join(target_dir, rel_path)
+                rel_path = substitute_placeholders(rel_path, config)
+            
+            jobs.append((src_path, rel_path))
+    
+    # Create directories up front so workers never race on makedirs
+    for dst_dir in {os.path.dirname(os.path.join(target_dir, rel)) for _, rel in jobs}:
+        os.makedirs(dst_dir, exist_ok=True)
+    
+    unknown = set()
+    
+    def process(job):
+        src_path, rel_path = job
+        dst_path = os.path.join(target_dir, rel_path)
+        # Replace placeholders in content (check the destination filename, not source)
+        if dst_path.endswith(TEXT_EXTENSIONS):
+            found = set()
+            ok = replace_placeholders(src_path, config, found, dst_path=dst_path)
+            return rel_path, ok, found
+        try:
+            shutil.copy2(src_path, dst_path)
+        except OSError as e:
+            print(f"❌ Error copying {src_path}: {e}")
+            return rel_path, False, set()
+        return rel_path, True, set()
+    
+    copied, failed = [], []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for rel_path, ok, found in pool.map(process, jobs):
+            (copied if ok else failed).append(rel_path)
+            unknown |= found
+    
+    return copied, unknown, failed
 
-            # Create directory if needed
-            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+def initialize_project(template_dir, target_dir, config, workers=None):
+    """
+    Initialize a new project from template
+    
+    Returns:
+        bool: True if every template file was copied
+    """
+    print(f"\n🚀 Initializing project in {target_dir}")
+    print("=" * 50)
 
-            # Copy file
-            shutil.copy2(src_path, dst_path)
+    # Create target directory
+    os.makedirs(target_dir, exist_ok=True)
 
-            # Replace placeholders in content (check the destination filename, not source)
-            dst_filename = os.path.basename(dst_path)
-            if dst_filename.endswith(('.md', '.py', '.sh', '.txt', '.json', '.yml', '.yaml')):
-                replace_placeholders(dst_path, config)
+    # Initialize git repo if not present
+    git_dir = os.path.join(target_dir, '.git')
+    if not os.path.exists(git_dir):
+        import subprocess
+        try:
+            subprocess.run(['git', 'init'], cwd=target_dir, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            print("✅ Initialized empty git repository.")
+        except Exception as e:
+            print(f"⚠️  Could not initialize git repository: {e}")
 
-            print(f"✅ {rel_path}")
+    # Copy template files
+    copied, unknown, failed = copy_template_tree(template_dir, target_dir, config, workers)
+    for rel_path in copied:
+        print(f"✅ {rel_path}")
+    if unknown:
+        print(f"⚠️  Unknown placeholders left as-is: {', '.join(sorted(unknown))}")
+    if failed:
+        print(f"\n❌ {len(failed)} template file(s) could not be copied:")
+        for rel_path in failed:
+            print(f"   {rel_path}")
+        print(f"📁 Partial project left in {target_dir}")
+        return False
 
     # Make scripts executable
     scripts_dir = os.path.join(target_dir, 'scripts')
@@ -210,6 +297,7 @@ def initialize_project(template_dir, target_dir, config):
     print(f"   Open in your IDE and see AI_KICKOFF.md")
     print(f"   Let AI read BOOTSTRAP_PROMPT.md and create your roadmap!")
     print(f"   Each feature will use: ./scripts/create-branch.sh")
+    return True
 
 def main():
     """Main initializer"""
@@ -227,7 +315,8 @@ def main():
     config = get_project_config(target_dir, user_config)
     
     # Initialize project
-    initialize_project(template_dir, target_dir, config)
+    if not initialize_project(template_dir, target_dir, config):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
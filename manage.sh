@@ -7,6 +7,11 @@ PROJECT_NAME="hello world app"
 SERVICE_NAME="hello_world_app"
 PORT="5000"
 PYTHON_COMMAND="hello_world_app.py"
+PID_FILE="$(pwd)/${SERVICE_NAME}.pid"
+# Seconds to wait for a graceful stop (drain deadline plus exit hooks) before SIGKILL
+STOP_TIMEOUT="${STOP_TIMEOUT:-20}"
+# Seconds to wait for a replacement to warm up during a rolling restart
+RESTART_TIMEOUT="${RESTART_TIMEOUT:-60}"
 
 show_help() {
     echo "🚀 $PROJECT_NAME Management"
@@ -16,7 +21,7 @@ show_help() {
     echo "  setup     - Set up development environment"
     echo "  start     - Start $SERVICE_NAME"
     echo "  stop      - Stop $SERVICE_NAME" 
-    echo "  restart   - Restart $SERVICE_NAME"
+    echo "  restart   - Zero-downtime rolling restart of $SERVICE_NAME"
     echo "  status    - Check $SERVICE_NAME status"
     echo "  logs      - View $SERVICE_NAME logs"
     echo "  clean     - Clean up temporary files"
@@ -96,9 +101,10 @@ start_service() {
         rm -f .env_port
     fi
     
-    # Start the service with the available port
+    # Start the service with the available port (it rewrites the PID file on rolling restarts)
     export PORT=$AVAILABLE_PORT
-    .venv/bin/python $PYTHON_COMMAND &
+    export PID_FILE
+    .venv/bin/python $PYTHON_COMMAND >> "${SERVICE_NAME}.log" 2>&1 &
     PID=$!
     echo $PID > "${SERVICE_NAME}.pid"
     
@@ -121,9 +127,15 @@ stop_service() {
     if [ -f "${SERVICE_NAME}.pid" ]; then
         PID=$(cat "${SERVICE_NAME}.pid")
         if ps -p $PID > /dev/null 2>&1; then
-            kill $PID
+            # SIGTERM: the app goes not-ready, drains in-flight requests, flushes and exits
+            kill -TERM $PID
+            if wait_for_exit $PID $STOP_TIMEOUT; then
+                echo "✅ $SERVICE_NAME stopped"
+            else
+                echo "⚠️  $SERVICE_NAME did not stop within ${STOP_TIMEOUT}s, killing"
+                kill -KILL $PID 2>/dev/null || true
+            fi
             rm -f "${SERVICE_NAME}.pid"
-            echo "✅ $SERVICE_NAME stopped"
         else
             echo "⚠️  $SERVICE_NAME was not running"
             rm -f "${SERVICE_NAME}.pid"
@@ -133,6 +145,83 @@ stop_service() {
     fi
 }
 
+wait_for_exit() {
+    local pid=$1
+    local timeout=$2
+    local waited=0
+    
+    while ps -p $pid > /dev/null 2>&1; do
+        if [ $waited -ge $((timeout * 10)) ]; then
+            return 1
+        fi
+        sleep 0.1
+        waited=$((waited + 1))
+    done
+    return 0
+}
+
+handles_signal() {
+    local pid=$1
+    local signo=$(kill -l $2)
+    local mask=$(awk '/^SigCgt:/ {print $2}' /proc/$pid/status 2>/dev/null)
+    
+    # Without /proc, assume it does; restart_service notices if the process dies instead
+    if [ -z "$mask" ]; then
+        return 0
+    fi
+    [ $(( (0x$mask >> (signo - 1)) & 1 )) -eq 1 ]
+}
+
+restart_service() {
+    if [ ! -f "${SERVICE_NAME}.pid" ] || ! ps -p $(cat "${SERVICE_NAME}.pid") > /dev/null 2>&1; then
+        start_service
+        return
+    fi
+    
+    OLD_PID=$(cat "${SERVICE_NAME}.pid")
+    # Debug mode runs Flask's own server, which has no handoff and would die on SIGUSR2
+    if ! handles_signal $OLD_PID USR2; then
+        echo "🔄 $SERVICE_NAME (PID: $OLD_PID) does not support rolling restarts, restarting it"
+        stop_service
+        start_service
+        return
+    fi
+    
+    echo "🔄 Rolling restart of $SERVICE_NAME (PID: $OLD_PID)..."
+    # SIGUSR2: start a replacement on the same listening socket; once it is
+    # ready it takes over the PID file and sends the old process SIGTERM
+    kill -USR2 $OLD_PID
+    
+    local waited=0
+    while true; do
+        NEW_PID=$(cat "${SERVICE_NAME}.pid" 2>/dev/null || true)
+        if [ -n "$NEW_PID" ] && [ "$NEW_PID" != "$OLD_PID" ]; then
+            break
+        fi
+        if ! ps -p $OLD_PID > /dev/null 2>&1; then
+            echo "⚠️  PID $OLD_PID exited without handing over, starting $SERVICE_NAME again"
+            rm -f "${SERVICE_NAME}.pid"
+            start_service
+            return
+        fi
+        if [ $waited -ge $((RESTART_TIMEOUT * 10)) ]; then
+            echo "❌ Replacement was not ready within ${RESTART_TIMEOUT}s; $SERVICE_NAME still running (PID: $OLD_PID)"
+            echo "💡 See ${SERVICE_NAME}.log"
+            exit 1
+        fi
+        sleep 0.1
+        waited=$((waited + 1))
+    done
+    
+    echo "✅ Replacement ready (PID: $NEW_PID), draining PID $OLD_PID"
+    if wait_for_exit $OLD_PID $STOP_TIMEOUT; then
+        echo "✅ $SERVICE_NAME restarted with no downtime"
+    else
+        echo "⚠️  PID $OLD_PID did not finish draining within ${STOP_TIMEOUT}s, killing"
+        kill -KILL $OLD_PID 2>/dev/null || true
+    fi
+}
+
 check_status() {
     # Check port availability
     if netstat -tuln 2>/dev/null | grep -q ":$PORT "; then
@@ -191,9 +280,7 @@ case "${1:-help}" in
         stop_service
         ;;
     restart)
-        stop_service
-        sleep 1
-        start_service
+        restart_service
         ;;
     status)
         check_status
@@ -0,0 +1,389 @@
+"""
+hello world app - Analytics Module
+Served-threat analytics via an append-only event log
+
+Delivery events are appended to an in-memory deque (append is atomic under
+the GIL, so the request path takes no lock). A background thread, started by
+the first recorded event, flushes the buffer into immutable binary segment files and periodically compacts all
+segments, from every worker, into one aggregate file. Stats are computed
+from the aggregate only, never from raw events.
+
+Threats are keyed by a 64-bit hash of their text rather than by their
+position in the pool. Positions change when the corpus is imported or
+swapped, and can differ between workers. Each segment also carries the
+text of the threats it mentions, so the aggregate can name every key
+without consulting the current corpus.
+
+Segment format: 12-byte header (b"VTEV", uint16 version, uint16 record
+size, uint32 record count), fixed 16-byte little-endian records (uint32
+unix seconds, uint64 threat key, uint32 client hash), then a UTF-8 JSON
+object mapping hex threat keys to threat texts. Version 1 segments and
+aggregates, which were keyed by position, are ignored.
+
+The aggregate keeps per-threat totals for at most max_keys threats (the
+least delivered are dropped first) and, like the per-minute counts, keeps
+the set of client hashes seen each minute only for the retention period,
+so it stays bounded however long the service runs. Version 2 aggregates,
+which counted clients forever, are upgraded by dropping those counts.
+"""
+
+import atexit
+import fcntl
+import hashlib
+import heapq
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+SEGMENT_MAGIC = b"VTEV"
+SEGMENT_VERSION = 2
+RECORD = struct.Struct("<IQI")
+HEADER = struct.Struct("<4sHHI")
+AGGREGATE_VERSION = 3
+AGGREGATE_FILE = "aggregates.json"
+LOCK_FILE = "compaction.lock"
+
+def threat_key(threat: str) -> int:
+    """
+    Stable 64-bit key for a threat's text
+
+    Args:
+        threat: Threat text
+
+    Returns:
+        int: Same key in every worker and for every corpus version holding the text
+    """
+    return int.from_bytes(hashlib.blake2b(threat.encode("utf-8"), digest_size=8).digest(), "little")
+
+def format_key(key: int) -> str:
+    """Aggregate/JSON form of a threat key (16 hex digits)"""
+    return f"{key:016x}"
+
+def client_hash(client: str) -> int:
+    """
+    Hash a client identifier (e.g. remote address) to 32 bits
+
+    Args:
+        client: Client identifier
+
+    Returns:
+        int: Stable 32-bit hash, so raw addresses never touch disk
+    """
+    return zlib.crc32(client.encode("utf-8", "replace"))
+
+def write_segment(directory: str, records: List[tuple], name: str,
+                  names: Optional[Dict[str, str]] = None) -> str:
+    """
+    Write one immutable segment file (atomically, via rename)
+
+    Args:
+        directory: Segment directory
+        records: (timestamp, threat_key, client_hash) tuples
+        name: Segment file name (must end in .seg)
+        names: Hex threat key -> threat text for the keys in records
+
+    Returns:
+        str: Path of the written segment
+    """
+    path = os.path.join(directory, name)
+    tmp_path = path + ".tmp"
+    pack = RECORD.pack
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION, RECORD.size, len(records)))
+        f.write(b"".join([pack(*record) for record in records]))
+        f.write(json.dumps(names or {}, separators=(",", ":")).encode("utf-8"))
+    os.replace(tmp_path, path)
+    return path
+
+def read_segment(path: str) -> Tuple[Iterator[tuple], Dict[str, str]]:
+    """
+    Read the records and threat names of a segment file
+
+    Args:
+        path: Segment path
+
+    Returns:
+        Tuple of an iterator of (timestamp, threat_key, client_hash) tuples
+        and the hex threat key -> text mapping
+
+    Raises:
+        ValueError: For a segment from another format version or a torn write
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, record_size, count = HEADER.unpack_from(data)
+    if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION or record_size != RECORD.size:
+        raise ValueError(f"Unsupported segment {path}")
+    end = HEADER.size + count * RECORD.size
+    names = json.loads(data[end:]) if len(data) > end else {}
+    return RECORD.iter_unpack(memoryview(data)[HEADER.size:end]), names
+
+def empty_aggregate() -> Dict[str, Any]:
+    return {"version": AGGREGATE_VERSION, "total": 0, "counts": {}, "minutes": {}, "minute_clients": {},
+            "names": {}, "compacted_at": None}
+
+def load_aggregate(directory: str) -> Dict[str, Any]:
+    """
+    Load the compacted aggregate for a directory
+
+    Args:
+        directory: Analytics directory
+
+    Returns:
+        Dict: Aggregate (empty if nothing has been compacted yet, or if the
+            file is a position-keyed version 1 aggregate)
+    """
+    try:
+        with open(os.path.join(directory, AGGREGATE_FILE), "r") as f:
+            aggregate = json.load(f)
+    except (OSError, ValueError):
+        return empty_aggregate()
+    if aggregate.get("version") == 2:
+        del aggregate["clients"]
+        aggregate.update(version=AGGREGATE_VERSION, minute_clients={})
+    if aggregate.get("version") != AGGREGATE_VERSION:
+        return empty_aggregate()
+    return aggregate
+
+def compact(directory: str, retention_minutes: int = 10080, blocking: bool = False,
+            max_keys: int = 100_000) -> Optional[int]:
+    """
+    Fold all segment files into the aggregate and delete them
+
+    Per-threat totals are kept for the max_keys most delivered threats;
+    per-minute buckets and clients older than retention_minutes are
+    dropped, along with the names no remaining count refers to. Only one
+    process compacts at a time (flock on compaction.lock).
+
+    Args:
+        directory: Analytics directory
+        retention_minutes: How long per-minute buckets and clients are kept
+        blocking: Wait for another compactor instead of skipping
+        max_keys: Most threats to keep all-time totals for
+
+    Returns:
+        Number of events compacted, or None if another process holds the lock
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK_FILE), "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            return None
+        try:
+            segments = sorted(name for name in os.listdir(directory) if name.endswith(".seg"))
+            if not segments:
+                return 0
+
+            aggregate = load_aggregate(directory)
+            counts = aggregate["counts"]
+            minutes = aggregate["minutes"]
+            known_names = aggregate["names"]
+            minute_clients = {minute: set(hashes) for minute, hashes in aggregate["minute_clients"].items()}
+            compacted = 0
+            for name in segments:
+                try:
+                    records, names = read_segment(os.path.join(directory, name))
+                except (OSError, ValueError, struct.error):
+                    continue
+                known_names.update(names)
+                for timestamp, threat_key, client in records:
+                    key = format_key(threat_key)
+                    counts[key] = counts.get(key, 0) + 1
+                    minute = str(timestamp // 60)
+                    bucket = minutes.setdefault(minute, {})
+                    bucket[key] = bucket.get(key, 0) + 1
+                    minute_clients.setdefault(minute, set()).add(client)
+                    compacted += 1
+
+            cutoff = int(time.time()) // 60 - retention_minutes
+            for minute in [m for m in minutes if int(m) < cutoff]:
+                del minutes[minute]
+            for minute in [m for m in minute_clients if int(m) < cutoff]:
+                del minute_clients[minute]
+            aggregate["minute_clients"] = {minute: sorted(hashes) for minute, hashes in minute_clients.items()}
+            if len(counts) > max_keys:
+                counts = dict(heapq.nlargest(max_keys, counts.items(), key=lambda item: item[1]))
+                aggregate["counts"] = counts
+            named = set(counts)
+            for bucket in minutes.values():
+                named.update(bucket)
+            aggregate["names"] = {key: text for key, text in known_names.items() if key in named}
+
+            aggregate["total"] += compacted
+            aggregate["compacted_at"] = time.time()
+            tmp_path = os.path.join(directory, AGGREGATE_FILE + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(aggregate, f, separators=(",", ":"))
+            os.replace(tmp_path, os.path.join(directory, AGGREGATE_FILE))
+
+            for name in segments:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+            return compacted
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def compute_stats(aggregate: Dict[str, Any], top: int = 10,
+                  window_seconds: Optional[int] = None,
+                  now: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Summarize an aggregate: totals, top-K threats and per-threat counts
+
+    Threats are identified by their hex key and named from the aggregate, so
+    the result doesn't depend on which corpus is currently loaded.
+
+    Args:
+        aggregate: Aggregate from load_aggregate()
+        top: Number of top threats to return
+        window_seconds: Restrict counts and clients to the last N seconds (minute granularity)
+        now: Reference time for the window (default: current time)
+
+    Returns:
+        Dict with total, top list, per-threat counts and unique clients
+        (over the window, or else over the retention period)
+    """
+    clients = set()
+    if window_seconds:
+        first_minute = int((now or time.time()) - window_seconds) // 60
+        counts: Dict[str, int] = {}
+        for minute, bucket in aggregate["minutes"].items():
+            if int(minute) >= first_minute:
+                for key, count in bucket.items():
+                    counts[key] = counts.get(key, 0) + count
+        for minute, hashes in aggregate["minute_clients"].items():
+            if int(minute) >= first_minute:
+                clients.update(hashes)
+    else:
+        counts = aggregate["counts"]
+        for hashes in aggregate["minute_clients"].values():
+            clients.update(hashes)
+
+    names = aggregate["names"]
+    top_items = heapq.nlargest(top, counts.items(), key=lambda item: item[1])
+    return {
+        "total_deliveries": sum(counts.values()),
+        "window_seconds": window_seconds,
+        "top": [{"threat_key": key, "threat": names.get(key, ""), "count": count}
+                for key, count in top_items],
+        "counts": {key: counts[key] for key in sorted(counts)},
+        "unique_clients": len(clients),
+        "compacted_at": aggregate["compacted_at"]
+    }
+
+class AnalyticsRecorder:
+    """Buffers delivery events in memory and flushes/compacts them in the background"""
+
+    def __init__(self, directory: str = "analytics", flush_interval: float = 1.0,
+                 compact_interval: float = 30.0, retention_minutes: int = 10080,
+                 max_buffer: int = 1_000_000, max_keys: int = 100_000):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.retention_minutes = retention_minutes
+        self.max_keys = max_keys
+        # Bounded so a stalled flusher sheds the oldest events instead of growing forever
+        self.buffer: deque = deque(maxlen=max_buffer)
+        self._segment_seq = 0
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._atexit_registered = False
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._aggregate_cache = (None, empty_aggregate())
+        self._stats_cache = (None, None)
+
+    def record(self, threat: str, client: str = "") -> None:
+        """Record one delivery of a threat's text; lock-free on the request path"""
+        self.buffer.append((int(time.time()), threat_key(threat), client_hash(client), threat))
+        # Also restarts a flusher that died, rather than buffering until the deque overflows
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+
+    def flush(self) -> int:
+        """Move buffered events into a new segment file; returns events written"""
+        with self._flush_lock:
+            records = []
+            names = {}
+            popleft = self.buffer.popleft
+            for _ in range(len(self.buffer)):
+                timestamp, key, client, threat = popleft()
+                records.append((timestamp, key, client))
+                names[key] = threat
+            if not records:
+                return 0
+            os.makedirs(self.directory, exist_ok=True)
+            self._segment_seq += 1
+            name = f"{time.time_ns():020d}-{os.getpid()}-{self._segment_seq}.seg"
+            write_segment(self.directory, records, name,
+                          {format_key(key): threat for key, threat in names.items()})
+            return len(records)
+
+    def compact(self, blocking: bool = False) -> Optional[int]:
+        """Fold segments from all workers into the aggregate"""
+        return compact(self.directory, self.retention_minutes, blocking, self.max_keys)
+
+    def aggregate(self) -> Dict[str, Any]:
+        """Current aggregate, re-read only when the file changes"""
+        path = os.path.join(self.directory, AGGREGATE_FILE)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self._aggregate_cache = (None, empty_aggregate())
+            return self._aggregate_cache[1]
+        cached_mtime, cached = self._aggregate_cache
+        if cached_mtime != mtime:
+            cached = load_aggregate(self.directory)
+            self._aggregate_cache = (mtime, cached)
+        return cached
+
+    def stats(self, top: int = 10, window_seconds: Optional[int] = None) -> Dict[str, Any]:
+        """Stats from the compacted aggregate (raw events are never scanned)"""
+        aggregate = self.aggregate()
+        # Windows have minute granularity, so a result is reusable within the minute
+        key = (self._aggregate_cache[0], top, window_seconds,
+               int(time.time()) // 60 if window_seconds else None)
+        cached_key, cached = self._stats_cache
+        if cached_key != key:
+            cached = compute_stats(aggregate, top, window_seconds)
+            self._stats_cache = (key, cached)
+        return cached
+
+    def start(self) -> None:
+        """Start the background flush/compaction thread (done automatically on the first record)"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="analytics-flusher", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def stop(self) -> None:
+        """Stop the background thread and flush what's left"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        next_compaction = time.monotonic() + self.compact_interval
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+                if time.monotonic() >= next_compaction:
+                    self.compact()
+                    next_compaction = time.monotonic() + self.compact_interval
+            except Exception as e:
+                # One bad flush or compaction must not stop the flusher for good
+                print(f"⚠️ Analytics flush failed: {e}")
@@ -0,0 +1,199 @@
+"""
+hello world app - Bulk Generation Module
+Offline generation of threat fixtures (JSON, NDJSON or CSV), no Flask needed
+
+In random mode every pool threat is serialized once up front; a batch is
+then just random.choices() over the pre-rendered lines joined into one
+string, so output speed is bounded by the file write rather than by JSON
+or CSV encoding. Generated mode samples the n-gram model per record.
+
+    python -m modules.bulkgen 1000000 --format ndjson --output threats.ndjson
+    python -m modules.bulkgen 10000000 --format csv --output seed.csv --workers 4
+
+With --workers each process writes its own shard (seed-000.csv, ...).
+"""
+
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+if __package__:  # python -m modules.bulkgen: siblings are imported by bare name
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core import get_corpus, swap_corpus
+from generator import MarkovModel, get_model
+
+FORMATS = ("ndjson", "json", "csv")
+MODES = ("random", "generated")
+CSV_HEADER = "threat_id,threat\n"
+
+# Records per writelines() chunk
+BATCH_SIZE = 65_536
+
+def render_lines(records: Iterable[Tuple[Optional[int], str]], fmt: str) -> List[str]:
+    """
+    Serialize (threat_id, threat) records
+
+    Args:
+        records: (threat_id, threat) pairs; threat_id may be None
+        fmt: "ndjson" and "csv" lines end in a newline; "json" items don't
+            (iter_chunks adds the array separators)
+
+    Returns:
+        List of serialized records
+    """
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        lines = []
+        for threat_id, threat in records:
+            writer.writerow(("" if threat_id is None else threat_id, threat))
+            lines.append(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+        return lines
+    dumps = json.dumps
+    suffix = "" if fmt == "json" else "\n"
+    return [dumps({"threat_id": threat_id, "threat": threat}) + suffix for threat_id, threat in records]
+
+def iter_chunks(count: int, fmt: str = "ndjson", mode: str = "random",
+                seed: Optional[int] = None, batch_size: int = BATCH_SIZE,
+                threats: Optional[Sequence[str]] = None) -> Iterator[str]:
+    """
+    Yield the serialized output for count threats, one string per batch
+
+    Args:
+        count: Number of records
+        fmt: One of FORMATS
+        mode: "random" (pool threats) or "generated" (n-gram model)
+        seed: Seed for reproducible output
+        batch_size: Records per yielded chunk
+        threats: Pool to draw from (default: current corpus)
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'")
+    if mode not in MODES:
+        raise ValueError(f"Unsupported mode '{mode}'")
+    rng = random.Random(seed)
+    if mode == "random":
+        pool = render_lines(enumerate(threats or get_corpus().threats), fmt)
+
+        def batch_lines(n):
+            return rng.choices(pool, k=n)
+    else:
+        model = get_model() if threats is None else MarkovModel.train(threats)
+
+        def batch_lines(n):
+            return render_lines(((None, text) for text in model.generate_many(n, rng)), fmt)
+
+    if fmt == "csv":
+        yield CSV_HEADER
+    separator = ",\n" if fmt == "json" else ""
+    remaining = count
+    first = True
+    while remaining > 0:
+        n = min(batch_size, remaining)
+        remaining -= n
+        chunk = separator.join(batch_lines(n))
+        if fmt == "json":
+            chunk = ("[\n" if first else ",\n") + chunk
+        first = False
+        yield chunk
+    if fmt == "json":
+        yield "[]\n" if first else "\n]\n"
+
+def write_threats(out: TextIO, count: int, fmt: str = "ndjson", mode: str = "random",
+                  seed: Optional[int] = None, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Write count threats to an open text stream
+
+    Returns:
+        Number of records written
+    """
+    out.writelines(iter_chunks(count, fmt, mode, seed, batch_size))
+    return count
+
+def shard_path(path: str, index: int) -> str:
+    """threats.ndjson -> threats-003.ndjson"""
+    root, ext = os.path.splitext(path)
+    return f"{root}-{index:03d}{ext}"
+
+def _write_shard(args) -> Tuple[str, int]:
+    path, count, fmt, mode, seed, batch_size, threats = args
+    if threats:
+        swap_corpus(threats)
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        write_threats(f, count, fmt, mode, seed, batch_size)
+    return path, count
+
+def write_shards(path: str, count: int, workers: int, fmt: str = "ndjson",
+                 mode: str = "random", seed: Optional[int] = None,
+                 batch_size: int = BATCH_SIZE) -> List[Tuple[str, int]]:
+    """
+    Split count records across a process pool, one output file per worker
+
+    Returns:
+        List of (shard path, records written)
+    """
+    # A tuple pickles to the workers even when the corpus is an mmap'd snapshot
+    corpus = tuple(get_corpus().threats)
+    base_seed = random.randrange(1 << 32) if seed is None else seed
+    shares = [count // workers + (1 if i < count % workers else 0) for i in range(workers)]
+    jobs = [(shard_path(path, i), share, fmt, mode, base_seed + i, batch_size, corpus)
+            for i, share in enumerate(shares)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_write_shard, jobs))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point; returns an exit code"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m modules.bulkgen",
+                                     description="Generate threat fixtures without starting Flask")
+    parser.add_argument("count", type=int, help="Number of threats to write")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson", help="Output format (default: ndjson)")
+    parser.add_argument("--mode", choices=MODES, default="random", help="Pool threats or n-gram synthesis")
+    parser.add_argument("--output", "-o", default="-", help="Output file ('-' for stdout)")
+    parser.add_argument("--workers", type=int, default=1, help="Processes; each writes its own shard file")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible output")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Records per write")
+    parser.add_argument("--corpus-file", help="NDJSON pool to draw from (default: built-in threats)")
+    args = parser.parse_args(argv)
+
+    if args.count < 0 or args.workers < 1 or args.batch_size < 1:
+        parser.error("count must be >= 0; workers and batch size must be >= 1")
+    if args.workers > 1 and args.output == "-":
+        parser.error("--workers needs --output (one file per worker)")
+    if args.corpus_file:
+        from importer import load_corpus
+        threats = load_corpus(args.corpus_file)
+        if not threats:
+            parser.error(f"No threats in {args.corpus_file}")
+        swap_corpus(threats)
+
+    start = time.perf_counter()
+    if args.workers > 1:
+        shards = write_shards(args.output, args.count, args.workers, args.format, args.mode,
+                              args.seed, args.batch_size)
+        targets = ", ".join(path for path, _ in shards)
+    elif args.output == "-":
+        write_threats(sys.stdout, args.count, args.format, args.mode, args.seed, args.batch_size)
+        sys.stdout.flush()
+        targets = "stdout"
+    else:
+        with open(args.output, "w", encoding="utf-8", buffering=1 << 20) as f:
+            write_threats(f, args.count, args.format, args.mode, args.seed, args.batch_size)
+        targets = args.output
+    elapsed = time.perf_counter() - start
+    rate = args.count / elapsed if elapsed > 0 else float("inf")
+    print(f"✅ Wrote {args.count:,} threats to {targets} in {elapsed:.2f}s ({rate:,.0f}/s)", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+hello world app - Traffic Capture Module
+Sampled request capture for replay-based performance regression testing
+
+TrafficCapture is WSGI middleware. For a sampled fraction of requests it
+records arrival time, method, path, query string, an allowlist of headers,
+the status and the server-side duration. The request path only appends a
+tuple to a deque; a background thread writes one compact NDJSON line per
+request:
+
+    {"t":1792417468123.4,"m":"GET","p":"/api/threat","q":"mode=generated",
+     "h":{"Accept":"application/json"},"s":200,"d":1.27}
+
+t is the arrival time in epoch milliseconds; d is the server duration in
+milliseconds. Each worker appends to its own capture-<pid>.ndjson. Past
+max_bytes that file is rotated to a gzipped capture-<pid>-<n>.ndjson.gz,
+and only the newest max_files rotated files are kept.
+
+Re-drive a capture with python -m modules.replay.
+"""
+
+import gzip
+import json
+import os
+import random
+import shutil
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from werkzeug.wsgi import ClosingIterator
+
+# Headers worth replaying; credentials and cookies are never recorded
+DEFAULT_HEADERS = ("Accept", "Accept-Encoding", "If-None-Match", "User-Agent")
+
+def _environ_key(header: str) -> str:
+    return "HTTP_" + header.upper().replace("-", "_")
+
+class TrafficCapture:
+    """WSGI middleware sampling request metadata to rotating capture files"""
+
+    def __init__(self, app, directory: str = "captures",
+                 sample_rate: Union[float, Callable[[], float]] = 0.0,
+                 headers: Iterable[str] = DEFAULT_HEADERS,
+                 max_bytes: int = 16 * 1024 * 1024, max_files: int = 10,
+                 flush_interval: float = 1.0, max_buffer: int = 100_000,
+                 skip: Optional[Callable[[Dict[str, Any]], bool]] = None):
+        """
+        Args:
+            app: WSGI application to wrap
+            directory: Where capture files are written
+            sample_rate: Fraction of requests to record, or a callable returning
+                it (read per request, so hot-reloaded config applies at once)
+            headers: Request headers to record when present
+            max_bytes: Rotate a worker's active file past this size
+            max_files: Rotated files to keep (oldest are deleted)
+            flush_interval: Seconds between background writes
+            max_buffer: Records held in memory before the oldest are dropped
+            skip: Predicate on the WSGI environ for requests never to record
+        """
+        self.app = app
+        self.directory = directory
+        self._rate = sample_rate if callable(sample_rate) else (lambda: sample_rate)
+        self.headers = {name: _environ_key(name) for name in headers}
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.flush_interval = flush_interval
+        self.skip = skip
+        self.buffer: deque = deque(maxlen=max_buffer)
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __call__(self, environ, start_response):
+        rate = self._rate()
+        if rate <= 0 or (rate < 1 and random.random() >= rate) or (self.skip and self.skip(environ)):
+            return self.app(environ, start_response)
+
+        arrival = time.time()
+        started = time.perf_counter()
+        status = [0]
+
+        def start(status_line, response_headers, exc_info=None):
+            status[0] = int(status_line.split(" ", 1)[0])
+            return start_response(status_line, response_headers, exc_info)
+
+        def finished():
+            headers = {name: environ[key] for name, key in self.headers.items() if key in environ}
+            self.buffer.append((arrival, environ.get("REQUEST_METHOD", "GET"), environ.get("PATH_INFO", "/"),
+                                environ.get("QUERY_STRING", ""), headers, status[0] or 500,
+                                time.perf_counter() - started))
+            if self._thread is None:
+                self.start()
+
+        try:
+            return ClosingIterator(self.app(environ, start), finished)
+        except BaseException:
+            finished()
+            raise
+
+    def _active_path(self) -> str:
+        return os.path.join(self.directory, f"capture-{os.getpid()}.ndjson")
+
+    def flush(self) -> int:
+        """Write buffered records to this worker's active file; returns records written"""
+        with self._flush_lock:
+            records = []
+            popleft = self.buffer.popleft
+            for _ in range(len(self.buffer)):
+                records.append(popleft())
+            if not records:
+                return 0
+            dumps = json.dumps
+            lines = "".join(
+                dumps({"t": round(arrival * 1000, 1), "m": method, "p": path, "q": query,
+                       "h": headers, "s": status, "d": round(duration * 1000, 3)},
+                      separators=(",", ":")) + "\n"
+                for arrival, method, path, query, headers, status, duration in records)
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._active_path()
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                size = f.tell()
+            if size >= self.max_bytes:
+                self._rotate(path)
+            return len(records)
+
+    def _rotate(self, path: str) -> None:
+        rotated = f"{path[:-len('.ndjson')]}-{time.time_ns()}.ndjson.gz"
+        with open(path, "rb") as src, gzip.open(rotated + ".tmp", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(rotated + ".tmp", rotated)
+        os.remove(path)
+        archives = sorted((entry for entry in os.scandir(self.directory) if entry.name.endswith(".ndjson.gz")),
+                          key=lambda entry: entry.stat().st_mtime)
+        for entry in archives[:max(0, len(archives) - self.max_files)]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def start(self) -> None:
+        """Start the background writer (done automatically on the first sampled request)"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background writer and flush what's left"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"⚠️ Traffic capture write failed: {e}")
+
+def capture_files(paths: Iterable[str]) -> List[str]:
+    """Expand directories into their capture files (.ndjson and .ndjson.gz)"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.endswith((".ndjson", ".ndjson.gz"))))
+        else:
+            files.append(path)
+    return files
+
+def load_captures(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Read capture files (or directories of them) into one arrival-ordered stream
+
+    Returns:
+        List of records sorted by arrival time; malformed lines are skipped
+    """
+    records = []
+    for path in capture_files(paths):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and "t" in record and "p" in record:
+                    records.append(record)
+    records.sort(key=lambda record: record["t"])
+    return records
@@ -0,0 +1,237 @@
+"""
+hello world app - Config Module
+Layered, hot-reloaded configuration
+
+This module loads configuration once from layered sources (defaults, config
+file, environment, CLI) into an immutable snapshot and swaps snapshots
+atomically when the config file changes, so per-request reads are plain
+attribute lookups with no filesystem access.
+"""
+
+import json
+import os
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional
+
+from utils import DEFAULT_CONFIG, save_log
+
+# Unprefixed environment variables the app has always honoured
+DEFAULT_ENV_ALIASES = {"PORT": "port", "DEBUG": "debug"}
+
+class ConfigSnapshot(Mapping):
+    """Immutable view of one configuration generation with attribute access"""
+
+    __slots__ = ("_data", "version")
+
+    def __init__(self, data: Dict[str, Any], version: int = 0):
+        object.__setattr__(self, "_data", MappingProxyType(dict(data)))
+        object.__setattr__(self, "version", version)
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._data[name]
+        except KeyError:
+            raise AttributeError(f"No config key '{name}'") from None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("ConfigSnapshot is immutable")
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"ConfigSnapshot(version={self.version}, {dict(self._data)!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a mutable copy of the configuration"""
+        return dict(self._data)
+
+def parse_value(raw: str) -> Any:
+    """
+    Parse an env/CLI string into bool, int, float, JSON or plain string
+
+    Args:
+        raw: Raw string value
+
+    Returns:
+        Any: Parsed value
+    """
+    lowered = raw.strip().lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+def env_layer(environ: Mapping[str, str], prefix: str = "APP_",
+              aliases: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+    """
+    Collect config overrides from environment variables
+
+    Args:
+        environ: Environment mapping (usually os.environ)
+        prefix: Variables named PREFIX_KEY map to key
+        aliases: Extra variable -> key mappings (e.g. PORT -> port)
+
+    Returns:
+        Dict: Overrides found in the environment
+    """
+    layer = {}
+    for var, key in (aliases or {}).items():
+        if var in environ:
+            layer[key] = parse_value(environ[var])
+    if prefix:
+        for var, raw in environ.items():
+            if var.startswith(prefix) and len(var) > len(prefix):
+                layer[var[len(prefix):].lower()] = parse_value(raw)
+    return layer
+
+def cli_layer(args: Iterable[str]) -> Dict[str, Any]:
+    """
+    Collect config overrides from --key=value command-line arguments
+
+    Args:
+        args: Command-line arguments (usually sys.argv[1:])
+
+    Returns:
+        Dict: Overrides given on the command line
+    """
+    layer = {}
+    for arg in args:
+        if arg.startswith("--") and "=" in arg:
+            key, raw = arg[2:].split("=", 1)
+            layer[key.replace("-", "_")] = parse_value(raw)
+    return layer
+
+class ConfigService:
+    """
+    Loads layered configuration once and hot-swaps snapshots on file change
+
+    Precedence (lowest to highest): defaults, config file, environment, CLI.
+    """
+
+    def __init__(self, config_path: str = "config.json",
+                 defaults: Optional[Mapping[str, Any]] = None,
+                 env_prefix: str = "APP_",
+                 env_aliases: Optional[Mapping[str, str]] = None,
+                 cli_args: Optional[Iterable[str]] = None,
+                 environ: Optional[Mapping[str, str]] = None):
+        self.config_path = config_path
+        self.defaults = dict(DEFAULT_CONFIG if defaults is None else defaults)
+        self.env_overrides = env_layer(os.environ if environ is None else environ, env_prefix,
+                                       DEFAULT_ENV_ALIASES if env_aliases is None else env_aliases)
+        self.cli_overrides = cli_layer(cli_args or [])
+        self._file_signature = None
+        self._file_data: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self.snapshot = ConfigSnapshot({}, version=0)
+        self.reload(force=True)
+
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.config_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Re-read the config file if it changed and swap in a new snapshot
+
+        A file that fails to parse keeps the previous snapshot in place.
+
+        Args:
+            force: Rebuild the snapshot even if the file looks unchanged
+
+        Returns:
+            bool: True if a new snapshot was published
+        """
+        with self._lock:
+            signature = self._stat_signature()
+            if not force and signature == self._file_signature:
+                return False
+
+            file_data = {}
+            if signature is not None:
+                try:
+                    with open(self.config_path, "r") as f:
+                        file_data = json.load(f)
+                    if not isinstance(file_data, dict):
+                        raise ValueError("top-level JSON value must be an object")
+                except (OSError, ValueError) as e:
+                    save_log(f"Could not load config from {self.config_path}: {e}", "WARNING")
+                    self._file_signature = signature
+                    if not force:
+                        return False
+                    file_data = self._file_data
+
+            self._file_signature = signature
+            self._file_data = file_data
+            merged = {**self.defaults, **file_data, **self.env_overrides, **self.cli_overrides}
+            # Single reference assignment: readers see either the old or the new snapshot
+            self.snapshot = ConfigSnapshot(merged, version=self.snapshot.version + 1)
+            return True
+
+    def start_watching(self, interval: float = 1.0) -> None:
+        """
+        Poll the config file in a daemon thread and reload on change
+
+        Args:
+            interval: Seconds between checks
+        """
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+
+        def watch():
+            while not self._stop_event.wait(interval):
+                self.reload()
+
+        self._watcher = threading.Thread(target=watch, name="config-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        """Stop the file watcher thread"""
+        self._stop_event.set()
+        if self._watcher:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+_service: Optional[ConfigService] = None
+_service_lock = threading.Lock()
+
+def get_config_service(**kwargs: Any) -> ConfigService:
+    """
+    Get the process-wide config service, creating it on first use
+
+    Args:
+        **kwargs: ConfigService options, only honoured on first call
+
+    Returns:
+        ConfigService: Shared config service
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ConfigService(**kwargs)
+    return _service
+
+def get_config() -> ConfigSnapshot:
+    """
+    Get the current configuration snapshot
+
+    Returns:
+        ConfigSnapshot: Immutable config with attribute access
+    """
+    return get_config_service().snapshot
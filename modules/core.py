@@ -5,9 +5,21 @@ Core business logic for Imperial threats
 This module contains the core business logic for the Darth Vader threat generator.
 """
 
+import base64
+import binascii
+import hashlib
 import random
+import re
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, Any, List
+from itertools import islice
+from typing import Callable, Dict, Any, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; validate_many falls back to pure Python
+    np = None
 
 # Imperial Threat Pool
 VADER_THREATS = [
@@ -28,6 +40,275 @@ VADER_THREATS = [
     "Perhaps you refer to the imminent attack of your rebel fleet?"
 ]
 
+class CorpusSnapshot(NamedTuple):
+    """
+    Immutable view of the threat pool; version is a content hash
+    
+    threats is a tuple, or a read-only sequence such as an mmap'd
+    corpusmap.MappedThreats that also provides postings(term).
+    """
+    version: str
+    threats: Sequence[str]
+
+def corpus_version(threats: Sequence[str]) -> str:
+    """
+    Compute a stable content version for a threat pool
+    
+    Args:
+        threats: Threat texts in id order
+        
+    Returns:
+        str: Short hex digest, identical across workers for identical pools
+    """
+    digest = hashlib.sha256()
+    for threat in threats:
+        digest.update(threat.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+# Recent snapshots by version, so cursors issued before a corpus swap keep paging
+SNAPSHOT_HISTORY = 4
+_corpus = CorpusSnapshot(corpus_version(VADER_THREATS), tuple(VADER_THREATS))
+_snapshots: "OrderedDict[str, CorpusSnapshot]" = OrderedDict([(_corpus.version, _corpus)])
+
+# When a cursor last paged each version; retired snapshots paged within
+# CURSOR_IDLE_SECONDS are kept when the memory guard trims the history
+CURSOR_IDLE_SECONDS = 300
+_cursor_used: Dict[str, float] = {}
+
+# Callables notified with each newly published snapshot
+_swap_listeners: List[Callable[[CorpusSnapshot], None]] = []
+
+# Page sizes for list_threats
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def get_corpus() -> CorpusSnapshot:
+    """
+    Get the current corpus snapshot
+    
+    Returns:
+        CorpusSnapshot with version and threats
+    """
+    return _corpus
+
+def swap_corpus(threats: Sequence[str]) -> CorpusSnapshot:
+    """
+    Publish a new threat pool
+    
+    The snapshot is built first and then swapped in with a single reference
+    assignment, so concurrent readers see either the old or the new pool.
+    
+    Args:
+        threats: Complete new pool, in id order
+        
+    Returns:
+        CorpusSnapshot: The published snapshot
+    """
+    threats = tuple(threats)
+    if not threats:
+        raise ValueError("Threat pool cannot be empty")
+    return publish_corpus(CorpusSnapshot(corpus_version(threats), threats))
+
+def publish_corpus(snapshot: CorpusSnapshot) -> CorpusSnapshot:
+    """
+    Publish a prebuilt snapshot as-is (no copy, no rehash)
+    
+    Used for mmap'd snapshots, whose version was computed at build time.
+    
+    Args:
+        snapshot: Snapshot to serve
+        
+    Returns:
+        CorpusSnapshot: The published snapshot
+    """
+    global _corpus
+    if not len(snapshot.threats):
+        raise ValueError("Threat pool cannot be empty")
+    _snapshots[snapshot.version] = snapshot
+    _snapshots.move_to_end(snapshot.version)
+    while len(_snapshots) > SNAPSHOT_HISTORY:
+        version, _ = _snapshots.popitem(last=False)
+        _cursor_used.pop(version, None)
+    _corpus = snapshot
+    for listener in _swap_listeners:
+        listener(snapshot)
+    return snapshot
+
+def retired_snapshots() -> List[CorpusSnapshot]:
+    """Older snapshots kept only so their cursors keep paging"""
+    current = _corpus
+    return [snapshot for snapshot in _snapshots.values() if snapshot is not current]
+
+def trim_snapshot_history() -> bool:
+    """
+    Drop retired snapshots no cursor is paging through
+
+    A snapshot whose cursors were used in the last CURSOR_IDLE_SECONDS is
+    kept, so an eviction never cuts off a listing in progress; cursors of
+    dropped snapshots get the "cursor expired" LookupError.
+
+    Returns:
+        bool: False if nothing could be dropped
+    """
+    current = _corpus
+    idle_before = time.monotonic() - CURSOR_IDLE_SECONDS
+    idle = [version for version, snapshot in _snapshots.items()
+            if snapshot is not current and _cursor_used.get(version, idle_before) <= idle_before]
+    for version in idle:
+        _snapshots.pop(version, None)
+        _cursor_used.pop(version, None)
+    return bool(idle)
+
+def add_swap_listener(listener: Callable[[CorpusSnapshot], None]) -> None:
+    """
+    Call listener(snapshot) after every swap_corpus
+    
+    Args:
+        listener: Callback; runs on the thread that swapped the corpus
+    """
+    _swap_listeners.append(listener)
+
+def encode_cursor(version: str, offset: int) -> str:
+    """Opaque cursor for an offset into a specific corpus version"""
+    raw = f"{version}:{offset}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Decode a cursor from encode_cursor
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        version, offset = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii").split(":")
+        offset = int(offset)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Malformed cursor") from None
+    if offset < 0:
+        raise ValueError("Malformed cursor")
+    return version, offset
+
+def _resolve_cursor(cursor: Optional[str]) -> Tuple[CorpusSnapshot, int]:
+    if not cursor:
+        return _corpus, 0
+    version, offset = decode_cursor(cursor)
+    snapshot = _snapshots.get(version)
+    if snapshot is None:
+        raise LookupError(f"Cursor expired: corpus version {version} is no longer available; "
+                          f"restart without a cursor")
+    _cursor_used[version] = time.monotonic()
+    return snapshot, min(offset, len(snapshot.threats))
+
+def list_threats(cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    List one page of the threat corpus
+    
+    Cursors pin the corpus version they were issued against, so a client
+    paging through keeps seeing a consistent snapshot even if the corpus
+    changes mid-listing.
+    
+    Args:
+        cursor: Cursor from a previous page's next_cursor (None for first page)
+        limit: Page size, clamped to 1..MAX_PAGE_SIZE
+        
+    Returns:
+        Dict containing the page of threats and the next cursor (None at the end)
+        
+    Raises:
+        ValueError: If the cursor is malformed
+        LookupError: If the cursor has expired (its corpus version was retired)
+    """
+    snapshot, offset = _resolve_cursor(cursor)
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    end = min(offset + limit, len(snapshot.threats))
+    return {
+        "threats": [{"threat_id": threat_id, "threat": snapshot.threats[threat_id]}
+                    for threat_id in range(offset, end)],
+        "next_cursor": encode_cursor(snapshot.version, end) if end < len(snapshot.threats) else None,
+        "corpus_version": snapshot.version,
+        "total": len(snapshot.threats)
+    }
+
+def iter_threats(cursor: Optional[str] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Iterate (threat_id, threat) over a corpus snapshot from a cursor onward
+    
+    Raises:
+        ValueError: If the cursor is malformed
+        LookupError: If the cursor's corpus version has been retired
+    """
+    snapshot, offset = _resolve_cursor(cursor)
+    return enumerate(islice(snapshot.threats, offset, None), start=offset)
+
+_TOKEN = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    """Distinct lowercase search terms of a text, in order of appearance"""
+    return list(dict.fromkeys(_TOKEN.findall(text.lower())))
+
+# In-memory postings for corpora without prebuilt ones: (version, term -> ids)
+_search_index: Tuple[Optional[str], Dict[str, List[int]]] = (None, {})
+
+def _postings_lookup(snapshot: CorpusSnapshot):
+    global _search_index
+    postings = getattr(snapshot.threats, "postings", None)
+    if postings is not None:
+        return postings
+    version, index = _search_index
+    if version != snapshot.version:
+        index = {}
+        for threat_id, threat in enumerate(snapshot.threats):
+            for term in tokenize(threat):
+                index.setdefault(term, []).append(threat_id)
+        _search_index = (snapshot.version, index)
+    return lambda term: index.get(term, ())
+
+def cached_search_index() -> Dict[str, List[int]]:
+    """The in-memory postings currently held (empty when the snapshot has its own)"""
+    return _search_index[1]
+
+def clear_search_index() -> None:
+    """Drop the in-memory postings; the next search rebuilds them"""
+    global _search_index
+    _search_index = (None, {})
+
+def search_threats(query: str, limit: int = 20) -> Dict[str, Any]:
+    """
+    Find threats containing every term of a query
+    
+    Uses the snapshot's prebuilt postings when it has them, otherwise an
+    in-memory index built once per corpus version.
+    
+    Args:
+        query: Free text; matched on lowercase word terms
+        limit: Maximum matches returned
+        
+    Returns:
+        Dict containing matches (threat_id, threat), total and corpus version
+    """
+    snapshot = _corpus
+    terms = tokenize(query)
+    ids: List[int] = []
+    if terms:
+        lookup = _postings_lookup(snapshot)
+        # Intersect starting from the rarest term
+        runs = sorted((lookup(term) for term in terms), key=len)
+        ids = list(runs[0])
+        for run in runs[1:]:
+            present = set(run)
+            ids = [threat_id for threat_id in ids if threat_id in present]
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    return {
+        "query": query,
+        "matches": [{"threat_id": threat_id, "threat": snapshot.threats[threat_id]}
+                    for threat_id in ids[:limit]],
+        "total": len(ids),
+        "corpus_version": snapshot.version
+    }
+
 def get_random_threat() -> Dict[str, Any]:
     """
     Get a random Darth Vader threat
@@ -35,15 +316,49 @@ def get_random_threat() -> Dict[str, Any]:
     Returns:
         Dict containing threat data and metadata
     """
-    threat = random.choice(VADER_THREATS)
+    snapshot = _corpus
+    threat_id = random.randrange(len(snapshot.threats))
     return {
-        "threat": threat,
+        "threat_id": threat_id,
+        "threat": snapshot.threats[threat_id],
         "source": "Darth Vader",
         "empire": "Galactic Empire",
         "threat_level": "Imperial",
+        "corpus_version": snapshot.version,
         "timestamp": datetime.now().isoformat()
     }
 
+def get_threat(threat_id: int) -> str:
+    """
+    Get a threat's text by id (its position in the pool)
+    
+    Args:
+        threat_id: Threat id as returned in get_random_threat()["threat_id"]
+        
+    Returns:
+        str: Threat text, or an empty string for an unknown id
+    """
+    threats = _corpus.threats
+    if 0 <= threat_id < len(threats):
+        return threats[threat_id]
+    return ""
+
+def get_threat_at(version: str, threat_id: int) -> str:
+    """
+    Get a threat's text by id within a specific corpus version
+    
+    Args:
+        version: corpus_version the id was issued against
+        threat_id: Threat id within that version
+        
+    Returns:
+        str: Threat text, or an empty string if the version was retired or the id is unknown
+    """
+    snapshot = _snapshots.get(version)
+    if snapshot is None or not 0 <= threat_id < len(snapshot.threats):
+        return ""
+    return snapshot.threats[threat_id]
+
 def get_threat_count() -> int:
     """
     Get total number of available threats
@@ -51,7 +366,7 @@ def get_threat_count() -> int:
     Returns:
         Number of threats in the pool
     """
-    return len(VADER_THREATS)
+    return len(_corpus.threats)
 
 def process_data(data: Any) -> Dict[str, Any]:
     """
@@ -85,3 +400,49 @@ def validate_input(data: Any) -> bool:
     if isinstance(data, str) and len(data.strip()) == 0:
         return False
     return True
+
+def validate_many(items: Sequence[Any]) -> Dict[str, Any]:
+    """
+    Validate a batch of inputs in one call (vectorized validate_input)
+    
+    NumPy string arrays are checked with vectorized string ops; any other
+    sequence goes through one inlined comprehension (no per-item call).
+    
+    Args:
+        items: Sequence (or NumPy array) of values to validate
+        
+    Returns:
+        Dict containing the boolean mask, valid/invalid counts and
+        aggregated rejection reasons
+    """
+    if np is not None and isinstance(items, np.ndarray) and items.dtype.kind != 'O':
+        if items.dtype.kind == 'U':
+            blank = np.char.str_len(np.char.strip(items)) == 0
+        else:
+            blank = np.zeros(items.shape, dtype=bool)
+        mask = ~blank
+        total = blank.size
+        none_count = 0
+        blank_count = int(blank.sum())
+    else:
+        if not isinstance(items, list):
+            items = list(items)
+        mask = [item is not None and not (isinstance(item, str) and not item.strip())
+                for item in items]
+        total = len(mask)
+        invalid = mask.count(False)
+        none_count = sum(1 for item in items if item is None) if invalid else 0
+        blank_count = invalid - none_count
+    
+    reasons = {}
+    if none_count:
+        reasons["none"] = none_count
+    if blank_count:
+        reasons["blank_string"] = blank_count
+    
+    return {
+        "mask": mask,
+        "valid_count": total - none_count - blank_count,
+        "invalid_count": none_count + blank_count,
+        "reasons": reasons
+    }
@@ -0,0 +1,374 @@
+"""
+hello world app - Corpus Map Module
+Precompiled binary corpus snapshots, loaded with mmap
+
+A snapshot holds the threat pool plus its derived indexes, laid out so a
+worker can serve straight from the mapping: nothing is parsed at boot, and
+every worker that maps the same file shares its pages through the page
+cache.
+
+Layout (little-endian, sections 8-byte aligned):
+
+    header      magic b"VTCS", format version, corpus version, counts,
+                section offsets, body CRC32, header CRC32
+    offsets     (count + 1) uint64 byte offsets into the text blob
+    text        UTF-8 threat texts, back to back
+    columns     per-threat metadata: uint32 char length, uint16 word count
+    term table  open-addressing hash table of search terms (5 x uint32 per
+                slot: crc32, term offset, term length, postings start,
+                postings count; empty slots have postings count 0)
+    terms       UTF-8 term texts
+    postings    uint32 threat ids, ascending, one run per term
+
+and the compiled generator model (generator.MarkovModel) for one n-gram
+order, so workers get it without training:
+
+    words       (word count + 1) uint64 byte offsets, then the UTF-8 words
+    edges       (state count + 1) uint32 edge offsets per state
+    cumulative  uint64 running edge counts
+    next words  uint32 emitted word ids
+    next states int32 target states (-1 after the end word)
+    lines       sorted uint64 generator.line_key() hashes of the corpus lines
+
+Build from the command line:
+
+    python -m modules.corpusmap build --corpus-file data/threats.ndjson --output data/corpus.vtcs
+    python -m modules.corpusmap build --model-order 2 --output data/corpus.vtcs
+    python -m modules.corpusmap verify data/corpus.vtcs
+"""
+
+import mmap
+import os
+from array import array
+import struct
+import sys
+import time
+import zlib
+from collections.abc import Sequence as SequenceABC
+from typing import Any, Dict, List, Optional, Sequence
+
+if __package__:  # python -m modules.corpusmap: siblings are imported by bare name
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core import CorpusSnapshot, corpus_version, tokenize
+from generator import DEFAULT_ORDER, LineKeys, MarkovModel, line_key
+
+MAGIC = b"VTCS"
+FORMAT_VERSION = 2
+
+# magic, format version, header size, corpus version, count, table slots,
+# model order (0: no model), then (offset, length) of each section, body crc
+SECTIONS = ("offsets", "text", "columns", "table", "terms", "postings",
+            "word_offsets", "words", "edge_offsets", "cumulative", "next_words",
+            "next_states", "lines")
+_HEADER_BODY = struct.Struct(f"<4sHH16sQQQ{2 * len(SECTIONS)}QI")
+HEADER_SIZE = _HEADER_BODY.size + 4
+TABLE_SLOT = struct.Struct("<5I")
+COLUMN = struct.Struct("<IH")
+
+class SnapshotError(ValueError):
+    """Raised for a missing, truncated, corrupt or incompatible snapshot"""
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+def _term_slot(term: bytes, table_size: int) -> int:
+    return zlib.crc32(term) & (table_size - 1)
+
+def _model_sections(threats: Sequence[str], order: int) -> List[bytes]:
+    """Compile the generator model and lay out its tables (empty when order is 0)"""
+    if not order:
+        return [b""] * 7
+    model = MarkovModel.train(threats, order)
+    words = [word.encode("utf-8") for word in model.words]
+    word_offsets = array("Q", [0])
+    for word in words:
+        word_offsets.append(word_offsets[-1] + len(word))
+    lines = array("Q", sorted({line_key(threat) for threat in threats}))
+    return [word_offsets.tobytes(), b"".join(words), array("I", model.offsets).tobytes(),
+            array("Q", model.cumulative).tobytes(), array("I", model.next_words).tobytes(),
+            array("i", model.next_states).tobytes(), lines.tobytes()]
+
+def build_snapshot(threats: Sequence[str], path: str,
+                   model_order: int = DEFAULT_ORDER) -> Dict[str, Any]:
+    """
+    Write a snapshot file for a threat pool (atomically, via rename)
+
+    Args:
+        threats: Threat texts in id order
+        path: Output path
+        model_order: n-gram order of the generator model to include (0: none)
+
+    Returns:
+        Dict with the corpus version, threat and term counts, model order and file size
+    """
+    encoded = [threat.encode("utf-8") for threat in threats]
+    offsets = [0] * (len(encoded) + 1)
+    position = 0
+    for i, data in enumerate(encoded):
+        position += len(data)
+        offsets[i + 1] = position
+
+    postings: Dict[str, List[int]] = {}
+    columns = bytearray(COLUMN.size * len(encoded))
+    for threat_id, threat in enumerate(threats):
+        COLUMN.pack_into(columns, threat_id * COLUMN.size, len(threat), min(len(threat.split()), 0xFFFF))
+        for term in tokenize(threat):
+            postings.setdefault(term, []).append(threat_id)
+
+    # Power-of-two table at most half full keeps probe chains short
+    table_size = 8
+    while table_size < 2 * len(postings):
+        table_size *= 2
+    table = bytearray(TABLE_SLOT.size * table_size)
+    terms = bytearray()
+    posting_ids: List[int] = []
+    for term, ids in postings.items():
+        term_bytes = term.encode("utf-8")
+        slot = _term_slot(term_bytes, table_size)
+        while TABLE_SLOT.unpack_from(table, slot * TABLE_SLOT.size)[4]:
+            slot = (slot + 1) & (table_size - 1)
+        TABLE_SLOT.pack_into(table, slot * TABLE_SLOT.size, zlib.crc32(term_bytes), len(terms),
+                             len(term_bytes), len(posting_ids), len(ids))
+        terms += term_bytes
+        posting_ids.extend(ids)
+
+    sections = [
+        struct.pack(f"<{len(offsets)}Q", *offsets),
+        b"".join(encoded),
+        bytes(columns),
+        bytes(table),
+        bytes(terms),
+        struct.pack(f"<{len(posting_ids)}I", *posting_ids),
+        *_model_sections(threats, model_order),
+    ]
+    layout = []
+    body = bytearray()
+    for section in sections:
+        layout.extend((HEADER_SIZE + len(body), len(section)))
+        body += section
+        body += bytes(_align(len(section)) - len(section))
+
+    version = corpus_version(threats)
+    header = _HEADER_BODY.pack(MAGIC, FORMAT_VERSION, HEADER_SIZE, version.encode("ascii"),
+                               len(encoded), table_size, model_order, *layout, zlib.crc32(body))
+    header += struct.pack("<I", zlib.crc32(header))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(body)
+    os.replace(tmp_path, path)
+    return {"corpus_version": version, "threats": len(encoded), "terms": len(postings),
+            "model_order": model_order, "bytes": len(header) + len(body)}
+
+class _MappedStrings(SequenceABC):
+    """Read-only string sequence over uint64 offsets into a UTF-8 blob"""
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+class MappedThreats(SequenceABC):
+    """Read-only threat sequence backed by an mmap'd snapshot"""
+
+    def __init__(self, path: str, verify: bool = True):
+        """
+        Map a snapshot file
+
+        Args:
+            path: Snapshot path
+            verify: Also check the body CRC32 (the header is always checked)
+
+        Raises:
+            SnapshotError: If the file is missing, truncated, corrupt or from another format version
+        """
+        self.path = path
+        try:
+            with open(path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Cannot map snapshot {path}: {e}") from None
+        try:
+            self._parse_header(verify)
+        except SnapshotError:
+            self._mmap.close()
+            raise
+
+    def _parse_header(self, verify: bool) -> None:
+        mm = self._mmap
+        if len(mm) < HEADER_SIZE:
+            raise SnapshotError(f"Snapshot {self.path} is truncated")
+        fields = _HEADER_BODY.unpack_from(mm)
+        magic, format_version, header_size, version, count, table_size, model_order = fields[:7]
+        layout, body_crc = fields[7:-1], fields[-1]
+        if magic != MAGIC:
+            raise SnapshotError(f"{self.path} is not a corpus snapshot")
+        if format_version != FORMAT_VERSION or header_size != HEADER_SIZE:
+            raise SnapshotError(f"Snapshot {self.path} has format {format_version}, expected {FORMAT_VERSION}")
+        (header_crc,) = struct.unpack_from("<I", mm, _HEADER_BODY.size)
+        if zlib.crc32(mm[:_HEADER_BODY.size]) != header_crc:
+            raise SnapshotError(f"Snapshot {self.path} header checksum mismatch")
+        sections = {name: (layout[2 * i], layout[2 * i + 1]) for i, name in enumerate(SECTIONS)}
+        end = max(offset + _align(length) for offset, length in sections.values())
+        if end > len(mm):
+            raise SnapshotError(f"Snapshot {self.path} is truncated")
+        if verify and zlib.crc32(memoryview(mm)[HEADER_SIZE:end]) != body_crc:
+            raise SnapshotError(f"Snapshot {self.path} body checksum mismatch")
+
+        view = memoryview(mm)
+        self.version = version.decode("ascii")
+        self._count = count
+        self._table_size = table_size
+        self._offsets = self._section(view, sections["offsets"]).cast("Q")
+        self._text = self._section(view, sections["text"])
+        self._columns = self._section(view, sections["columns"])
+        self._table = self._section(view, sections["table"]).cast("I")
+        self._terms = self._section(view, sections["terms"])
+        self._postings = self._section(view, sections["postings"]).cast("I")
+        self.model_order = model_order
+        self._model_sections = {name: self._section(view, sections[name]) for name in SECTIONS[6:]}
+        self._model: Optional[MarkovModel] = None
+
+    @staticmethod
+    def _section(view: memoryview, section) -> memoryview:
+        offset, length = section
+        return view[offset:offset + length]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._decode(i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("threat id out of range")
+        return self._decode(index)
+
+    def _decode(self, index: int) -> str:
+        return str(self._text[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+    def __iter__(self):
+        text, offsets = self._text, self._offsets
+        for i in range(self._count):
+            yield str(text[offsets[i]:offsets[i + 1]], "utf-8")
+
+    @property
+    def mapped_bytes(self) -> int:
+        """Size of the mapping (shared page cache, not private worker memory)"""
+        return len(self._mmap)
+
+    def prefetch(self) -> None:
+        """Ask the kernel to read the whole mapping ahead (used by startup warmup)"""
+        if hasattr(mmap, "MADV_WILLNEED"):
+            self._mmap.madvise(mmap.MADV_WILLNEED)
+
+    def metadata(self, index: int) -> Dict[str, int]:
+        """Precomputed columns for one threat"""
+        char_length, word_count = COLUMN.unpack_from(self._columns, index * COLUMN.size)
+        return {"char_length": char_length, "word_count": word_count}
+
+    def postings(self, term: str) -> Sequence[int]:
+        """Ascending ids of threats containing a (tokenized) term"""
+        term_bytes = term.encode("utf-8")
+        crc = zlib.crc32(term_bytes)
+        mask = self._table_size - 1
+        slot = crc & mask
+        table, width = self._table, TABLE_SLOT.size // 4
+        while True:
+            base = slot * width
+            count = table[base + 4]
+            if not count:
+                return ()
+            if table[base] == crc:
+                start, length = table[base + 1], table[base + 2]
+                if self._terms[start:start + length] == term_bytes:
+                    first = table[base + 3]
+                    return self._postings[first:first + count]
+            slot = (slot + 1) & mask
+
+    def markov_model(self, order: int) -> Optional[MarkovModel]:
+        """
+        The snapshot's compiled generator model, if it was built for this order
+
+        Tables are memoryviews into the mapping, so every worker shares them.
+        """
+        if not self.model_order or order != self.model_order:
+            return None
+        if self._model is None:
+            tables = self._model_sections
+            self._model = MarkovModel(
+                order, _MappedStrings(tables["word_offsets"].cast("Q"), tables["words"]),
+                tables["edge_offsets"].cast("I"), tables["cumulative"].cast("Q"),
+                tables["next_words"].cast("I"), tables["next_states"].cast("i"),
+                LineKeys(tables["lines"].cast("Q")), self.version)
+        return self._model
+
+def load_snapshot(path: str, verify: bool = True) -> CorpusSnapshot:
+    """
+    Map a snapshot file as a CorpusSnapshot (publish it with core.publish_corpus)
+
+    Raises:
+        SnapshotError: If the file can't be used
+    """
+    threats = MappedThreats(path, verify)
+    return CorpusSnapshot(threats.version, threats)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI: build, verify or describe a snapshot"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m modules.corpusmap",
+                                     description="Build and check binary corpus snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Compile a corpus into a snapshot")
+    build.add_argument("--corpus-file", help="NDJSON corpus (default: built-in threats)")
+    build.add_argument("--output", "-o", required=True, help="Snapshot path")
+    build.add_argument("--model-order", type=int, default=DEFAULT_ORDER,
+                       help="n-gram order of the generator model to include, matching "
+                            "generator_order (0: none)")
+    verify = commands.add_parser("verify", help="Check a snapshot's header and checksums")
+    verify.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        from core import get_corpus
+        threats: Sequence[str] = get_corpus().threats
+        if args.corpus_file:
+            from importer import load_corpus
+            threats = load_corpus(args.corpus_file) or []
+            if not threats:
+                parser.error(f"No threats in {args.corpus_file}")
+        start = time.perf_counter()
+        info = build_snapshot(threats, args.output, args.model_order)
+        print(f"✅ Built {args.output}: {info['threats']:,} threats, {info['terms']:,} terms, "
+              f"model order {info['model_order']}, {info['bytes']:,} bytes, version {info['corpus_version']} "
+              f"({time.perf_counter() - start:.2f}s)")
+        return 0
+
+    start = time.perf_counter()
+    try:
+        threats = MappedThreats(args.path, verify=True)
+    except SnapshotError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ {args.path}: {len(threats):,} threats, model order {threats.model_order}, "
+          f"version {threats.version} "
+          f"(mapped and verified in {(time.perf_counter() - start) * 1000:.1f} ms)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
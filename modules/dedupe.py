@@ -0,0 +1,443 @@
+"""
+hello world app - Dedupe Module
+Near-duplicate detection for the threat corpus (MinHash + LSH)
+
+Each threat is reduced to a set of character shingles (byte windows of
+the normalized text, packed little-endian into an integer) and summarized
+by a MinHash signature of num_perm multiply-shift hash functions. Signatures are split into LSH bands; threats sharing any
+band bucket become candidates, and candidates are confirmed by signature
+agreement (the MinHash estimate of Jaccard similarity). Clustering unions
+every confirmed pair within a bucket. Identical signatures are merged
+before bucketing, so repeated texts don't make buckets quadratic.
+
+Texts with no shingles (empty or punctuation-only once normalized) all
+reduce to the same zero shingle; they are never reported or rejected as
+near-duplicates.
+
+NumPy is used when installed to compute signatures for whole batches at
+once; otherwise signatures are computed per threat in pure Python (same
+values, slower).
+"""
+
+import random
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; signatures fall back to pure Python
+    np = None
+
+MASK64 = (1 << 64) - 1
+DEFAULT_NUM_PERM = 64
+DEFAULT_SHINGLE_SIZE = 5
+DEFAULT_THRESHOLD = 0.8
+
+_NON_WORD = re.compile(r"[^\w ]+")
+
+def normalize_for_shingles(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+def _shingle_bytes(text: str, size: int) -> bytes:
+    # Zero padding leaves a short text's little-endian key unchanged
+    return normalize_for_shingles(text).encode("utf-8").ljust(size, b"\0")
+
+def shingle_keys(text: str, size: int = DEFAULT_SHINGLE_SIZE) -> List[int]:
+    """
+    Distinct shingles of a text as integers (size <= 8 bytes)
+
+    Texts shorter than one shingle form a single shingle.
+    """
+    data = _shingle_bytes(text, size)
+    return list({int.from_bytes(data[i:i + size], "little") for i in range(len(data) - size + 1)})
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Choose (bands, rows) so the LSH S-curve steps up near threshold
+
+    The probability that two items with Jaccard similarity s share a bucket
+    is 1 - (1 - s**rows)**bands, whose midpoint is about (1/bands)**(1/rows).
+
+    Returns:
+        Tuple of bands and rows per band (bands * rows <= num_perm)
+    """
+    best = (num_perm, 1)
+    best_error = float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        # Bias slightly low so true duplicates are rarely missed
+        if (1.0 / bands) ** (1.0 / rows) > threshold:
+            error *= 2
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+class MinHasher:
+    """
+    Computes MinHash signatures with num_perm seeded hash functions
+
+    Each function is multiply-shift hashing, ((a * key + b) mod 2**64) >> 32
+    with a odd, which NumPy evaluates with wrapping uint64 arithmetic.
+    """
+
+    # Texts hashed per NumPy pass; keeps the working buffer cache-sized
+    CHUNK_TEXTS = 1024
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM,
+                 shingle_size: int = DEFAULT_SHINGLE_SIZE, seed: int = 1):
+        if not 1 <= shingle_size <= 8:
+            raise ValueError("shingle_size must be between 1 and 8 bytes")
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.a = [rng.getrandbits(64) | 1 for _ in range(num_perm)]
+        self.b = [rng.getrandbits(64) for _ in range(num_perm)]
+        # Signature of a text with no shingles (only the zero-padded key 0)
+        self.empty_signature = tuple(b >> 32 for b in self.b)
+        if np is not None:
+            self._a = np.array(self.a, dtype=np.uint64)
+            self._b = np.array(self.b, dtype=np.uint64)
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """Signature of one text (pure Python)"""
+        keys = shingle_keys(text, self.shingle_size)
+        return tuple(min(((a * key + b) & MASK64) >> 32 for key in keys)
+                     for a, b in zip(self.a, self.b))
+
+    def is_empty(self, signature) -> bool:
+        """True for the signature of a text with no shingles"""
+        return tuple(int(value) for value in signature) == self.empty_signature
+
+    def signatures(self, texts: Sequence[str]):
+        """
+        Signatures for a batch of texts
+
+        Returns:
+            (len(texts), num_perm) uint32 array with NumPy, else a list of tuples
+        """
+        if np is None:
+            return [self.signature(text) for text in texts]
+        result = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        for start in range(0, len(texts), self.CHUNK_TEXTS):
+            chunk = texts[start:start + self.CHUNK_TEXTS]
+            self._fill_signatures(chunk, result[start:start + len(chunk)])
+        return result
+
+    def _fill_signatures(self, texts: Sequence[str], out) -> None:
+        size = self.shingle_size
+        encoded = [_shingle_bytes(text, size) for text in texts]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+        # Byte offset of every window that lies inside one text, grouped by text
+        windows = lengths - size + 1
+        group_starts = np.zeros(len(encoded), dtype=np.int64)
+        np.cumsum(windows[:-1], out=group_starts[1:])
+        text_starts = np.zeros(len(encoded), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=text_starts[1:])
+        offsets = np.arange(int(windows.sum()), dtype=np.int64)
+        offsets += np.repeat(text_starts - group_starts, windows)
+
+        keys = np.zeros(len(offsets), dtype=np.uint64)
+        for byte in range(size):
+            keys |= data[offsets + byte].astype(np.uint64) << np.uint64(8 * byte)
+
+        # Duplicate windows don't change a minimum, so keys need no dedupe
+        values = np.empty_like(keys)
+        shift = np.uint64(32)
+        for i in range(self.num_perm):
+            np.multiply(keys, self._a[i], out=values)
+            values += self._b[i]
+            values >>= shift
+            out[:, i] = np.minimum.reduceat(values, group_starts)
+
+def signature_similarity(left, right) -> float:
+    """Fraction of matching signature slots (estimated Jaccard similarity)"""
+    if np is not None and isinstance(left, np.ndarray):
+        return float(np.count_nonzero(left == right)) / len(left)
+    return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+class LSHIndex:
+    """Banded LSH buckets over MinHash signatures, with incremental adds"""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self.buckets: List[Dict[Any, List[int]]] = [{} for _ in range(self.bands)]
+        self.signatures: Dict[int, Any] = {}
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        if np is not None and isinstance(signature, np.ndarray):
+            data = signature.tobytes()
+            width = rows * signature.itemsize
+            return [data[band * width:(band + 1) * width] for band in range(self.bands)]
+        return [tuple(signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def add(self, item_id: int, signature) -> None:
+        self.signatures[item_id] = signature
+        for band, key in enumerate(self._band_keys(signature)):
+            self.buckets[band].setdefault(key, []).append(item_id)
+
+    def candidates(self, signature) -> set:
+        """Ids sharing at least one band bucket with signature"""
+        found = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            found.update(self.buckets[band].get(key, ()))
+        return found
+
+    def query(self, signature, threshold: Optional[float] = None) -> List[int]:
+        """Ids whose estimated similarity to signature is at least threshold"""
+        threshold = self.threshold if threshold is None else threshold
+        return [item_id for item_id in self.candidates(signature)
+                if signature_similarity(signature, self.signatures[item_id]) >= threshold]
+
+def _band_pairs(band_rows, threshold: float, signatures) -> List[Tuple[int, int]]:
+    """
+    Pairs of members sharing one of an LSH band's buckets that pass threshold
+
+    Rows are folded into a 64-bit bucket key and grouped with a stable sort,
+    so the whole band is bucketed without a Python-level loop. Every pair in
+    a bucket is checked: pass d compares each member with the one d places
+    after it, for as long as any bucket has more than d members.
+    """
+    keys = np.zeros(len(band_rows), dtype=np.uint64)
+    for column in range(band_rows.shape[1]):
+        keys *= np.uint64(0x100000001B3)
+        keys ^= band_rows[:, column].astype(np.uint64)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    new_group = np.empty(len(order), dtype=bool)
+    new_group[:1] = True
+    np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=new_group[1:])
+    starts = np.flatnonzero(new_group)
+    # Sorted position just past the end of each position's bucket
+    group_ends = np.append(starts[1:], len(order))[np.cumsum(new_group) - 1]
+    positions = np.arange(len(order))
+    pairs: List[Tuple[int, int]] = []
+    offset = 1
+    positions = positions[group_ends - positions > offset]
+    while len(positions):
+        left, right = order[positions], order[positions + offset]
+        agreement = np.count_nonzero(signatures[left] == signatures[right], axis=1)
+        keep = agreement >= threshold * signatures.shape[1]
+        pairs.extend(zip(left[keep].tolist(), right[keep].tolist()))
+        offset += 1
+        positions = positions[group_ends[positions] - positions > offset]
+    return pairs
+
+def find_near_duplicates(texts: Sequence[str], threshold: float = DEFAULT_THRESHOLD,
+                         num_perm: int = DEFAULT_NUM_PERM,
+                         hasher: Optional[MinHasher] = None) -> List[List[int]]:
+    """
+    Cluster near-duplicate texts
+
+    Args:
+        texts: Texts to cluster (ids are their positions)
+        threshold: Minimum estimated Jaccard similarity of character shingles
+        num_perm: MinHash signature length
+        hasher: Reuse an existing MinHasher
+
+    Returns:
+        List of clusters (sorted id lists with 2+ members), largest first
+    """
+    hasher = hasher or MinHasher(num_perm)
+    signatures = hasher.signatures(texts)
+    bands, rows = lsh_params(threshold, hasher.num_perm)
+
+    parent = list(range(len(texts)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    # One representative per distinct signature (copies join it directly);
+    # texts with no shingles are left out
+    vectorized = np is not None and isinstance(signatures, np.ndarray)
+    if vectorized:
+        nonempty = np.flatnonzero(np.any(signatures != np.array(hasher.empty_signature, dtype=signatures.dtype),
+                                         axis=1))
+        _, first, inverse = np.unique(signatures[nonempty], axis=0, return_index=True, return_inverse=True)
+        representatives = nonempty[first]
+        for item_id, representative in zip(nonempty.tolist(), representatives[inverse.reshape(-1)].tolist()):
+            parent[item_id] = representative
+        representatives = representatives.tolist()
+        unique_signatures = signatures[representatives]
+    else:
+        by_signature: Dict[Tuple[int, ...], int] = {}
+        for item_id, sig in enumerate(signatures):
+            if sig != hasher.empty_signature:
+                parent[item_id] = by_signature.setdefault(sig, item_id)
+        representatives = list(by_signature.values())
+        unique_signatures = list(by_signature)
+
+    for band in range(bands):
+        if vectorized:
+            pairs = _band_pairs(unique_signatures[:, band * rows:(band + 1) * rows], threshold,
+                                unique_signatures)
+        else:
+            buckets: Dict[Any, List[int]] = {}
+            pairs = []
+            for index, sig in enumerate(unique_signatures):
+                members = buckets.setdefault(sig[band * rows:(band + 1) * rows], [])
+                pairs.extend((other, index) for other in members
+                             if signature_similarity(sig, unique_signatures[other]) >= threshold)
+                members.append(index)
+        for left, right in pairs:
+            root_a, root_b = find(representatives[left]), find(representatives[right])
+            if root_a != root_b:
+                parent[root_b] = root_a
+
+    clusters: Dict[int, List[int]] = {}
+    for item_id in range(len(texts)):
+        clusters.setdefault(find(item_id), []).append(item_id)
+    return sorted((members for members in clusters.values() if len(members) > 1),
+                  key=lambda members: (-len(members), members[0]))
+
+def near_duplicate_report(texts: Sequence[str], threshold: float = DEFAULT_THRESHOLD,
+                          limit: int = 50) -> Dict[str, Any]:
+    """
+    Summarize near-duplicate clusters for the report endpoint
+
+    Args:
+        texts: Corpus texts (ids are their positions)
+        threshold: Minimum estimated similarity
+        limit: Maximum clusters to include
+
+    Returns:
+        Dict with cluster count, redundant threat count and the largest clusters
+    """
+    clusters = find_near_duplicates(texts, threshold)
+    return {
+        "threshold": threshold,
+        "clusters_found": len(clusters),
+        "redundant_threats": sum(len(members) - 1 for members in clusters),
+        "clusters": [
+            {
+                "size": len(members),
+                "threat_ids": members,
+                "threats": [texts[i] for i in members[:5]]
+            }
+            for members in clusters[:limit]
+        ]
+    }
+
+class NearDuplicateFilter:
+    """Import-time filter: rejects texts too similar to the corpus or to earlier accepts"""
+
+    def __init__(self, existing: Sequence[str], threshold: float = DEFAULT_THRESHOLD,
+                 num_perm: int = DEFAULT_NUM_PERM, batch_size: int = 10_000):
+        self.hasher = MinHasher(num_perm)
+        self.index = LSHIndex(num_perm, threshold)
+        self.size = 0
+        for start in range(0, len(existing), batch_size):
+            self._add_signatures(self.hasher.signatures(existing[start:start + batch_size]))
+
+    def _add_signatures(self, signatures) -> None:
+        for signature in signatures:
+            if not self.hasher.is_empty(signature):
+                self.index.add(self.size, signature)
+            self.size += 1
+
+    def check_batch(self, texts: Sequence[str]) -> List[bool]:
+        """
+        Flag near-duplicates in a batch, adding the accepted texts to the index
+
+        Returns:
+            List of booleans, True where the text is a near-duplicate (never
+            for a text with no shingles)
+        """
+        flags = []
+        for signature in self.hasher.signatures(texts):
+            if self.hasher.is_empty(signature):
+                flags.append(False)
+                continue
+            duplicate = bool(self.index.query(signature))
+            if not duplicate:
+                self.index.add(self.size, signature)
+                self.size += 1
+            flags.append(duplicate)
+        return flags
+
+class DuplicateReports:
+    """
+    near_duplicate_report results computed on a background thread
+
+    Reports are cached by (corpus version, threshold) and recomputed only
+    when the corpus changes. Clustering a large corpus takes seconds, so a
+    request that misses the cache queues the job and can poll instead of
+    holding a request worker for the whole run. Jobs run one at a time.
+    """
+
+    def __init__(self, max_reports: int = 8, limit: int = 1000):
+        """
+        Args:
+            max_reports: Cached reports kept (oldest dropped first)
+            limit: Clusters kept per report
+        """
+        self.max_reports = max_reports
+        self.limit = limit
+        self._reports: "OrderedDict[Tuple[str, float], Dict[str, Any]]" = OrderedDict()
+        self._pending: Dict[Tuple[str, float], Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="duplicate-report")
+
+    def get(self, texts: Sequence[str], version: str, threshold: float,
+            wait: float = 0.0) -> Dict[str, Any]:
+        """
+        Get the report for a corpus version, starting its job if needed
+
+        Args:
+            texts: Corpus texts of that version
+            version: Corpus version (cache key)
+            threshold: Minimum estimated similarity
+            wait: Seconds to wait for a job that isn't finished yet
+
+        Returns:
+            Dict with status ("running", "done" or "failed"), the report
+            when done and the error when failed
+        """
+        key = (version, round(threshold, 3))
+        with self._lock:
+            report = self._reports.get(key)
+            if report is not None:
+                return {"status": "done", "report": report, "error": None}
+            future = self._pending.get(key)
+            submitted = future is None
+            if submitted:
+                future = self._pending[key] = self._executor.submit(
+                    near_duplicate_report, texts, threshold, self.limit)
+        if submitted:
+            # Outside the lock: the callback runs inline if the job already finished
+            future.add_done_callback(lambda done: self._finished(key, done))
+        try:
+            return {"status": "done", "report": future.result(timeout=max(0.0, wait)), "error": None}
+        except FutureTimeout:
+            return {"status": "running", "report": None, "error": None}
+        except Exception as e:
+            return {"status": "failed", "report": None, "error": str(e)}
+
+    def _finished(self, key: Tuple[str, float], future: Future) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.exception() is None:
+                self._reports[key] = future.result()
+                while len(self._reports) > self.max_reports:
+                    self._reports.popitem(last=False)
+
+    def reports(self) -> Dict[Tuple[str, float], Dict[str, Any]]:
+        """Cached reports (for memory reporting)"""
+        return self._reports
+
+    def clear(self) -> None:
+        """Drop cached reports; the next request recomputes them in the background"""
+        with self._lock:
+            self._reports.clear()
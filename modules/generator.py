@@ -0,0 +1,289 @@
+"""
+hello world app - Generator Module
+Synthesized threats from a word-level n-gram (Markov) model of the corpus
+
+Training counts, for every context of `order` words, which word follows it.
+Compiling flattens those counts into three parallel arrays: each context
+owns a contiguous run of edges (offsets[state]..offsets[state + 1]) holding
+running cumulative counts, the emitted word and the state reached after
+emitting it. Sampling an edge is one random() and one bisect over that run,
+and the next state is read straight from the table, so generation never
+builds tuples or touches dicts.
+
+The compiled model is memoized per corpus version and only rebuilt when
+the corpus changes. The rebuild happens on a background thread, started
+when the corpus is published (refresh_model) or first asked for, and the
+previous corpus's model keeps serving until it finishes; only the very
+first model, or one for a new order, is trained on the caller's thread.
+Corpus snapshots (corpusmap) carry the compiled tables,
+so a mapped corpus gets its model without training: the arrays are
+memoryviews into the shared mapping and the novelty check bisects sorted
+line hashes instead of holding every corpus line in a set.
+"""
+
+import hashlib
+import random
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Collection, Dict, List, Optional, Sequence, Tuple
+
+from core import CorpusSnapshot, get_corpus
+
+# One word of context; higher orders mostly replay lines of a small corpus
+DEFAULT_ORDER = 1
+
+# Longest generated threat, in words (guards against cycles in the chain)
+MAX_WORDS = 40
+
+# Resamples before accepting a threat that repeats a corpus line verbatim
+NOVELTY_ATTEMPTS = 8
+
+# Word ids reserved for the start and end of a threat
+START = 0
+END = 1
+
+def line_key(text: str) -> int:
+    """64-bit hash of a whitespace-normalized line, for the novelty check"""
+    digest = hashlib.blake2b(" ".join(text.split()).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+class LineKeys:
+    """Membership test over sorted line_key() hashes (e.g. a snapshot section)"""
+
+    def __init__(self, keys: Sequence[int]):
+        self.keys = keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, text: object) -> bool:
+        if not isinstance(text, str):
+            return False
+        key = line_key(text)
+        index = bisect_left(self.keys, key)
+        return index < len(self.keys) and self.keys[index] == key
+
+class MarkovModel:
+    """
+    Compiled n-gram model; build with MarkovModel.train()
+
+    The tables may be arrays or equivalent read-only sequences (memoryviews
+    into a corpus snapshot), and originals any container of corpus lines.
+    """
+
+    def __init__(self, order: int, words: Sequence[str], offsets: Sequence[int],
+                 cumulative: Sequence[int], next_words: Sequence[int], next_states: Sequence[int],
+                 originals: Collection[str], version: str = ""):
+        self.order = order
+        self.words = words
+        self.offsets = offsets
+        self.cumulative = cumulative
+        self.next_words = next_words
+        self.next_states = next_states
+        self.originals = originals
+        self.version = version
+
+    @classmethod
+    def train(cls, threats: Sequence[str], order: int = DEFAULT_ORDER,
+              version: str = "") -> "MarkovModel":
+        """
+        Train and compile a model
+
+        Args:
+            threats: Training texts (split on whitespace; punctuation stays on words)
+            order: Words of context per state
+            version: Corpus version the model was trained on
+
+        Returns:
+            MarkovModel ready for generate()
+        """
+        if order < 1:
+            raise ValueError("order must be at least 1")
+        words = ["<s>", "</s>"]
+        word_ids: Dict[str, int] = {}
+        start_context = (START,) * order
+        state_ids: Dict[Tuple[int, ...], int] = {start_context: 0}
+        transitions: List[Dict[int, int]] = [{}]
+
+        for threat in threats:
+            context = start_context
+            for word in threat.split() + [None]:
+                if word is None:
+                    word_id = END
+                else:
+                    word_id = word_ids.get(word)
+                    if word_id is None:
+                        word_id = word_ids[word] = len(words)
+                        words.append(word)
+                state = state_ids[context]
+                counts = transitions[state]
+                counts[word_id] = counts.get(word_id, 0) + 1
+                if word_id == END:
+                    break
+                context = context[1:] + (word_id,)
+                if context not in state_ids:
+                    state_ids[context] = len(transitions)
+                    transitions.append({})
+
+        # Context tuples are only needed to wire edges to their target state
+        contexts = sorted(state_ids, key=state_ids.__getitem__)
+        offsets = array("I", [0])
+        cumulative = array("Q")
+        next_words = array("I")
+        next_states = array("i")
+        for state, counts in enumerate(transitions):
+            running = 0
+            for word_id, count in counts.items():
+                running += count
+                cumulative.append(running)
+                next_words.append(word_id)
+                if word_id == END:
+                    next_states.append(-1)
+                else:
+                    next_states.append(state_ids[contexts[state][1:] + (word_id,)])
+            offsets.append(len(cumulative))
+        return cls(order, words, offsets, cumulative, next_words, next_states,
+                   frozenset(" ".join(threat.split()) for threat in threats), version)
+
+    @property
+    def state_count(self) -> int:
+        return len(self.offsets) - 1
+
+    def generate(self, rng: Optional[random.Random] = None, max_words: int = MAX_WORDS) -> str:
+        """Sample one threat by walking the chain from the start state"""
+        rand = (rng or random).random
+        offsets, cumulative = self.offsets, self.cumulative
+        next_words, next_states, words = self.next_words, self.next_states, self.words
+        out = []
+        state = 0
+        for _ in range(max_words):
+            lo, hi = offsets[state], offsets[state + 1]
+            if lo == hi:
+                break
+            edge = bisect_right(cumulative, rand() * cumulative[hi - 1], lo, hi)
+            word_id = next_words[edge]
+            if word_id == END:
+                break
+            out.append(words[word_id])
+            state = next_states[edge]
+        return " ".join(out)
+
+    def generate_novel(self, rng: Optional[random.Random] = None,
+                       attempts: int = NOVELTY_ATTEMPTS) -> str:
+        """
+        Sample a threat, preferring ones that aren't verbatim corpus lines
+
+        Returns the last sample if every attempt repeated the corpus.
+        """
+        threat = ""
+        for _ in range(max(1, attempts)):
+            threat = self.generate(rng)
+            if threat not in self.originals:
+                break
+        return threat
+
+    def generate_many(self, count: int, rng: Optional[random.Random] = None) -> List[str]:
+        """Sample count threats (no novelty filtering)"""
+        generate = self.generate
+        return [generate(rng) for _ in range(count)]
+
+_model_lock = threading.Lock()
+_model: Optional[MarkovModel] = None
+# (corpus version, order) being trained in the background, if any
+_training: Optional[Tuple[str, int]] = None
+
+def get_model(order: int = DEFAULT_ORDER, corpus: Optional[CorpusSnapshot] = None) -> MarkovModel:
+    """
+    Get the compiled model for the current corpus
+
+    The model comes straight from the mapped tables when the corpus is a
+    snapshot compiled for this order. Otherwise, after a corpus change, the
+    previous model of this order is returned while the new one trains in
+    the background.
+
+    Args:
+        order: Words of context per state
+        corpus: Snapshot to train on (default: current corpus)
+
+    Returns:
+        MarkovModel for that corpus version, or the previous version's until it is ready
+    """
+    global _model, _training
+    corpus = corpus or get_corpus()
+    model = _model
+    if model is not None and model.version == corpus.version and model.order == order:
+        return model
+    with _model_lock:
+        model = _model
+        if model is not None and model.version == corpus.version and model.order == order:
+            return model
+        mapped = getattr(corpus.threats, "markov_model", None)
+        fresh = mapped(order) if mapped else None
+        if fresh is not None:
+            _model = fresh
+            return fresh
+        if model is not None and model.order == order:
+            if _training is None:
+                _training = (corpus.version, order)
+                threading.Thread(target=_retrain, args=(corpus, order),
+                                 name="generator-retrain", daemon=True).start()
+            return model
+        _model = MarkovModel.train(corpus.threats, order, corpus.version)
+        return _model
+
+def _retrain(corpus: CorpusSnapshot, order: int) -> None:
+    global _model, _training
+    try:
+        model = MarkovModel.train(corpus.threats, order, corpus.version)
+    except Exception as e:
+        print(f"⚠️ Generator retrain failed: {e}")
+        model = None
+    with _model_lock:
+        _training = None
+        current = _model
+        # Unless a fresher model (e.g. a snapshot's) was installed meanwhile
+        if model is not None and current is not None and current.order == order \
+                and current.version != get_corpus().version:
+            _model = model
+
+def refresh_model(corpus: CorpusSnapshot) -> None:
+    """
+    Swap listener: start updating the held model for a newly published corpus
+
+    Args:
+        corpus: The published snapshot
+    """
+    model = _model
+    if model is not None:
+        get_model(model.order, corpus)
+
+def cached_model() -> Optional[MarkovModel]:
+    """The compiled model currently held, if any"""
+    return _model
+
+def clear_model() -> None:
+    """Drop the compiled model; the next get_model() retrains it"""
+    global _model
+    with _model_lock:
+        _model = None
+
+def get_generated_threat(order: int = DEFAULT_ORDER) -> Dict[str, Any]:
+    """
+    Get a synthesized Darth Vader threat
+
+    Returns:
+        Dict shaped like core.get_random_threat(), with threat_id None
+    """
+    model = get_model(order)
+    return {
+        "threat_id": None,
+        "threat": model.generate_novel(),
+        "source": "Darth Vader",
+        "empire": "Galactic Empire",
+        "threat_level": "Imperial",
+        "mode": "generated",
+        "corpus_version": model.version,
+        "timestamp": datetime.now().isoformat()
+    }
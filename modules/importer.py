@@ -0,0 +1,563 @@
+"""
+hello world app - Importer Module
+Bulk threat import with background indexing
+
+Uploads (NDJSON or CSV) are spooled to a temp file by the request handler,
+then parsed, validated (validate_many), deduplicated (exact keys, plus
+MinHash/LSH near-duplicates when enabled) and indexed on a single background
+worker, which persists the new corpus to the corpus file and publishes it
+once: as the rebuilt mmap snapshot if one is configured (carrying the
+generator model for the configured order), else via core.swap_corpus. Jobs are
+processed one at a time, and across workers they hold an exclusive flock on
+<corpus file>.lock, so concurrent imports can't lose each other's updates.
+
+Sibling workers run a CorpusWatcher. It polls the corpus files and, when
+another worker publishes a new generation, reloads it without a restart.
+
+Also runnable as a CLI that streams a file to a running server:
+
+    python modules/importer.py threats.ndjson --url http://localhost:5000 --token SECRET
+"""
+
+import csv
+import fcntl
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from core import get_corpus, publish_corpus, swap_corpus, validate_many
+from corpusmap import build_snapshot, load_snapshot
+from dedupe import NearDuplicateFilter
+from generator import DEFAULT_ORDER
+
+SUPPORTED_FORMATS = ("ndjson", "csv")
+
+# Records validated per validate_many call
+BATCH_SIZE = 10_000
+
+# Finished jobs kept for status polling
+JOB_HISTORY = 100
+
+# Default cap on one upload's size
+MAX_UPLOAD_BYTES = 256 * 1024 * 1024
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds the import size cap"""
+
+def normalize_threat(text: str) -> str:
+    """Collapse runs of whitespace (the stored form of an imported threat)"""
+    return " ".join(text.split())
+
+def dedupe_key(text: str) -> str:
+    """Key under which two threats count as duplicates"""
+    return normalize_threat(text).casefold()
+
+def parse_ndjson(lines: Iterable[str]) -> Iterator[Any]:
+    """
+    Parse NDJSON lines into raw threat values
+
+    Each line is either a JSON string or an object with a "threat" field.
+    Unparseable lines yield None so they count as invalid.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        yield value.get("threat") if isinstance(value, dict) else value
+
+def parse_csv(lines: Iterable[str]) -> Iterator[Any]:
+    """
+    Parse CSV rows into raw threat values
+
+    Uses the "threat" column if the header has one, otherwise the first column.
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    column = 0
+    normalized_header = [name.strip().lower() for name in header]
+    if "threat" in normalized_header:
+        column = normalized_header.index("threat")
+    else:
+        yield header[0] if header else None
+    for row in reader:
+        yield row[column] if len(row) > column else None
+
+PARSERS = {"ndjson": parse_ndjson, "csv": parse_csv}
+
+def detect_format(content_type: Optional[str], filename: Optional[str] = None) -> str:
+    """
+    Pick an import format from a Content-Type header or file name
+
+    Returns:
+        str: "ndjson" or "csv" (NDJSON is the default)
+    """
+    content_type = (content_type or "").lower()
+    if "csv" in content_type or (filename or "").lower().endswith(".csv"):
+        return "csv"
+    return "ndjson"
+
+def merge_threats(existing: Sequence[str], records: Iterable[Any],
+                  seen: Optional[Set[str]] = None,
+                  batch_size: int = BATCH_SIZE,
+                  near_duplicates: Optional[NearDuplicateFilter] = None) -> Dict[str, Any]:
+    """
+    Validate and deduplicate records against an existing pool
+
+    Args:
+        existing: Current threat pool
+        records: Raw imported values
+        seen: Dedupe keys of `existing`, if already computed
+        batch_size: Records validated per validate_many call
+        near_duplicates: Also reject texts this MinHash/LSH filter flags
+
+    Returns:
+        Dict with the new threats to append and import counts
+    """
+    if seen is None:
+        seen = {dedupe_key(threat) for threat in existing}
+    added: List[str] = []
+    stats = {"received": 0, "accepted": 0, "invalid": 0, "duplicates": 0,
+             "near_duplicates": 0, "reasons": {}}
+    reasons = stats["reasons"]
+
+    records = iter(records)
+    while True:
+        batch = list(itertools.islice(records, batch_size))
+        if not batch:
+            break
+        stats["received"] += len(batch)
+        texts = [value if isinstance(value, str) else None for value in batch]
+        not_text = sum(1 for value in batch if value is not None and not isinstance(value, str))
+        if not_text:
+            reasons["not_text"] = reasons.get("not_text", 0) + not_text
+        result = validate_many(texts)
+        for reason, count in result["reasons"].items():
+            if reason == "none":
+                count -= not_text
+            if count:
+                reasons[reason] = reasons.get(reason, 0) + count
+        stats["invalid"] += result["invalid_count"]
+
+        candidates = []
+        for text, valid in zip(texts, result["mask"]):
+            if not valid:
+                continue
+            key = dedupe_key(text)
+            if key in seen:
+                stats["duplicates"] += 1
+                continue
+            seen.add(key)
+            candidates.append(normalize_threat(text))
+
+        if near_duplicates is not None and candidates:
+            flags = near_duplicates.check_batch(candidates)
+            stats["near_duplicates"] += sum(flags)
+            candidates = [text for text, flagged in zip(candidates, flags) if not flagged]
+        added.extend(candidates)
+
+    stats["accepted"] = len(added)
+    return {"added": added, "stats": stats}
+
+def save_corpus(path: str, threats: Iterable[str]) -> None:
+    """Write a threat pool as NDJSON (atomically, via rename)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.writelines(json.dumps(threat) + "\n" for threat in threats)
+    os.replace(tmp_path, path)
+
+@contextmanager
+def corpus_lock(corpus_file: str, exclusive: bool = True):
+    """
+    flock <corpus_file>.lock across worker processes
+
+    Imports hold it exclusively while they merge and write the corpus files;
+    watchers hold it shared while they reload, so they never see a half-written
+    generation.
+    """
+    directory = os.path.dirname(corpus_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f"{corpus_file}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def load_corpus(path: str) -> Optional[List[str]]:
+    """
+    Load a threat pool written by save_corpus
+
+    Returns:
+        List of threats, or None if the file doesn't exist
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return [threat for threat in parse_ndjson(f) if isinstance(threat, str)]
+
+class ImportJob:
+    """Status of one bulk import"""
+
+    def __init__(self, fmt: str, spool_path: str):
+        self.job_id = uuid.uuid4().hex
+        self.format = fmt
+        self.spool_path = spool_path
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.stats: Dict[str, Any] = {}
+        self.corpus_version: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "format": self.format,
+            "status": self.status,
+            "error": self.error,
+            "stats": self.stats,
+            "corpus_version": self.corpus_version,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+class CorpusWatcher:
+    """Reloads the corpus when another worker writes a new generation of its files"""
+
+    def __init__(self, paths: Sequence[Optional[str]], reload: Callable[[], Any],
+                 lock_file: Optional[str] = None):
+        """
+        Args:
+            paths: Corpus files to watch (None entries are ignored)
+            reload: Loads and publishes the saved corpus
+            lock_file: Corpus file whose corpus_lock guards writes (None = no locking)
+        """
+        self.paths = [path for path in paths if path]
+        self.reload = reload
+        self.lock_file = lock_file
+        self.reloads = 0
+        self._signature = self._stat_signature()
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def _stat_signature(self) -> Tuple:
+        signature = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def mark_current(self) -> None:
+        """Record the files as loaded (after this worker wrote or loaded them)"""
+        self._signature = self._stat_signature()
+
+    def load(self, reload: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Load the corpus now (at startup) and record the files as loaded
+
+        Args:
+            reload: Loader to use instead of the watcher's own (e.g. one that verifies)
+
+        Returns:
+            Whatever the loader returned
+        """
+        guard = corpus_lock(self.lock_file, exclusive=False) if self.lock_file else nullcontext()
+        with self._lock, guard:
+            signature = self._stat_signature()
+            result = (reload or self.reload)()
+            self._signature = signature
+            return result
+
+    def check(self, locked: bool = False) -> bool:
+        """
+        Reload if the files changed since they were last loaded
+
+        Args:
+            locked: The caller already holds corpus_lock (skip taking it)
+
+        Returns:
+            bool: True if the corpus was reloaded
+        """
+        if self._stat_signature() == self._signature:
+            return False
+        guard = nullcontext() if locked or not self.lock_file else corpus_lock(self.lock_file, exclusive=False)
+        with self._lock, guard:
+            signature = self._stat_signature()
+            if signature == self._signature:
+                return False
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"⚠️ Corpus reload failed: {e}")
+            self._signature = signature
+            self.reloads += 1
+            return True
+
+    @property
+    def running(self) -> bool:
+        return self._watcher is not None and self._watcher.is_alive()
+
+    def start(self, interval: float = 2.0) -> None:
+        """
+        Poll the corpus files in a daemon thread
+
+        Args:
+            interval: Seconds between checks
+        """
+        if self.running or not self.paths:
+            return
+        self._stop_event.clear()
+
+        def watch():
+            while not self._stop_event.wait(interval):
+                self.check()
+
+        self._watcher = threading.Thread(target=watch, name="corpus-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        """Stop the watcher thread"""
+        self._stop_event.set()
+        if self._watcher:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+class ImportManager:
+    """Runs import jobs one at a time on a background thread"""
+
+    def __init__(self, corpus_file: Optional[str] = None, batch_size: int = BATCH_SIZE,
+                 near_duplicate_threshold: Optional[float] = None,
+                 snapshot_file: Optional[str] = None,
+                 max_upload_bytes: int = MAX_UPLOAD_BYTES,
+                 watcher: Optional[CorpusWatcher] = None,
+                 model_order: Optional[Callable[[], int]] = None):
+        """
+        Args:
+            corpus_file: NDJSON file imports are saved to (None = in-memory only)
+            batch_size: Records validated per validate_many call
+            near_duplicate_threshold: Reject near-duplicates at this similarity (None = off)
+            snapshot_file: Also rebuild this mmap snapshot after each import
+            max_upload_bytes: Largest accepted upload
+            watcher: This worker's CorpusWatcher; a job first picks up other
+                workers' imports through it, then marks its own files as loaded
+            model_order: Returns the generator order whose model the rebuilt
+                snapshot carries (read per job, so config reloads apply)
+        """
+        self.corpus_file = corpus_file
+        self.batch_size = batch_size
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.snapshot_file = snapshot_file
+        self.max_upload_bytes = max_upload_bytes
+        self.watcher = watcher
+        self.model_order = model_order
+        self._near_filter: Optional[NearDuplicateFilter] = None
+        self._near_filter_version: Optional[str] = None
+        self.jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Held while a job runs; the reusable indexes belong to it until it finishes
+        self._job_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="threat-import")
+        self._index_version: Optional[str] = None
+        self._index: Set[str] = set()
+
+    def spool(self, stream, chunk_size: int = 1 << 20) -> str:
+        """
+        Copy an upload stream to a temp file without parsing it
+
+        Raises:
+            UploadTooLarge: Past max_upload_bytes (the partial file is removed)
+        """
+        fd, path = tempfile.mkstemp(prefix="threat-import-", suffix=".upload")
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_upload_bytes:
+                        raise UploadTooLarge(f"Upload exceeds {self.max_upload_bytes:,} bytes")
+                    f.write(chunk)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path
+
+    def submit(self, stream, fmt: str) -> ImportJob:
+        """
+        Spool an upload and queue it for background import
+
+        Args:
+            stream: Binary file-like upload body
+            fmt: "ndjson" or "csv"
+
+        Returns:
+            ImportJob: Queued job (poll with get())
+        """
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported import format '{fmt}'")
+        job = ImportJob(fmt, self.spool(stream))
+        with self._lock:
+            self.jobs[job.job_id] = job
+            while len(self.jobs) > JOB_HISTORY:
+                oldest_id, oldest = next(iter(self.jobs.items()))
+                if oldest.status in ("queued", "running"):
+                    break
+                del self.jobs[oldest_id]
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [job.to_dict() for job in reversed(self.jobs.values())]
+
+    def caches(self) -> Dict[str, Any]:
+        """Indexes kept between imports (for memory reporting)"""
+        return {"dedupe_index": self._index, "near_duplicate_filter": self._near_filter}
+
+    def clear_caches(self) -> bool:
+        """
+        Drop the reusable indexes; the next import rebuilds them
+
+        Returns:
+            bool: False (nothing dropped) while a job is running and using them
+        """
+        if not self._job_lock.acquire(blocking=False):
+            return False
+        try:
+            self._index, self._index_version = set(), None
+            self._near_filter, self._near_filter_version = None, None
+            return True
+        finally:
+            self._job_lock.release()
+
+    def _dedupe_index(self, corpus) -> Set[str]:
+        # Reuse the key set across imports while the corpus is unchanged by others
+        if self._index_version != corpus.version:
+            self._index = {dedupe_key(threat) for threat in corpus.threats}
+            self._index_version = corpus.version
+        return self._index
+
+    def _near_duplicate_filter(self, corpus) -> Optional[NearDuplicateFilter]:
+        # The LSH index is rebuilt only when the corpus changed outside this manager
+        if not self.near_duplicate_threshold:
+            return None
+        if self._near_filter_version != corpus.version:
+            self._near_filter = NearDuplicateFilter(corpus.threats, self.near_duplicate_threshold)
+            self._near_filter_version = corpus.version
+        return self._near_filter
+
+    def _run(self, job: ImportJob) -> None:
+        try:
+            with self._job_lock, corpus_lock(self.corpus_file) if self.corpus_file else nullcontext():
+                job.status = "running"
+                self._import(job)
+            job.status = "done"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            try:
+                os.remove(job.spool_path)
+            except OSError:
+                pass
+
+    def _import(self, job: ImportJob) -> None:
+        if self.watcher:
+            # Merge into the newest corpus, including other workers' imports
+            self.watcher.check(locked=True)
+        corpus = get_corpus()
+        index = set(self._dedupe_index(corpus))
+        near_filter = self._near_duplicate_filter(corpus)
+        # The filter absorbs accepted texts as it goes; it is only reusable if the job publishes
+        self._near_filter_version = None
+        with open(job.spool_path, "r", encoding="utf-8", errors="replace", newline="") as f:
+            result = merge_threats(corpus.threats, PARSERS[job.format](f), index,
+                                   self.batch_size, near_filter)
+        job.stats = result["stats"]
+        if result["added"]:
+            threats = tuple(corpus.threats) + tuple(result["added"])
+            if self.corpus_file:
+                save_corpus(self.corpus_file, threats)
+            if self.corpus_file and self.snapshot_file:
+                # Siblings map the new snapshot instead of parsing NDJSON; so does this
+                # worker, which publishes only the mapped snapshot
+                order = self.model_order() if self.model_order else DEFAULT_ORDER
+                build_snapshot(threats, self.snapshot_file, order)
+                snapshot = publish_corpus(load_snapshot(self.snapshot_file, verify=False))
+            else:
+                snapshot = swap_corpus(threats)
+            self._index, self._index_version = index, snapshot.version
+            self._near_filter_version = snapshot.version
+            if self.corpus_file and self.watcher:
+                self.watcher.mark_current()
+        else:
+            self._near_filter_version = corpus.version
+        job.corpus_version = get_corpus().version
+
+def main():
+    """CLI: stream a file to a running server's import endpoint and poll until done"""
+    import argparse
+    import requests
+
+    parser = argparse.ArgumentParser(description="Bulk-import threats into a running server")
+    parser.add_argument("path", help="NDJSON or CSV file ('-' for stdin)")
+    parser.add_argument("--url", default="http://localhost:5000", help="Server base URL")
+    parser.add_argument("--token", default=os.getenv("ADMIN_TOKEN"), help="Admin token (or $ADMIN_TOKEN)")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS, help="Input format (default: from file name)")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(None, args.path)
+    headers = {"Content-Type": "text/csv" if fmt == "csv" else "application/x-ndjson"}
+    if args.token:
+        headers["X-Admin-Token"] = args.token
+
+    source = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+    with source:
+        response = requests.post(f"{args.url}/api/admin/import", data=source, headers=headers, timeout=600)
+    if response.status_code != 202:
+        print(f"❌ Import rejected: HTTP {response.status_code} {response.text}")
+        sys.exit(1)
+
+    job = response.json()
+    print(f"📥 Import job {job['job_id']} queued")
+    while job["status"] in ("queued", "running"):
+        time.sleep(0.5)
+        job = requests.get(f"{args.url}/api/admin/import/{job['job_id']}", headers=headers, timeout=10).json()
+
+    if job["status"] != "done":
+        print(f"❌ Import failed: {job['error']}")
+        sys.exit(1)
+    print(f"✅ Import done: {json.dumps(job['stats'])} (corpus {job['corpus_version']})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+hello world app - Memory Module
+Per-worker memory accounting, cache budgets and worker recycling
+
+Every cache or index the app holds is registered by name with a getter
+(for size reporting) and, if it can be rebuilt on demand, an evict
+callable. MemoryGuard polls the worker's RSS. Once RSS crosses evict_at
+times the budget, it evicts the registered caches in registration order
+(cheapest to rebuild first) until RSS drops back. If RSS is still over
+the budget after that, or once the worker has served max_requests, the
+on_recycle callback starts a replacement worker (see shutdown.py). A
+successful recycle ends this worker; if it is still running recycle_retry
+seconds later (or on_recycle returned False), the next trigger tries
+again, waiting twice as long each time (up to 32 times recycle_retry).
+
+tracemalloc is off until the first snapshot is requested, since tracing
+roughly doubles allocation cost.
+"""
+
+import gc
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+# Objects deep_sizeof never descends into (shared by the whole process)
+_OPAQUE_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                 types.MethodType, memoryview)
+
+def rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def deep_sizeof(obj: Any) -> int:
+    """
+    Approximate bytes reachable from obj, counting each object once
+
+    Follows containers and instance attributes; modules, classes, functions
+    and memoryviews are not descended into (mapped files are shared, not
+    private worker memory).
+
+    Returns:
+        int: Sum of sys.getsizeof over the reachable objects
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if item is None or id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, _OPAQUE_TYPES):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__"):
+            stack.append(vars(item))
+        elif hasattr(type(item), "__slots__"):
+            stack.extend(getattr(item, name) for name in type(item).__slots__ if hasattr(item, name))
+    return total
+
+class CacheRegistry:
+    """Named caches with size reporting and eviction"""
+
+    def __init__(self):
+        self._caches: Dict[str, Dict[str, Any]] = {}
+
+    def register(self, name: str, get: Callable[[], Any],
+                 evict: Optional[Callable[[], None]] = None,
+                 version: Optional[Callable[[], Any]] = None) -> None:
+        """
+        Register a cache
+
+        Args:
+            name: Report key
+            get: Returns the cached object (sized with deep_sizeof)
+            evict: Drops the cache so it is rebuilt on demand (None = report only);
+                may return False to decline, e.g. while the cache is in use
+            version: For immutable caches, returns a key that changes whenever
+                the object does; the size is then only recomputed on change
+        """
+        self._caches[name] = {"get": get, "evict": evict, "version": version, "sized": (None, 0)}
+
+    def _size(self, cache: Dict[str, Any], obj: Any) -> int:
+        if cache["version"] is None:
+            return deep_sizeof(obj)
+        version = cache["version"]()
+        sized_version, size = cache["sized"]
+        if version is None or version != sized_version:
+            size = deep_sizeof(obj)
+            cache["sized"] = (version, size)
+        return size
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Size of each cache: bytes, entries (if sized), mapped bytes (if any), evictable"""
+        report = {}
+        for name, cache in self._caches.items():
+            obj = cache["get"]()
+            entry = {"bytes": self._size(cache, obj), "evictable": cache["evict"] is not None}
+            try:
+                entry["entries"] = len(obj)
+            except TypeError:
+                pass
+            mapped = getattr(obj, "mapped_bytes", None)
+            if mapped is not None:
+                entry["mapped_bytes"] = mapped
+            report[name] = entry
+        return report
+
+    def evictable(self) -> List[str]:
+        return [name for name, cache in self._caches.items() if cache["evict"]]
+
+    def evict(self, name: str) -> bool:
+        """Evict one cache; False if it is report-only or declined"""
+        evict = self._caches[name]["evict"]
+        return bool(evict) and evict() is not False
+
+class MemoryGuard:
+    """Keeps a worker under its memory budget and recycles it when it can't"""
+
+    def __init__(self, registry: CacheRegistry, budget_bytes: Optional[int] = None,
+                 evict_at: float = 0.85, max_requests: int = 0, max_requests_jitter: int = 0,
+                 check_interval: float = 5.0, recycle_retry: float = 60.0):
+        """
+        Args:
+            registry: Caches to evict under pressure
+            budget_bytes: RSS limit for this worker (None = no budget)
+            evict_at: Fraction of the budget at which caches are evicted
+            max_requests: Recycle after this many requests (0 = never)
+            max_requests_jitter: Up to this many extra requests, chosen at random,
+                so workers started together don't recycle together
+            check_interval: Seconds between RSS checks
+            recycle_retry: Seconds before a recycle that didn't take is tried again
+                (doubling after each attempt)
+        """
+        self.registry = registry
+        self.budget_bytes = budget_bytes
+        self.evict_at = evict_at
+        self.recycle_at = max_requests + random.randint(0, max(0, max_requests_jitter)) if max_requests else None
+        self.check_interval = check_interval
+        self.on_recycle: Optional[Callable[[str], Any]] = None
+        self.recycle_reason: Optional[str] = None
+        self.recycle_attempts = 0
+        self._recycle_retry = recycle_retry
+        self._next_recycle = 0.0
+        self.requests = 0
+        self.evictions: deque = deque(maxlen=20)
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._recycle_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def note_request(self) -> None:
+        """Count a served request; recycles the worker at recycle_at"""
+        self.requests = next(self._counter)
+        if self.recycle_at and self.requests >= self.recycle_at:
+            self.recycle(f"served {self.requests} requests")
+
+    def recycle(self, reason: str) -> None:
+        """
+        Ask for a replacement worker
+
+        Repeated calls are ignored until the retry backoff has passed; on
+        success the replacement stops this worker well before then.
+        """
+        if time.monotonic() < self._next_recycle:
+            return
+        with self._recycle_lock:
+            now = time.monotonic()
+            if now < self._next_recycle:
+                return
+            self._next_recycle = now + self._recycle_retry * 2 ** min(self.recycle_attempts, 5)
+            self.recycle_attempts += 1
+            self.recycle_reason = reason
+        print(f"♻️ Recycling worker {os.getpid()}: {reason}")
+        if self.on_recycle and self.on_recycle(reason) is False:
+            self.recycle_reason = None
+            print(f"⚠️ Could not start a replacement for worker {os.getpid()}; "
+                  f"retrying in {self._next_recycle - time.monotonic():.0f}s")
+
+    def check(self) -> Dict[str, Any]:
+        """
+        Compare RSS to the budget, evicting caches and recycling as needed
+
+        Returns:
+            Dict with rss_bytes and the caches evicted this time
+        """
+        rss = rss_bytes()
+        evicted = []
+        if self.budget_bytes and rss >= self.budget_bytes * self.evict_at:
+            with self._lock:
+                before = rss
+                for name in self.registry.evictable():
+                    if not self.registry.evict(name):
+                        continue
+                    evicted.append(name)
+                    gc.collect()
+                    rss = rss_bytes()
+                    if rss < self.budget_bytes * self.evict_at:
+                        break
+                self.evictions.append({"time": time.time(), "caches": evicted,
+                                       "rss_before": before, "rss_after": rss})
+            if rss >= self.budget_bytes:
+                self.recycle(f"RSS {rss / 2**20:.0f} MiB over the {self.budget_bytes / 2**20:.0f} MiB budget "
+                             f"after evicting caches")
+        return {"rss_bytes": rss, "evicted": evicted}
+
+    def status(self) -> Dict[str, Any]:
+        """Worker memory state for /debug/memory"""
+        return {
+            "pid": os.getpid(),
+            "rss_bytes": rss_bytes(),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "budget_bytes": self.budget_bytes,
+            "evict_at_bytes": int(self.budget_bytes * self.evict_at) if self.budget_bytes else None,
+            "requests": self.requests,
+            "recycle_at": self.recycle_at,
+            "recycle_reason": self.recycle_reason,
+            "recycle_attempts": self.recycle_attempts,
+            "evictions": list(self.evictions)
+        }
+
+    def start(self) -> None:
+        """Start the background RSS check (only needed with a budget)"""
+        if not self.budget_bytes or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="memory-guard", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.check_interval):
+            self.check()
+
+# Last tracemalloc snapshot, for diffs between on-demand snapshots
+_last_snapshot: Optional[tracemalloc.Snapshot] = None
+_snapshot_lock = threading.Lock()
+
+def tracemalloc_status() -> Dict[str, Any]:
+    """Whether tracemalloc is tracing, and traced current/peak bytes"""
+    if not tracemalloc.is_tracing():
+        return {"tracing": False}
+    current, peak = tracemalloc.get_traced_memory()
+    return {"tracing": True, "frames": tracemalloc.get_traceback_limit(),
+            "traced_bytes": current, "peak_traced_bytes": peak}
+
+def tracemalloc_snapshot(top: int = 20, group_by: str = "lineno", frames: int = 1) -> Dict[str, Any]:
+    """
+    Take a tracemalloc snapshot (starting tracing on first use)
+
+    Args:
+        top: Number of allocation sites to return
+        group_by: "lineno", "filename" or "traceback"
+        frames: Traceback depth if tracing has to be started
+
+    Returns:
+        Dict with tracing status, the top allocation sites and, from the second
+        snapshot on, the top changes since the previous snapshot. Right after
+        tracing starts, "top" only covers allocations made since then.
+    """
+    global _last_snapshot
+    if group_by not in ("lineno", "filename", "traceback"):
+        raise ValueError("group_by must be 'lineno', 'filename' or 'traceback'")
+    with _snapshot_lock:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(max(1, frames))
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        previous, _last_snapshot = _last_snapshot, snapshot
+
+    def site(stat) -> Dict[str, Any]:
+        return {"site": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                "bytes": stat.size, "count": stat.count}
+
+    result = {**tracemalloc_status(), "started": started,
+              "top": [site(stat) for stat in snapshot.statistics(group_by)[:top]], "diff": None}
+    if previous is not None:
+        result["diff"] = [{**site(stat), "bytes_diff": stat.size_diff, "count_diff": stat.count_diff}
+                          for stat in snapshot.compare_to(previous, group_by)[:top]]
+    return result
+
+def stop_tracemalloc() -> None:
+    """Stop tracing and drop the saved snapshot"""
+    global _last_snapshot
+    with _snapshot_lock:
+        tracemalloc.stop()
+        _last_snapshot = None
@@ -0,0 +1,180 @@
+"""
+hello world app - Profiling Module
+Statistical sampling profiler for live workers
+
+This module samples the stacks of every thread in the process via
+sys._current_frames() and aggregates them into collapsed-stack format
+("frame;frame;frame count"), which flamegraph.pl, speedscope and
+inferno consume directly. It supports one-off profiles of a fixed
+duration and an always-on low-frequency sampler that writes a profile
+file to disk per time window.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+# Leaf functions of threads that are parked rather than doing work
+# (queue.Queue.get parks in Condition.wait, so "get" itself isn't listed)
+IDLE_FUNCTIONS = frozenset([
+    "wait", "_wait_for_tstate_lock", "select", "poll", "accept",
+    "sleep", "serve_forever", "readinto", "recv_into"
+])
+
+# Upper bound for on-demand profiles so a request can't pin a worker forever
+MAX_PROFILE_SECONDS = 60
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)})"
+
+def collect_stacks(counts: Counter, exclude_threads: frozenset,
+                   include_idle: bool = False) -> None:
+    """
+    Take one sample of every thread's stack and add it to counts
+
+    Args:
+        counts: Counter of collapsed stack -> samples, updated in place
+        exclude_threads: Thread idents to skip (the profiler itself)
+        include_idle: Keep threads that are blocked in wait/select/etc.
+    """
+    for thread_id, frame in sys._current_frames().items():
+        if thread_id in exclude_threads:
+            continue
+        if not include_idle and frame.f_code.co_name in IDLE_FUNCTIONS:
+            continue
+        labels: List[str] = []
+        while frame is not None:
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        labels.reverse()
+        counts[";".join(labels)] += 1
+
+def format_collapsed(counts: Counter) -> str:
+    """
+    Render stack counts in collapsed-stack (flamegraph) text format
+
+    Args:
+        counts: Counter of collapsed stack -> samples
+
+    Returns:
+        str: One "stack count" line per distinct stack, hottest first
+    """
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+def profile_for(seconds: float, interval: float = 0.005,
+                include_idle: bool = False) -> Dict[str, object]:
+    """
+    Sample all other threads for a fixed duration (blocks the caller)
+
+    Args:
+        seconds: Profile duration, capped at MAX_PROFILE_SECONDS
+        interval: Seconds between samples
+        include_idle: Keep stacks of parked threads
+
+    Returns:
+        Dict with collapsed output, sample count and actual duration
+    """
+    seconds = max(0.0, min(float(seconds), MAX_PROFILE_SECONDS))
+    interval = max(0.0005, float(interval))
+    counts: Counter = Counter()
+    exclude = frozenset([threading.get_ident()])
+    samples = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    next_tick = start
+    while True:
+        collect_stacks(counts, exclude, include_idle)
+        samples += 1
+        next_tick += interval
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        if next_tick > now:
+            time.sleep(min(next_tick, deadline) - now)
+    return {
+        "collapsed": format_collapsed(counts),
+        "samples": samples,
+        "stacks": len(counts),
+        "duration": time.perf_counter() - start
+    }
+
+class ContinuousProfiler:
+    """
+    Low-frequency background sampler that writes one profile per window
+
+    Files are named profile-<unix time>-<pid>.collapsed in output_dir; only
+    the newest `keep` files in the directory are retained, whichever process
+    wrote them, so restarted and recycled workers don't leave theirs behind.
+    """
+
+    def __init__(self, output_dir: str = "profiles", interval: float = 0.1,
+                 window: float = 60.0, keep: int = 60, include_idle: bool = False):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.window = window
+        self.keep = keep
+        self.include_idle = include_idle
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start sampling in a daemon thread"""
+        if self.running:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="continuous-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and flush the current window"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        exclude = frozenset([threading.get_ident()])
+        counts: Counter = Counter()
+        window_end = time.monotonic() + self.window
+        while not self._stop_event.wait(self.interval):
+            collect_stacks(counts, exclude, self.include_idle)
+            if time.monotonic() >= window_end:
+                self._flush(counts)
+                counts = Counter()
+                window_end = time.monotonic() + self.window
+        self._flush(counts)
+
+    def _flush(self, counts: Counter) -> Optional[str]:
+        if not counts:
+            return None
+        path = os.path.join(self.output_dir, f"profile-{int(time.time())}-{os.getpid()}.collapsed")
+        with open(path, "w") as f:
+            f.write(format_collapsed(counts))
+        self._prune()
+        return path
+
+    def _prune(self) -> None:
+        if self.keep <= 0:
+            return
+        files = []
+        for entry in os.scandir(self.output_dir):
+            if entry.name.startswith("profile-") and entry.name.endswith(".collapsed"):
+                try:
+                    files.append((entry.stat().st_mtime, entry.name, entry.path))
+                except OSError:
+                    pass  # Pruned by another worker meanwhile
+        files.sort()
+        for _, _, path in files[:-self.keep]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,124 @@
+"""
+hello world app - Readiness Module
+Liveness vs readiness state and the startup warmup stage
+
+A worker is live as soon as it can answer HTTP at all, but only ready once
+warmup has run every step (corpus, models, templates, encoders, routes)
+and it isn't draining for shutdown. Load balancers should route on
+readiness so cold or exiting workers get no traffic.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+WarmupStep = Tuple[str, Callable[[], Any]]
+
+def timed_call(func: Callable[[], Any]) -> Dict[str, Any]:
+    """
+    Call func, recording success and elapsed milliseconds
+
+    Returns:
+        Dict with ok, ms, error (on failure) and any keys of a dict func returns
+    """
+    start = time.perf_counter()
+    try:
+        detail = func()
+        result = {"ok": True}
+        if isinstance(detail, dict):
+            result.update(detail)
+    except Exception as e:
+        result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    result["ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+class Readiness:
+    """Thread-safe readiness flag with warmup step timings"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.state = "starting"
+        self.reason: Optional[str] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.warmup_ms: Optional[float] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._settled = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def run_warmup(self, steps: Iterable[WarmupStep]) -> bool:
+        """
+        Run warmup steps in order, timing each; flips to ready if all succeed
+
+        A failing step is recorded and the remaining steps still run, so one
+        report shows everything that is broken.
+
+        Returns:
+            bool: True if the worker is now ready
+        """
+        with self._lock:
+            if self.state in ("warming_up", "draining"):
+                return self.ready
+            self.state = "warming_up"
+        start = time.perf_counter()
+        failed = []
+        for name, step in steps:
+            result = self.steps[name] = timed_call(step)
+            if not result["ok"]:
+                failed.append(name)
+        self.warmup_ms = round((time.perf_counter() - start) * 1000, 3)
+        with self._lock:
+            if self.state == "warming_up":
+                self.state = "failed" if failed else "ready"
+                self.reason = f"Warmup failed: {', '.join(failed)}" if failed else None
+        self._settled.set()
+        return self.ready
+
+    def start_warmup(self, steps: Iterable[WarmupStep]) -> None:
+        """Run warmup on a background thread (no-op if it already started)"""
+        with self._lock:
+            if self._thread is not None or self.state == "draining":
+                return
+            self._thread = threading.Thread(target=self.run_warmup, args=(list(steps),),
+                                            name="warmup", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until warmup has finished (or timeout); returns whether the worker is ready"""
+        self._settled.wait(timeout)
+        return self.ready
+
+    def mark_not_ready(self, reason: str, state: str = "draining") -> None:
+        """Stop advertising readiness (e.g. on SIGTERM)"""
+        with self._lock:
+            self.state = state
+            self.reason = reason
+        self._settled.set()
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness report: state, reason, warmup step timings"""
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "reason": self.reason,
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "warmup": {"total_ms": self.warmup_ms, "steps": dict(self.steps)}
+        }
+
+def check_dependencies(checks: Iterable[WarmupStep]) -> Dict[str, Dict[str, Any]]:
+    """
+    Run quick dependency checks, timing each
+
+    Returns:
+        Dict of check name -> {"ok", "ms", ...detail}
+    """
+    return {name: timed_call(check) for name, check in checks}
+
+def warmup_report(steps: Iterable[WarmupStep]) -> Dict[str, Any]:
+    """Run steps on a fresh Readiness and return its status (for tests and tooling)"""
+    readiness = Readiness()
+    readiness.run_warmup(steps)
+    return readiness.status()
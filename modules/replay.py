@@ -0,0 +1,247 @@
+"""
+hello world app - Replay Module
+Re-drive captured traffic against a server and compare latency between builds
+
+Requests are sent in captured order, each at its recorded offset from the
+first arrival divided by --speed. The schedule is open-loop: a slow server
+doesn't delay later sends. Latency is measured from each request's
+scheduled send time, not from when a free connection finally sent it, so
+time spent queued behind a slow server counts against it instead of being
+silently omitted; the lag from schedule to actual dispatch and the pure
+service time are reported alongside. Every run against the same capture
+and speed sends the same requests at the same offsets, so two builds can
+be compared run for run:
+
+    python -m modules.replay run captures/ --target http://localhost:5000 --output before.json
+    python -m modules.replay run captures/ --target http://localhost:5001 --speed 10 --output after.json
+    python -m modules.replay compare before.json after.json
+
+Only GET and HEAD requests are replayed (bodies are not captured), and
+/debug and /api/admin paths are skipped by default.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import requests
+
+if __package__:  # python -m modules.replay: siblings are imported by bare name
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from capture import load_captures
+
+REPLAY_METHODS = ("GET", "HEAD")
+DEFAULT_EXCLUDE = ("/debug", "/api/admin")
+PERCENTILES = (50, 90, 99)
+
+def select_requests(records: Iterable[Dict[str, Any]],
+                    exclude: Sequence[str] = DEFAULT_EXCLUDE) -> List[Dict[str, Any]]:
+    """Keep the replayable records (GET/HEAD, not under an excluded prefix)"""
+    return [record for record in records
+            if record.get("m", "GET") in REPLAY_METHODS
+            and not any(record["p"].startswith(prefix) for prefix in exclude)]
+
+def schedule(records: Sequence[Dict[str, Any]], speed: float = 1.0) -> List[float]:
+    """
+    Send offsets in seconds from the start of a replay
+
+    Args:
+        records: Arrival-ordered records
+        speed: Time compression (1 = real time, 10 = ten times faster, 0 = no delays)
+    """
+    if not records or speed <= 0:
+        return [0.0] * len(records)
+    first = records[0]["t"]
+    return [(record["t"] - first) / 1000 / speed for record in records]
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending sequence"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+def latency_summary(samples: Iterable[float]) -> Dict[str, float]:
+    """Count, mean, p50/p90/p99 and max of latencies in ms"""
+    values = sorted(samples)
+    summary = {"count": len(values), "mean": round(sum(values) / len(values), 3) if values else 0.0}
+    for pct in PERCENTILES:
+        summary[f"p{pct}"] = round(percentile(values, pct), 3)
+    summary["max"] = round(values[-1], 3) if values else 0.0
+    return summary
+
+def route_key(record: Dict[str, Any]) -> str:
+    return f"{record.get('m', 'GET')} {record['p']}"
+
+def replay(records: Sequence[Dict[str, Any]], target: str, speed: float = 1.0,
+           concurrency: int = 32, timeout: float = 10.0) -> Dict[str, Any]:
+    """
+    Send records to target on their recorded schedule
+
+    Args:
+        records: Arrival-ordered, replayable records (see select_requests)
+        target: Base URL, e.g. http://localhost:5000
+        speed: Time compression (see schedule)
+        concurrency: Maximum requests in flight
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        Dict with per-route and overall latency summaries (ms, from the
+        scheduled send time), service time from the actual send, errors,
+        status mismatches against the capture and how far each actual send
+        lagged its schedule. With speed 0 there is no schedule, so latency
+        is measured from the actual send.
+    """
+    target = target.rstrip("/")
+    offsets = schedule(records, speed)
+    latencies: List[Optional[float]] = [None] * len(records)
+    service_times: List[Optional[float]] = [None] * len(records)
+    statuses: List[Optional[int]] = [None] * len(records)
+    lags = [0.0] * len(records)
+    local = threading.local()
+
+    def send(index: int, scheduled: Optional[float]) -> None:
+        record = records[index]
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        url = f"{target}{record['p']}" + (f"?{record['q']}" if record.get("q") else "")
+        dispatched = time.perf_counter()
+        if scheduled is None:
+            scheduled = dispatched
+        lags[index] = max(0.0, (dispatched - scheduled) * 1000)
+        try:
+            response = session.request(record.get("m", "GET"), url, headers=record.get("h") or {},
+                                       timeout=timeout)
+            response.content
+            statuses[index] = response.status_code
+        except requests.RequestException:
+            statuses[index] = 0
+        finished = time.perf_counter()
+        latencies[index] = (finished - scheduled) * 1000
+        service_times[index] = (finished - dispatched) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for index, offset in enumerate(offsets):
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, index, started + offset if speed > 0 else None)
+    duration = time.perf_counter() - started
+
+    by_route: Dict[str, List[float]] = {}
+    errors = mismatches = 0
+    for record, latency, status in zip(records, latencies, statuses):
+        by_route.setdefault(route_key(record), []).append(latency)
+        if not status or status >= 500:
+            errors += 1
+        if status != record.get("s"):
+            mismatches += 1
+    return {
+        "target": target,
+        "speed": speed,
+        "requests": len(records),
+        "errors": errors,
+        "status_mismatches": mismatches,
+        "duration_s": round(duration, 3),
+        "schedule_lag_ms": latency_summary(lags),
+        "service_ms": latency_summary(service for service in service_times if service is not None),
+        "overall": latency_summary(latency for latency in latencies if latency is not None),
+        "routes": {route: latency_summary(samples) for route, samples in sorted(by_route.items())}
+    }
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Latency differences between two replay results (candidate minus baseline)
+
+    Returns:
+        Dict of "overall" and per-route deltas: for mean and each percentile,
+        the baseline and candidate ms, the difference and the ratio
+    """
+    def diff(before: Dict[str, float], after: Dict[str, float]) -> Dict[str, Any]:
+        result = {}
+        for metric in ("mean",) + tuple(f"p{pct}" for pct in PERCENTILES):
+            a, b = before.get(metric, 0.0), after.get(metric, 0.0)
+            result[metric] = {"baseline": a, "candidate": b, "delta": round(b - a, 3),
+                              "ratio": round(b / a, 3) if a else None}
+        return result
+
+    routes = sorted(set(baseline["routes"]) & set(candidate["routes"]))
+    return {
+        "overall": diff(baseline["overall"], candidate["overall"]),
+        "routes": {route: diff(baseline["routes"][route], candidate["routes"][route]) for route in routes},
+        "errors": {"baseline": baseline["errors"], "candidate": candidate["errors"]}
+    }
+
+def format_comparison(comparison: Dict[str, Any]) -> str:
+    """Text table of a compare() result, one row per route"""
+    lines = [f"{'route':<40} {'p50 ms':>17} {'p90 ms':>17} {'p99 ms':>17}"]
+    rows = [("overall", comparison["overall"])] + list(comparison["routes"].items())
+    for route, metrics in rows:
+        cells = []
+        for metric in ("p50", "p90", "p99"):
+            m = metrics[metric]
+            change = f"{(m['ratio'] - 1) * 100:+.0f}%" if m["ratio"] is not None else "n/a"
+            cells.append(f"{m['baseline']:>6.2f}→{m['candidate']:<6.2f}{change:>5}")
+        lines.append(f"{route[:40]:<40} " + " ".join(f"{cell:>17}" for cell in cells))
+    errors = comparison["errors"]
+    lines.append(f"errors: {errors['baseline']} → {errors['candidate']}")
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI: replay a capture, or compare two replay results"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m modules.replay",
+                                     description="Replay captured traffic and compare latency between builds")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Replay captures against a server")
+    run.add_argument("captures", nargs="+", help="Capture files or directories")
+    run.add_argument("--target", default="http://localhost:5000", help="Server base URL")
+    run.add_argument("--speed", type=float, default=1.0, help="Time compression (0 = no delays)")
+    run.add_argument("--concurrency", type=int, default=32, help="Maximum requests in flight")
+    run.add_argument("--limit", type=int, help="Replay only the first N requests")
+    run.add_argument("--exclude", action="append", help="Path prefix to skip (repeatable)")
+    run.add_argument("--output", "-o", help="Write the result JSON here")
+    run.add_argument("--baseline", help="Previous result JSON to compare against")
+    comparison = commands.add_parser("compare", help="Compare two replay result files")
+    comparison.add_argument("baseline")
+    comparison.add_argument("candidate")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.candidate) as f:
+            candidate = json.load(f)
+        print(format_comparison(compare(baseline, candidate)))
+        return 0
+
+    records = select_requests(load_captures(args.captures), tuple(args.exclude or DEFAULT_EXCLUDE))
+    if args.limit:
+        records = records[:args.limit]
+    if not records:
+        parser.error("No replayable requests in the given captures")
+    result = replay(records, args.target, args.speed, args.concurrency)
+    overall = result["overall"]
+    print(f"✅ Replayed {result['requests']:,} requests in {result['duration_s']:.2f}s: "
+          f"p50 {overall['p50']:.2f} ms, p90 {overall['p90']:.2f} ms, p99 {overall['p99']:.2f} ms, "
+          f"{result['errors']} errors, {result['status_mismatches']} status mismatches, "
+          f"service p99 {result['service_ms']['p99']:.2f} ms, "
+          f"schedule lag p99 {result['schedule_lag_ms']['p99']:.1f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            print(format_comparison(compare(json.load(f), result)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+"""
+hello world app - Shared Stats Module
+Cross-worker counters in a shared-memory (mmap) segment
+
+Every worker process maps the same fixed-layout file (under /dev/shm when
+available) and owns one slot of 8-byte fields. A worker only ever writes
+its own slot, so updates need no cross-process locking; readers sum the
+slots straight out of the mapping, with no IPC round trip.
+
+A plain mmap'd file is used rather than multiprocessing.shared_memory so
+that independently started workers can attach by path, and so that the
+segment isn't unlinked by the resource tracker when the creating process
+exits.
+
+A slot is live only while its pid exists and has the start time recorded
+when the slot was claimed, so a recycled pid doesn't keep a dead slot
+alive. Readers cache each slot's liveness for liveness_ttl seconds, so
+/health doesn't make a kill(0) and a /proc read per worker on every call.
+A pre-forking master releases its slot once it has forked, so only
+the processes that serve requests count as workers; a handle that was
+released claims a slot again on its next write.
+
+Layout: 16-byte header (b"VTSS", uint16 version, uint16 field count,
+uint32 slot count, uint32 reserved) followed by slot_count slots of
+field_count little-endian uint64 fields. Slot 0 holds totals folded in
+from workers that have exited.
+"""
+
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+MAGIC = b"VTSS"
+LAYOUT_VERSION = 2
+HEADER = struct.Struct("<4sHHII")
+
+# Per-slot fields; the first four are worker state, the rest are counters
+FIELDS = ("pid", "start_token", "started_at_ms", "corpus_version",
+          "requests", "threats_served", "generated_served", "errors")
+STATE_FIELDS = frozenset(("pid", "start_token", "started_at_ms", "corpus_version"))
+COUNTERS = tuple(name for name in FIELDS if name not in STATE_FIELDS)
+FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+DEFAULT_SLOTS = 64
+
+def default_path(service: str, port: int) -> str:
+    """Per-service, per-port segment path (tmpfs-backed where available)"""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"{service}-{port}.stats")
+
+def pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def process_start_token(pid: int) -> int:
+    """
+    Start time of a process, in clock ticks since boot
+
+    Returns:
+        int: Token that changes when a pid is reused (0 where /proc is unavailable)
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            # The command name may contain spaces; fields resume after its closing ")"
+            return int(f.read().rsplit(b")", 1)[1].split()[19])
+    except (OSError, ValueError, IndexError):
+        return 0
+
+class SharedStats:
+    """One worker's handle on the shared stats segment"""
+
+    def __init__(self, path: str, slots: int = DEFAULT_SLOTS, liveness_ttl: float = 1.0):
+        self.path = path
+        self.slots = slots
+        self.liveness_ttl = liveness_ttl
+        # Slot base -> (pid, start token, alive, expires at) for snapshot()
+        self._liveness: Dict[int, Tuple[int, int, bool, float]] = {}
+        self._size = HEADER.size + slots * len(FIELDS) * 8
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < self._size:
+                os.ftruncate(fd, self._size)
+            self._mmap = mmap.mmap(fd, self._size)
+        finally:
+            os.close(fd)
+        self._fields = memoryview(self._mmap)[HEADER.size:].cast("Q")
+        self._base: Optional[int] = None
+        self._claim()
+        if hasattr(os, "register_at_fork"):
+            # Pre-forking servers import the app once: each child claims its own
+            # slot, and the master, which only forks, gives its slot back
+            os.register_at_fork(after_in_child=lambda: self._claim(fresh_run=False),
+                                after_in_parent=self.release)
+
+    def _slot_base(self, slot: int) -> int:
+        return slot * len(FIELDS)
+
+    def _slot_alive(self, base: int) -> bool:
+        pid = self._fields[base + FIELD_INDEX["pid"]]
+        if not pid_alive(pid):
+            return False
+        token = self._fields[base + FIELD_INDEX["start_token"]]
+        return not token or process_start_token(pid) in (0, token)
+
+    def _slot_alive_cached(self, base: int) -> bool:
+        # Keyed by the slot's pid and start token, so a reclaimed slot is checked afresh
+        pid = self._fields[base + FIELD_INDEX["pid"]]
+        token = self._fields[base + FIELD_INDEX["start_token"]]
+        now = time.monotonic()
+        cached = self._liveness.get(base)
+        if cached and cached[0] == pid and cached[1] == token and now < cached[3]:
+            return cached[2]
+        alive = self._slot_alive(base)
+        self._liveness[base] = (pid, token, alive, now + self.liveness_ttl)
+        return alive
+
+    def _claim(self, fresh_run: bool = True) -> None:
+        """
+        Take a free (or dead worker's) slot
+
+        Args:
+            fresh_run: Reset the segment if no other worker is alive (False in a
+                forked child, whose master set the segment up for this run)
+        """
+        pid = os.getpid()
+        # A lock inherited across fork may be held by a thread that no longer exists
+        self._lock = threading.Lock()
+        with open(self.path, "r+b") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                magic, version, field_count, slot_count, _ = HEADER.unpack_from(self._mmap)
+                layout_ok = (magic, version, field_count, slot_count) == (
+                    MAGIC, LAYOUT_VERSION, len(FIELDS), self.slots)
+                others_alive = layout_ok and any(
+                    self._slot_alive(self._slot_base(slot))
+                    for slot in range(1, self.slots)
+                    if self._fields[self._slot_base(slot)] != pid)
+                if not layout_ok or (fresh_run and not others_alive):
+                    # Fresh run (or foreign layout): start every total from zero
+                    self._mmap[:] = bytes(self._size)
+                    HEADER.pack_into(self._mmap, 0, MAGIC, LAYOUT_VERSION, len(FIELDS), self.slots, 0)
+
+                chosen = None
+                for slot in range(1, self.slots):
+                    base = self._slot_base(slot)
+                    if self._fields[base] == pid or not self._slot_alive(base):
+                        chosen = slot
+                        break
+                if chosen is None:
+                    raise RuntimeError(f"All {self.slots - 1} shared stats slots are in use")
+                self._retire(chosen)
+                base = self._slot_base(chosen)
+                self._fields[base + FIELD_INDEX["pid"]] = pid
+                self._fields[base + FIELD_INDEX["start_token"]] = process_start_token(pid)
+                self._fields[base + FIELD_INDEX["started_at_ms"]] = int(time.time() * 1000)
+                self._base = base
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def release(self) -> None:
+        """Give this process's slot back, folding its counters into the totals"""
+        base = self._base
+        if base is None:
+            return
+        self._base = None
+        with open(self.path, "r+b") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if self._fields[base + FIELD_INDEX["pid"]] == os.getpid():
+                    self._retire(base // len(FIELDS))
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _slot(self) -> int:
+        # A released handle (pre-fork master) claims a slot again if it ever writes
+        if self._base is None:
+            self._claim(fresh_run=False)
+        return self._base
+
+    def _retire(self, slot: int) -> None:
+        # Fold a dead worker's counters into slot 0 so totals survive slot reuse
+        base = self._slot_base(slot)
+        fields = self._fields
+        for name in COUNTERS:
+            index = FIELD_INDEX[name]
+            fields[index] += fields[base + index]
+        for i in range(len(FIELDS)):
+            fields[base + i] = 0
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        """Add to one of this worker's counters"""
+        index = self._slot() + FIELD_INDEX[name]
+        with self._lock:
+            self._fields[index] += amount
+
+    def set(self, name: str, value: int) -> None:
+        """Set one of this worker's fields (a single aligned 8-byte store)"""
+        self._fields[self._slot() + FIELD_INDEX[name]] = value
+
+    def snapshot(self, per_worker: bool = False) -> Dict[str, Any]:
+        """
+        Aggregate all slots without locking
+
+        Worker liveness may be up to liveness_ttl seconds old.
+
+        Args:
+            per_worker: Include each live worker's fields
+
+        Returns:
+            Dict with live worker count, summed counters and (optionally) per-worker fields
+        """
+        fields = self._fields
+        width = len(FIELDS)
+        totals = {name: fields[FIELD_INDEX[name]] for name in COUNTERS}
+        workers: List[Dict[str, int]] = []
+        versions = set()
+        for slot in range(1, self.slots):
+            base = slot * width
+            pid = fields[base]
+            if not pid:
+                continue
+            for name in COUNTERS:
+                totals[name] += fields[base + FIELD_INDEX[name]]
+            if self._slot_alive_cached(base):
+                values = fields[base:base + width].tolist()
+                versions.add(values[FIELD_INDEX["corpus_version"]])
+                workers.append(dict(zip(FIELDS, values)))
+        result = {
+            "workers": len(workers),
+            "totals": totals,
+            "corpus_versions": len(versions)
+        }
+        if per_worker:
+            result["per_worker"] = workers
+        return result
+
+    def close(self) -> None:
+        self._fields.release()
+        self._mmap.close()
+
+def open_shared_stats(path: Optional[str], service: str, port: int) -> Optional[SharedStats]:
+    """
+    Attach to the shared stats segment, or return None if it can't be mapped
+
+    Args:
+        path: Segment path (None for default_path(service, port))
+        service: Service name used in the default path
+        port: Listening port used in the default path
+    """
+    try:
+        return SharedStats(path or default_path(service, port))
+    except (OSError, ValueError, RuntimeError):
+        return None
@@ -0,0 +1,213 @@
+"""
+hello world app - Shutdown Module
+Graceful shutdown, connection draining and socket handoff for rolling restarts
+
+On SIGTERM (or SIGINT) the server stops advertising readiness, stops
+accepting, lets in-flight requests finish (streamed bodies included) within
+a deadline, runs exit hooks that flush buffered analytics and logs, and
+exits.
+
+On SIGUSR2 it starts a replacement process that inherits the listening
+socket. Both processes accept from the same kernel queue, so no connection
+is refused or reset during the swap; once the replacement's warmup passes
+it writes the pid file and sends SIGTERM to the process it replaces. A
+replacement whose warmup fails exits and leaves the old process serving.
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+from werkzeug.serving import make_server
+from werkzeug.wsgi import ClosingIterator
+
+# Environment handed to a replacement process
+LISTEN_FD_ENV = "LISTEN_FD"
+REPLACES_PID_ENV = "REPLACES_PID"
+# Written with the serving process's pid once it is ready (set by manage.sh)
+PID_FILE_ENV = "PID_FILE"
+
+class InFlightTracker:
+    """WSGI middleware counting requests until their response body is closed"""
+
+    def __init__(self, app):
+        self.app = app
+        self.draining = False
+        self._active = 0
+        self._idle = threading.Condition()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def __call__(self, environ, start_response):
+        with self._idle:
+            self._active += 1
+
+        def start(status, headers, exc_info=None):
+            if self.draining:
+                # Keep-alive clients should reconnect (to the replacement, if any)
+                headers = [(k, v) for k, v in headers if k.lower() != "connection"]
+                headers.append(("Connection", "close"))
+            return start_response(status, headers, exc_info)
+
+        try:
+            return ClosingIterator(self.app(environ, start), self._finished)
+        except BaseException:
+            self._finished()
+            raise
+
+    def _finished(self) -> None:
+        with self._idle:
+            self._active -= 1
+            if not self._active:
+                self._idle.notify_all()
+
+    def wait_idle(self, timeout: float) -> int:
+        """
+        Wait for in-flight requests to finish
+
+        Returns:
+            int: Requests still in flight when the timeout passed (0 if drained)
+        """
+        with self._idle:
+            self._idle.wait_for(lambda: not self._active, timeout)
+            return self._active
+
+def write_pid_file(path: str) -> None:
+    """Atomically write this process's pid"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(f"{os.getpid()}\n")
+    os.replace(tmp_path, path)
+
+class GracefulServer:
+    """Threaded WSGI server with SIGTERM draining and SIGUSR2 socket handoff"""
+
+    def __init__(self, app, host: str, port: int, readiness, tracker: InFlightTracker,
+                 drain_timeout: float = 10.0, grace_period: float = 0.0,
+                 exit_hooks: Iterable[Callable[[], None]] = ()):
+        """
+        Args:
+            app: WSGI application (its wsgi_app should be wrapped by tracker)
+            host: Bind address
+            port: Bind port (ignored when a listening socket is inherited)
+            readiness: readiness.Readiness whose warmup the caller has started
+            tracker: InFlightTracker wrapping the app
+            drain_timeout: Seconds to wait for in-flight requests after accepting stops
+            grace_period: Seconds to keep accepting after going not-ready, so
+                load balancers polling /health/ready can stop routing here first
+            exit_hooks: Called in order after draining (flush analytics, stop profilers)
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.readiness = readiness
+        self.tracker = tracker
+        self.drain_timeout = drain_timeout
+        self.grace_period = grace_period
+        self.exit_hooks = list(exit_hooks)
+        self.server = None
+        self._stopping = threading.Event()
+        self._replacement: Optional[subprocess.Popen] = None
+        self._replace_lock = threading.Lock()
+
+    def serve(self) -> int:
+        """
+        Serve until SIGTERM/SIGINT, then drain and run exit hooks
+
+        Returns:
+            int: Exit code (1 if requests were still in flight at the deadline)
+        """
+        fd = os.environ.pop(LISTEN_FD_ENV, None)
+        self.server = make_server(self.host, self.port, self.app, threaded=True,
+                                  fd=int(fd) if fd else None)
+        signal.signal(signal.SIGTERM, self._on_stop_signal)
+        signal.signal(signal.SIGINT, self._on_stop_signal)
+        signal.signal(signal.SIGUSR2, self._on_replace_signal)
+        threading.Thread(target=self._announce_when_ready, name="ready-announcer", daemon=True).start()
+
+        self.server.serve_forever()
+        return self._drain()
+
+    def stop(self, reason: str = "Shutting down") -> None:
+        """Go not-ready and stop accepting (non-blocking; serve() then drains)"""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        self.readiness.mark_not_ready(reason)
+        self.tracker.draining = True
+        threading.Thread(target=self._stop_accepting, name="shutdown", daemon=True).start()
+
+    def _stop_accepting(self) -> None:
+        if self.grace_period > 0:
+            time.sleep(self.grace_period)
+        self.server.shutdown()
+
+    def _on_stop_signal(self, signum, frame) -> None:
+        print(f"🛑 {signal.Signals(signum).name}: draining (deadline {self.drain_timeout:g}s)")
+        self.stop()
+
+    def _on_replace_signal(self, signum, frame) -> None:
+        self.spawn_replacement("SIGUSR2")
+
+    def spawn_replacement(self, reason: str) -> bool:
+        """
+        Start a replacement on the shared socket; it takes over once warm
+
+        Also used to recycle a worker (memory budget, max requests).
+
+        Returns:
+            bool: False if stopping or a replacement is already starting
+        """
+        with self._replace_lock:
+            if self._stopping.is_set() or (self._replacement and self._replacement.poll() is None):
+                return False
+            fd = self.server.socket.fileno()
+            env = {**os.environ, LISTEN_FD_ENV: str(fd), REPLACES_PID_ENV: str(os.getpid())}
+            self._replacement = subprocess.Popen([sys.executable] + sys.argv, pass_fds=(fd,), env=env,
+                                                 start_new_session=True)
+        print(f"🔄 Started replacement (PID: {self._replacement.pid}) on the shared socket ({reason})")
+        return True
+
+    def _announce_when_ready(self) -> None:
+        ready = self.readiness.wait()
+        replaces = os.environ.pop(REPLACES_PID_ENV, None)
+        if not ready:
+            if replaces and not self._stopping.is_set():
+                print(f"⚠️ Replacement not ready ({self.readiness.reason}); PID {replaces} keeps serving")
+                self.stop("Replacement warmup failed")
+            return
+        pid_file = os.environ.get(PID_FILE_ENV)
+        if pid_file:
+            write_pid_file(pid_file)
+        if replaces:
+            try:
+                os.kill(int(replaces), signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _drain(self) -> int:
+        remaining = self.tracker.wait_idle(self.drain_timeout)
+        if remaining:
+            print(f"⚠️ Drain deadline passed with {remaining} request(s) in flight")
+        for hook in self.exit_hooks:
+            try:
+                hook()
+            except Exception as e:
+                print(f"⚠️ Exit hook failed: {e}")
+        pid_file = os.environ.get(PID_FILE_ENV)
+        try:
+            with open(pid_file) as f:
+                if f.read().strip() == str(os.getpid()):
+                    os.remove(pid_file)
+        except (OSError, TypeError):
+            pass
+        print(f"✅ Stopped (PID: {os.getpid()})")
+        sys.stdout.flush()
+        sys.stderr.flush()
+        return 1 if remaining else 0
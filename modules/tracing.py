@@ -0,0 +1,219 @@
+"""
+hello world app - Tracing Module
+Lightweight in-process request tracing
+
+This module records per-stage timing spans for sampled requests into a
+ring buffer of recent traces and exports them in Chrome Trace Event format
+(loadable in chrome://tracing or Perfetto). When the current request is not
+sampled, span() returns a shared no-op context manager, so instrumented code
+pays one thread-local lookup per span.
+"""
+
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+class _NoopSpan:
+    """Context manager used when the current request is not being traced"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+class _Span:
+    __slots__ = ("trace", "name", "depth", "start_ns")
+
+    def __init__(self, trace: "Trace", name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.depth = self.trace.depth
+        self.trace.depth += 1
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        trace = self.trace
+        trace.depth -= 1
+        trace.spans.append((self.name, self.start_ns, end_ns, self.depth,
+                            exc_type.__name__ if exc_type else None))
+        return False
+
+class Trace:
+    """One sampled request: a root name plus the spans recorded inside it"""
+
+    __slots__ = ("trace_id", "name", "wall_start", "start_ns", "end_ns",
+                 "spans", "depth", "thread_id")
+
+    def __init__(self, trace_id: int, name: str):
+        self.trace_id = trace_id
+        self.name = name
+        self.wall_start = time.time()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.spans: List[tuple] = []
+        self.depth = 1
+        self.thread_id = threading.get_ident()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the trace with span offsets relative to its start"""
+        end_ns = self.end_ns or time.perf_counter_ns()
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "start": self.wall_start,
+            "duration_us": (end_ns - self.start_ns) / 1000,
+            "spans": [
+                {
+                    "name": name,
+                    "offset_us": (start - self.start_ns) / 1000,
+                    "duration_us": (end - start) / 1000,
+                    "depth": depth,
+                    "error": error
+                }
+                for name, start, end, depth, error in sorted(self.spans, key=lambda s: s[1])
+            ]
+        }
+
+class Tracer:
+    """Samples traces, tracks the active trace per thread, keeps recent ones"""
+
+    def __init__(self, sample_rate: float = 0.0, buffer_size: int = 256):
+        self.sample_rate = sample_rate
+        self.recent: deque = deque(maxlen=buffer_size)
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+
+    def configure(self, sample_rate: Optional[float] = None,
+                  buffer_size: Optional[int] = None) -> None:
+        """Change the default sample rate and/or ring buffer capacity"""
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if buffer_size is not None and buffer_size != self.recent.maxlen:
+            self.recent = deque(self.recent, maxlen=buffer_size)
+
+    def start_trace(self, name: str, sample_rate: Optional[float] = None) -> Optional[Trace]:
+        """
+        Begin a trace for the current thread if this request is sampled
+
+        Args:
+            name: Root span name (e.g. "GET /")
+            sample_rate: Override for the tracer's sample rate (0.0-1.0)
+
+        Returns:
+            Trace if sampled, otherwise None
+        """
+        rate = self.sample_rate if sample_rate is None else sample_rate
+        if rate <= 0.0 or (rate < 1.0 and random.random() >= rate):
+            self._local.trace = None
+            return None
+        trace = Trace(next(self._ids), name)
+        self._local.trace = trace
+        return trace
+
+    def end_trace(self) -> Optional[Trace]:
+        """Finish the current thread's trace and push it into the ring buffer"""
+        trace = getattr(self._local, "trace", None)
+        if trace is None:
+            return None
+        self._local.trace = None
+        trace.end_ns = time.perf_counter_ns()
+        self.recent.append(trace)
+        return trace
+
+    def span(self, name: str):
+        """Context manager timing one stage of the current trace"""
+        trace = getattr(self._local, "trace", None)
+        if trace is None:
+            return _NOOP_SPAN
+        return _Span(trace, name)
+
+    def clear(self) -> None:
+        """Drop all buffered traces"""
+        self.recent.clear()
+
+    def get_recent(self, limit: Optional[int] = None) -> List[Trace]:
+        """Most recent finished traces, newest first"""
+        traces = list(self.recent)
+        traces.reverse()
+        return traces[:limit] if limit else traces
+
+    def to_chrome_trace(self, traces: Optional[List[Trace]] = None) -> Dict[str, Any]:
+        """Convert traces into a Chrome Trace Event Format document"""
+        pid = os.getpid()
+        events = []
+        for trace in traces if traces is not None else self.get_recent():
+            base_us = trace.wall_start * 1_000_000
+            end_ns = trace.end_ns or trace.start_ns
+            events.append({
+                "name": trace.name, "ph": "X", "pid": pid, "tid": trace.thread_id,
+                "ts": base_us, "dur": (end_ns - trace.start_ns) / 1000,
+                "args": {"trace_id": trace.trace_id}
+            })
+            for name, start, end, depth, error in trace.spans:
+                events.append({
+                    "name": name, "ph": "X", "pid": pid, "tid": trace.thread_id,
+                    "ts": base_us + (start - trace.start_ns) / 1000,
+                    "dur": (end - start) / 1000,
+                    "args": {"trace_id": trace.trace_id, "error": error}
+                })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+tracer = Tracer()
+
+def span(name: str):
+    """
+    Time a stage of the current request (no-op when unsampled)
+
+    Args:
+        name: Span name, e.g. "core.get_random_threat"
+
+    Returns:
+        Context manager
+    """
+    trace = getattr(tracer._local, "trace", None)
+    if trace is None:
+        return _NOOP_SPAN
+    return _Span(trace, name)
+
+def get_recent_traces(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Get recent traces from the ring buffer
+
+    Args:
+        limit: Maximum number of traces to return (newest first)
+
+    Returns:
+        List of serialized traces
+    """
+    return [trace.to_dict() for trace in tracer.get_recent(limit)]
+
+def export_chrome_trace(path: str = "traces.json") -> int:
+    """
+    Write the buffered traces to a Chrome Trace Event Format file
+
+    Args:
+        path: Output file path
+
+    Returns:
+        int: Number of traces written
+    """
+    traces = tracer.get_recent()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(tracer.to_chrome_trace(traces), f)
+    os.replace(tmp_path, path)
+    return len(traces)
@@ -7,8 +7,54 @@ This module contains utility functions for hello world app.
 
 import json
 import os
+import unicodedata
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from functools import lru_cache
+from typing import Dict, Iterable, List, Any, Optional
+
+# Fallback configuration used when no config file is present
+DEFAULT_CONFIG = {
+    "service_name": "hello_world_app",
+    "port": 5000,
+    "debug": False,
+    "trace_sample_rate": 0.01,
+    "trace_buffer_size": 256,
+    "trace_export_path": "traces.json",
+    "admin_token": None,
+    "profile_continuous": False,
+    "profile_interval": 0.1,
+    "profile_window": 60,
+    "profile_dir": "profiles",
+    "profile_keep": 60,
+    "analytics_enabled": True,
+    "analytics_dir": "analytics",
+    "analytics_flush_interval": 1.0,
+    "analytics_compact_interval": 30,
+    "analytics_retention_minutes": 10080,
+    "analytics_max_keys": 100000,
+    "corpus_file": "data/threats.ndjson",
+    "corpus_snapshot": "data/corpus.vtcs",
+    "corpus_snapshot_verify": True,
+    "import_near_duplicate_threshold": 0.8,
+    "import_max_bytes": 268435456,
+    "corpus_watch_interval": 2.0,
+    "generator_order": 1,
+    "shared_stats_path": None,
+    "shutdown_drain_timeout": 10.0,
+    "shutdown_grace_period": 0.0,
+    "capture_sample_rate": 0.0,
+    "capture_dir": "captures",
+    "capture_headers": ["Accept", "Accept-Encoding", "If-None-Match", "User-Agent"],
+    "capture_max_bytes": 16777216,
+    "capture_max_files": 10,
+    "memory_budget_mb": None,
+    "memory_evict_at": 0.85,
+    "memory_check_interval": 5.0,
+    "memory_recycle_retry": 60.0,
+    "max_requests": 0,
+    "max_requests_jitter": 0,
+    "tracemalloc_frames": 1
+}
 
 def get_timestamp() -> str:
     """
@@ -40,6 +86,9 @@ def load_config(config_path: str = "config.json") -> Dict[str, Any]:
     """
     Load configuration from file
     
+    Reads the file on every call; request handlers should use
+    config.get_config() for a cached, hot-reloaded snapshot instead.
+    
     Args:
         config_path: Path to config file
         
@@ -51,14 +100,10 @@ def load_config(config_path: str = "config.json") -> Dict[str, Any]:
             with open(config_path, 'r') as f:
                 return json.load(f)
     except Exception as e:
-        print(f"Warning: Could not load config from {config_path}: {e}")
+        save_log(f"Could not load config from {config_path}: {e}", "WARNING")
     
     # Return default config
-    return {
-        "service_name": "hello_world_app",
-        "port": 5000,
-        "debug": False
-    }
+    return dict(DEFAULT_CONFIG)
 
 def save_log(message: str, level: str = "INFO") -> None:
     """
@@ -79,17 +124,81 @@ def save_log(message: str, level: str = "INFO") -> None:
     except Exception:
         pass  # Silent fail for logging
 
-def sanitize_filename(filename: str) -> str:
+# Characters replaced by sanitize_filename, compiled once into a str.translate table
+UNSAFE_FILENAME_CHARS = '<>:"/\\|?*'
+_FILENAME_TRANSLATION = str.maketrans(dict.fromkeys(UNSAFE_FILENAME_CHARS, '_'))
+
+# Device names Windows refuses regardless of extension (CON, CON.txt, ...)
+WINDOWS_RESERVED_NAMES = frozenset(
+    ["CON", "PRN", "AUX", "NUL"]
+    + [f"COM{i}" for i in range(1, 10)]
+    + [f"LPT{i}" for i in range(1, 10)]
+)
+
+@lru_cache(maxsize=4096)
+def sanitize_filename(filename: str, windows_reserved: bool = False,
+                      max_length: Optional[int] = None,
+                      normalize: Optional[str] = None) -> str:
     """
     Sanitize filename for safe filesystem operations
     
+    Results are LRU-cached, so repeated names in large listings are free.
+    
     Args:
         filename: Original filename
+        windows_reserved: Also guard Windows device names and trailing dots/spaces
+        max_length: Truncate to this many characters (at least 1), keeping the extension
+        normalize: Unicode normalization form to apply first (e.g. "NFC", "NFKC")
         
     Returns:
         str: Sanitized filename
+        
+    Raises:
+        ValueError: If max_length is less than 1
     """
-    import re
+    if max_length is not None and max_length < 1:
+        raise ValueError("max_length must be at least 1")
+    if normalize:
+        filename = unicodedata.normalize(normalize, filename)
+    
     # Remove or replace unsafe characters
-    sanitized = re.sub(r'[<>:"/\\|?*]', '_', filename)
-    return sanitized.strip()
+    sanitized = filename.translate(_FILENAME_TRANSLATION).strip()
+    
+    if max_length is not None:
+        sanitized = _truncate_filename(sanitized, max_length)
+    
+    # Windows rules run on the truncated name, since truncating can expose a
+    # device name ("CONSOLE" -> "CON") or a trailing dot or space
+    if windows_reserved:
+        sanitized = sanitized.rstrip('. ')
+        if sanitized.split('.', 1)[0].upper() in WINDOWS_RESERVED_NAMES:
+            sanitized = '_' + sanitized
+            if max_length is not None:
+                # The "_" prefix keeps the stem from matching a device name
+                sanitized = _truncate_filename(sanitized, max_length).rstrip('. ')
+    
+    return sanitized
+
+def _truncate_filename(filename: str, max_length: int) -> str:
+    """Cut a filename to max_length characters, keeping the extension when it fits"""
+    if len(filename) <= max_length:
+        return filename
+    stem, dot, ext = filename.rpartition('.')
+    if stem and len(ext) + 1 < max_length:
+        return stem[:max_length - len(ext) - 1] + dot + ext
+    return filename[:max_length]
+
+def sanitize_filenames(filenames: Iterable[str], **policy: Any) -> List[str]:
+    """
+    Sanitize a batch of filenames (e.g. a directory listing)
+    
+    Args:
+        filenames: Iterable of original filenames
+        **policy: Keyword options forwarded to sanitize_filename
+        
+    Returns:
+        List[str]: Sanitized filenames, in input order
+    """
+    if not policy:
+        return list(map(sanitize_filename, filenames))
+    return [sanitize_filename(name, **policy) for name in filenames]
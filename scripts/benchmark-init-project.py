@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+benchmark-init-project.py: Compare single-pass, threaded template rendering
+against the original per-key, per-file placeholder replacement.
+
+Usage: python scripts/benchmark-init-project.py [files] [kb_per_file]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from init_project import TEXT_EXTENSIONS, copy_template_tree, get_project_config
+
+def legacy_replace_placeholders(file_path, config):
+    """Original implementation: one full str.replace pass per config key"""
+    with open(file_path, 'r') as f:
+        content = f.read()
+    for key, value in config.items():
+        content = content.replace(f"{{{{{key}}}}}", value)
+    with open(file_path, 'w') as f:
+        f.write(content)
+
+def legacy_copy_tree(template_dir, target_dir, config):
+    """Original sequential walk: copy2 then rewrite each text file"""
+    for root, dirs, files in os.walk(template_dir):
+        for file in files:
+            src_path = os.path.join(root, file)
+            dst_path = os.path.join(target_dir, os.path.relpath(src_path, template_dir))
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            shutil.copy2(src_path, dst_path)
+            if dst_path.endswith(TEXT_EXTENSIONS):
+                legacy_replace_placeholders(dst_path, config)
+
+def make_tree(root, config, files, kb_per_file):
+    """Synthetic template: text files with a placeholder per line plus some binaries"""
+    keys = list(config)
+    lines = [f"    value = \"{{{{{keys[i % len(keys)]}}}}}\"  # synthetic template line with some prose padding\n"
+             for i in range(len(keys))]
+    block = "".join(lines)
+    body = block * max(1, (kb_per_file * 1024) // len(block))
+    for i in range(files):
+        subdir = os.path.join(root, f"pkg{i % 20}")
+        os.makedirs(subdir, exist_ok=True)
+        if i % 10 == 9:
+            with open(os.path.join(subdir, f"asset{i}.bin"), 'wb') as f:
+                f.write(os.urandom(kb_per_file * 1024))
+        else:
+            with open(os.path.join(subdir, f"module{i}.py"), 'w') as f:
+                f.write(body)
+
+def bench(label, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed * 1000:10.1f} ms")
+    return elapsed
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    kb_per_file = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    config = get_project_config("bench-project", {
+        'PROJECT_NAME': "Bench Project", 'PROJECT_DESCRIPTION': "Benchmark"})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template")
+        make_tree(template, config, files, kb_per_file)
+        print(f"\n📊 Rendering {files:,} files × {kb_per_file} KiB, {len(config)} placeholder keys")
+
+        legacy = bench("legacy per-key replace", lambda: legacy_copy_tree(
+            template, os.path.join(tmp, "legacy"), config))
+        single = bench("single-pass, 1 thread", lambda: copy_template_tree(
+            template, os.path.join(tmp, "single"), config, workers=1))
+        threaded = bench("single-pass, thread pool", lambda: copy_template_tree(
+            template, os.path.join(tmp, "threaded"), config))
+
+        sample = os.path.join("pkg0", "module0.py")
+        with open(os.path.join(tmp, "legacy", sample)) as a, open(os.path.join(tmp, "threaded", sample)) as b:
+            assert a.read() == b.read(), "outputs differ"
+
+    print(f"⚡ Speedup: {legacy / single:.1f}x single-pass, {legacy / threaded:.1f}x threaded")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+benchmark-sanitize-filename.py: Compare the translate-table sanitize_filename
+against the original per-call re.sub implementation.
+
+Usage: python scripts/benchmark-sanitize-filename.py [listing_size] [unique_names]
+"""
+import os
+import random
+import string
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'modules'))
+
+from utils import sanitize_filename, sanitize_filenames
+
+def legacy_sanitize_filename(filename):
+    """Original implementation: imports re and substitutes on every call"""
+    import re
+    sanitized = re.sub(r'[<>:"/\\|?*]', '_', filename)
+    return sanitized.strip()
+
+def make_listing(size, unique):
+    """Build a synthetic directory listing with repeated names"""
+    alphabet = string.ascii_letters + string.digits + '<>:"/\\|?* ._-'
+    rng = random.Random(42)
+    names = [''.join(rng.choice(alphabet) for _ in range(rng.randint(8, 40))) for _ in range(unique)]
+    return [rng.choice(names) for _ in range(size)]
+
+def bench(label, func, repeat=5):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"{label:<32} {best * 1000:10.2f} ms")
+    return best
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    unique = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    listing = make_listing(size, unique)
+
+    assert sanitize_filenames(listing) == [legacy_sanitize_filename(n) for n in listing]
+
+    print(f"📊 Sanitizing {size:,} names ({unique:,} unique)")
+    legacy = bench("legacy re.sub per call", lambda: [legacy_sanitize_filename(n) for n in listing])
+    sanitize_filename.cache_clear()
+    cold = bench("translate, cold cache", lambda: (sanitize_filename.cache_clear(), sanitize_filenames(listing)), repeat=3)
+    warm = bench("translate, warm cache", lambda: sanitize_filenames(listing))
+    bench("with windows/max_length/NFC", lambda: sanitize_filenames(
+        listing, windows_reserved=True, max_length=255, normalize='NFC'))
+
+    print(f"⚡ Speedup: {legacy / cold:.1f}x cold, {legacy / warm:.1f}x warm")
+
+if __name__ == '__main__':
+    main()
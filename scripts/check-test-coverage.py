@@ -4,24 +4,41 @@ check-test-coverage.py: Enforce 4-phase test coverage for business logic feature
 
 Fails if any backend function or API endpoint is missing from any test phase.
 Automatically excludes utility functions that don't need comprehensive testing.
+
+Each file is parsed once into an AST and the extracted facts are cached on
+disk keyed by mtime/size (falling back to a content hash), so only changed
+files are re-parsed. Cache misses are parsed in parallel when there are many
+of them, and --watch re-checks whenever a file changes.
+
+Usage: python scripts/check-test-coverage.py [--watch] [--no-cache] [--workers N]
 """
 import sys
 import os
 import ast
 import re
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
 # --- Configuration ---
 MODULES_DIR = 'modules'
 TEST_SUITE = 'tests/test_suite.py'
 API_FILE = 'hello_world_app.py'  # Will be replaced in generated project
+CACHE_FILE = '.coverage-cache.json'
+CACHE_VERSION = 1
+
+# Parse in a process pool only when enough files changed to pay for it
+PARALLEL_THRESHOLD = 16
 
 # Functions matching these patterns are excluded from mandatory testing
 EXCLUDE_PATTERNS = [
     '__init__',
-    '__str__', 
+    '__str__',
     '__repr__',
     'format_response',
-    'sanitize_filename', 
+    'sanitize_filename',
     'validate_input',
     'log_',
     'debug_',
@@ -31,6 +48,10 @@ EXCLUDE_PATTERNS = [
     'setup_'
 ]
 
+# Test configuration dicts and the fields that name what a test covers
+TEST_DICTS = ['backend_tests', 'api_tests', 'contract_tests', 'frontend_tests']
+COVERAGE_FIELDS = ['function', 'endpoint', 'api_endpoint']
+
 # Template escaping patterns to prevent regex parsing failures
 TEMPLATE_ESCAPE_PATTERNS = [
     (r'\{\{[^}]*\}\}', '{{ VAR }}'),           # Jinja2 variables
@@ -41,7 +62,7 @@ TEMPLATE_ESCAPE_PATTERNS = [
 
 # --- Helper functions ---
 def sanitize_for_parsing(content):
-    """Remove template syntax that interferes with regex parsing"""
+    """Remove template syntax that interferes with parsing"""
     for pattern, replacement in TEMPLATE_ESCAPE_PATTERNS:
         content = re.sub(pattern, replacement, content, flags=re.DOTALL)
     return content
@@ -50,88 +71,220 @@ def should_exclude_function(func_name):
     """Exclude utility functions that don't need comprehensive testing"""
     return any(pattern in func_name for pattern in EXCLUDE_PATTERNS)
 
-def get_functions_from_module(module_path):
-    with open(module_path, 'r') as f:
-        content = f.read()
-    # Sanitize content to handle template strings before AST parsing
-    sanitized_content = sanitize_for_parsing(content)
+def parse_source(content, path):
+    """Parse source into an AST, retrying with template syntax stripped"""
     try:
-        tree = ast.parse(sanitized_content, filename=module_path)
-        all_functions = [n.name for n in ast.walk(tree) if isinstance(n, ast.FunctionDef)]
-        # Filter out utility functions that don't need comprehensive testing
-        return [f for f in all_functions if not should_exclude_function(f)]
-    except SyntaxError as e:
-        print(f"⚠️  Warning: Could not parse {module_path}: {e}")
-        return []
-
-def get_api_endpoints(api_path):
+        return ast.parse(content, filename=path)
+    except SyntaxError:
+        try:
+            return ast.parse(sanitize_for_parsing(content), filename=path)
+        except SyntaxError as e:
+            print(f"⚠️  Warning: Could not parse {path}: {e}")
+            return None
+
+def _const_str(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+def _strip_query(name):
+    return name.split('?', 1)[0]
+
+def extract_functions(tree):
+    """All function and method names defined in a module"""
+    return sorted({n.name for n in ast.walk(tree)
+                   if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))})
+
+def extract_api_endpoints(tree):
+    """Paths of @app.route('/api/...') decorators"""
     endpoints = set()
-    if not os.path.exists(api_path):
-        return endpoints
-    
-    with open(api_path, 'r') as f:
-        content = f.read()
-    
-    # Sanitize content before regex parsing
-    sanitized_content = sanitize_for_parsing(content)
-    
-    for line in sanitized_content.split('\n'):
-        m = re.search(r'@app\.route\(["\'](/api/[^"\']*)', line)
-        if m:
-            endpoints.add(m.group(1))
-    return endpoints
-
-def get_test_dict_keys(test_path, dict_name):
-    with open(test_path, 'r') as f:
-        content = f.read()
-    m = re.search(rf'{dict_name}\s*=\s*{{(.*?)}}', content, re.DOTALL)
-    if not m:
-        return set()
-    dict_body = m.group(1)
-    keys = re.findall(r'"([^"]+)":', dict_body)
-    return set(keys)
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for decorator in node.decorator_list:
+            if (isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute)
+                    and decorator.func.attr == 'route' and decorator.args):
+                path = _const_str(decorator.args[0])
+                if path and path.startswith('/api/'):
+                    endpoints.add(path)
+    return sorted(endpoints)
 
-# --- Main check ---
-def main():
-    # Backend functions (excluding utility functions)
+def extract_test_names(tree):
+    """
+    Names covered by each test configuration in the test suite
+
+    Covers dict keys (or the first element of (name, func) tuples) plus the
+    function/endpoint each test config points at.
+    """
+    found = {name: set() for name in TEST_DICTS}
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Assign) and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name) and node.targets[0].id in found):
+            continue
+        names = found[node.targets[0].id]
+        value = node.value
+        if isinstance(value, ast.Dict):
+            for key, config in zip(value.keys, value.values):
+                if _const_str(key):
+                    names.add(_const_str(key))
+                if isinstance(config, ast.Dict):
+                    for field, field_value in zip(config.keys, config.values):
+                        if _const_str(field) in COVERAGE_FIELDS and _const_str(field_value):
+                            names.add(_strip_query(_const_str(field_value)))
+        elif isinstance(value, (ast.List, ast.Tuple)):
+            for element in value.elts:
+                if isinstance(element, (ast.Tuple, ast.List)) and element.elts:
+                    if _const_str(element.elts[0]):
+                        names.add(_const_str(element.elts[0]))
+    return {name: sorted(names) for name, names in found.items()}
+
+EXTRACTORS = {
+    'module': lambda tree: {'functions': extract_functions(tree)},
+    'api': lambda tree: {'endpoints': extract_api_endpoints(tree)},
+    'tests': extract_test_names,
+}
+
+def analyze_source(path, kind, content):
+    """Parse one file and extract the facts the coverage check needs"""
+    tree = parse_source(content, path)
+    if tree is None:
+        return None
+    return EXTRACTORS[kind](tree)
+
+def _analyze_job(job):
+    path, kind, content = job
+    return path, analyze_source(path, kind, content)
+
+# --- Cache ---
+class AnalysisCache:
+    """On-disk cache of per-file analysis, keyed by mtime/size then content hash"""
+
+    def __init__(self, path=CACHE_FILE, enabled=True):
+        self.path = path
+        self.enabled = enabled
+        self.entries = {}
+        self.dirty = False
+        self._pending = {}
+        if enabled and os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                if data.get('version') == CACHE_VERSION:
+                    self.entries = data.get('files', {})
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def lookup(self, path, kind):
+        """
+        Return (result, None) on a hit or (None, content) on a miss
+
+        A changed mtime with identical content is still a hit.
+        """
+        stat = os.stat(path)
+        entry = self.entries.get(path) if self.enabled else None
+        if entry and entry['kind'] == kind and entry['mtime_ns'] == stat.st_mtime_ns \
+                and entry['size'] == stat.st_size:
+            return entry['result'], None
+        with open(path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if entry and entry['kind'] == kind and entry['sha256'] == digest:
+            entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            self.dirty = True
+            return entry['result'], None
+        self._pending[path] = (kind, stat.st_mtime_ns, stat.st_size, digest)
+        return None, raw.decode('utf-8', errors='replace')
+
+    def store(self, path, result):
+        kind, mtime_ns, size, digest = self._pending.pop(path)
+        if result is None:
+            return
+        self.entries[path] = {'kind': kind, 'mtime_ns': mtime_ns, 'size': size,
+                              'sha256': digest, 'result': result}
+        self.dirty = True
+
+    def prune(self, live_paths):
+        for path in set(self.entries) - set(live_paths):
+            del self.entries[path]
+            self.dirty = True
+
+    def save(self):
+        if not (self.enabled and self.dirty):
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'files': self.entries}, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+# --- Analysis ---
+def discover_files():
+    """All files the check depends on, as (path, kind) pairs"""
+    files = []
+    for root, dirs, names in os.walk(MODULES_DIR):
+        dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+        for fname in sorted(names):
+            if fname.endswith('.py'):
+                files.append((os.path.join(root, fname), 'module'))
+    if os.path.exists(API_FILE):
+        files.append((API_FILE, 'api'))
+    files.append((TEST_SUITE, 'tests'))
+    return files
+
+def analyze_files(files, cache, workers=None):
+    """Analyze files, re-parsing only cache misses (in parallel when many)"""
+    results = {}
+    misses = []
+    for path, kind in files:
+        result, content = cache.lookup(path, kind)
+        if content is None:
+            results[path] = result
+        else:
+            misses.append((path, kind, content))
+
+    if len(misses) >= PARALLEL_THRESHOLD and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(_analyze_job, misses, chunksize=8))
+    else:
+        parsed = [_analyze_job(job) for job in misses]
+
+    for path, result in parsed:
+        cache.store(path, result)
+        results[path] = result
+
+    cache.prune([path for path, _ in files])
+    cache.save()
+    return results, len(misses)
+
+def check_coverage(files, results):
+    """Compare analyzed code against test configs; returns (errors, stats)"""
     all_backend_funcs = set()
     excluded_funcs = set()
-    
-    for fname in os.listdir(MODULES_DIR):
-        if fname.endswith('.py'):
-            module_path = os.path.join(MODULES_DIR, fname)
-            with open(module_path, 'r') as f:
-                tree = ast.parse(f.read(), filename=module_path)
-            all_funcs = [n.name for n in ast.walk(tree) if isinstance(n, ast.FunctionDef)]
-            
-            for func in all_funcs:
+    api_endpoints = set()
+    tests = {name: set() for name in TEST_DICTS}
+
+    for path, kind in files:
+        result = results.get(path)
+        if result is None:
+            continue
+        if kind == 'module':
+            for func in result['functions']:
                 if should_exclude_function(func):
                     excluded_funcs.add(func)
                 else:
                     all_backend_funcs.add(func)
-    
-    # API endpoints
-    api_endpoints = get_api_endpoints(API_FILE)
-    
-    # Test suite dicts
-    backend_tests = get_test_dict_keys(TEST_SUITE, 'backend_tests')
-    api_tests = get_test_dict_keys(TEST_SUITE, 'api_tests')
-    contract_tests = get_test_dict_keys(TEST_SUITE, 'contract_tests')
-    frontend_tests = get_test_dict_keys(TEST_SUITE, 'frontend_tests')
-    
+        elif kind == 'api':
+            api_endpoints.update(result['endpoints'])
+        else:
+            for name in TEST_DICTS:
+                tests[name].update(result.get(name, []))
+
     # Check coverage
-    missing_backend = all_backend_funcs - backend_tests
-    missing_api = api_endpoints - api_tests
-    missing_contract = api_endpoints - contract_tests
-    missing_frontend = api_endpoints - frontend_tests
-    
-    # Report results
-    if excluded_funcs:
-        print(f"ℹ️  Excluded {len(excluded_funcs)} utility functions from testing requirements:")
-        for func in sorted(excluded_funcs):
-            print(f"    - {func}")
-        print()
-    
+    missing_backend = all_backend_funcs - tests['backend_tests']
+    missing_api = api_endpoints - tests['api_tests']
+    missing_contract = api_endpoints - tests['contract_tests']
+    missing_frontend = api_endpoints - tests['frontend_tests']
+
     errors = []
     if missing_backend:
         errors.append(f"Missing backend tests for: {sorted(missing_backend)}")
@@ -141,18 +294,88 @@ def main():
         errors.append(f"Missing contract tests for: {sorted(missing_contract)}")
     if missing_frontend:
         errors.append(f"Missing frontend tests for: {sorted(missing_frontend)}")
-    
+
+    return errors, {
+        'backend_funcs': all_backend_funcs,
+        'excluded_funcs': excluded_funcs,
+        'api_endpoints': api_endpoints,
+    }
+
+def report(errors, stats):
+    """Print the coverage report; returns True if coverage is complete"""
+    excluded_funcs = stats['excluded_funcs']
+    if excluded_funcs:
+        print(f"ℹ️  Excluded {len(excluded_funcs)} utility functions from testing requirements:")
+        for func in sorted(excluded_funcs):
+            print(f"    - {func}")
+        print()
+
     if errors:
         print("❌ 4-Phase Test Coverage Check Failed:")
         for err in errors:
             print("  -", err)
         print(f"\nℹ️  Only business logic functions require comprehensive testing.")
         print(f"   Utility functions are automatically excluded.")
-        sys.exit(1)
-    
-    print(f"✅ All {len(all_backend_funcs)} business logic functions and {len(api_endpoints)} endpoints have 4-phase test coverage!")
+        return False
+
+    print(f"✅ All {len(stats['backend_funcs'])} business logic functions and {len(stats['api_endpoints'])} endpoints have 4-phase test coverage!")
     if excluded_funcs:
         print(f"   ({len(excluded_funcs)} utility functions automatically excluded)")
+    return True
+
+def run_check(cache, workers=None):
+    files = discover_files()
+    results, parsed = analyze_files(files, cache, workers)
+    errors, stats = check_coverage(files, results)
+    return report(errors, stats), files, parsed
+
+def watch(cache, workers=None, interval=1.0):
+    """Re-run the check whenever a tracked file is added, removed or modified"""
+    def signature():
+        sig = {}
+        for path, _ in discover_files():
+            try:
+                stat = os.stat(path)
+                sig[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                pass
+        return sig
+
+    last = None
+    try:
+        while True:
+            current = signature()
+            if current != last:
+                changed = sorted(path for path in current.keys() | (last or {}).keys()
+                                 if current.get(path) != (last or {}).get(path))
+                started = time.perf_counter()
+                if last is not None:
+                    print(f"\n🔄 Changed: {', '.join(changed)}")
+                _, files, parsed = run_check(cache, workers)
+                print(f"⏱️  Checked {len(files)} files ({parsed} re-parsed) in "
+                      f"{(time.perf_counter() - started) * 1000:.1f} ms — watching for changes...")
+                last = current
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+# --- Main check ---
+def main():
+    parser = argparse.ArgumentParser(description="Enforce 4-phase test coverage")
+    parser.add_argument('--watch', action='store_true', help="Re-check whenever files change")
+    parser.add_argument('--interval', type=float, default=1.0, help="Watch poll interval in seconds")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore and don't write the on-disk cache")
+    parser.add_argument('--workers', type=int, default=None, help="Parser processes for cache misses")
+    args = parser.parse_args()
+
+    cache = AnalysisCache(enabled=not args.no_cache)
+    if args.watch:
+        watch(cache, args.workers, args.interval)
+        return
+
+    success, _, _ = run_check(cache, args.workers)
+    if not success:
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
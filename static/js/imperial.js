@@ -53,13 +53,28 @@ class ImperialThreatGenerator {
     this.apiBaseUrl = window.location.origin;
     this.sounds = new ImperialSounds();
     this.isLoading = false;
+
+    // Prefetched threats; clicks are served from here without a round trip
+    this.threatBuffer = [];
+    this.bufferTarget = 20;
+    this.refillThreshold = 5;
+    this.refillPromise = null;
+
+    // Displayed batch threats, reported to /api/threats/shown so prefetched
+    // threats that are never shown don't count as deliveries
+    this.shownThreats = [];
+    this.shownReportSize = 20;
+
     this.init();
   }
 
   init() {
     this.setupEventListeners();
     this.startBreathingEffect();
-    this.updateThreatStats();
+    // The first batch also carries the threat count (no separate stats request)
+    this.refillBuffer().catch((error) => {
+      console.error('Failed to prefetch threats:', error);
+    });
   }
 
   setupEventListeners() {
@@ -77,6 +92,12 @@ class ImperialThreatGenerator {
       }
     });
 
+    // Report what was shown before the page goes away
+    document.addEventListener('visibilitychange', () => {
+      if (document.visibilityState === 'hidden') this.reportShownThreats();
+    });
+    window.addEventListener('pagehide', () => this.reportShownThreats());
+
     // Breathing effect on helmet click
     const helmet = document.querySelector('.vader-helmet');
     if (helmet) {
@@ -88,21 +109,29 @@ class ImperialThreatGenerator {
   }
 
   async getNewThreat() {
+    const buffered = this.threatBuffer.shift();
+    if (buffered !== undefined) {
+      this.displayBufferedThreat(buffered);
+      this.addThreatAnimation();
+      this.topUpBuffer();
+      return;
+    }
+
+    // Buffer ran dry: wait for the (possibly already in-flight) batch
     if (this.isLoading) return;
 
     this.isLoading = true;
     this.showLoadingState();
 
     try {
-      const response = await fetch(`${this.apiBaseUrl}/api/threat`);
-
-      if (!response.ok) {
-        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+      await this.refillBuffer();
+      const threat = this.threatBuffer.shift();
+      if (threat === undefined) {
+        throw new Error('Empty threat batch');
       }
-
-      const threatData = await response.json();
-      this.displayNewThreat(threatData.threat);
+      this.displayBufferedThreat(threat);
       this.addThreatAnimation();
+      this.topUpBuffer();
     } catch (error) {
       console.error('Failed to fetch new threat:', error);
       this.showError('The Force is weak with this connection...');
@@ -112,6 +141,66 @@ class ImperialThreatGenerator {
     }
   }
 
+  topUpBuffer() {
+    if (this.threatBuffer.length > this.refillThreshold) return;
+    this.refillBuffer().catch((error) => {
+      console.error('Failed to prefetch threats:', error);
+    });
+  }
+
+  refillBuffer() {
+    // Coalesce concurrent refills into the one in-flight request
+    if (!this.refillPromise) {
+      const count = Math.max(1, this.bufferTarget - this.threatBuffer.length);
+      this.refillPromise = this.fetchThreatBatch(count).finally(() => {
+        this.refillPromise = null;
+      });
+    }
+    return this.refillPromise;
+  }
+
+  async fetchThreatBatch(count) {
+    const response = await fetch(
+      `${this.apiBaseUrl}/api/threats/batch?count=${count}`
+    );
+
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    const data = await response.json();
+    this.threatBuffer.push(...data.threats);
+    this.updateThreatStats(data.total_threats);
+    return data;
+  }
+
+  displayBufferedThreat(item) {
+    this.displayNewThreat(item.threat);
+    this.shownThreats.push({
+      corpus_version: item.corpus_version,
+      threat_id: item.threat_id,
+    });
+    if (this.shownThreats.length >= this.shownReportSize) {
+      this.reportShownThreats();
+    }
+  }
+
+  reportShownThreats() {
+    if (this.shownThreats.length === 0) return;
+    const body = JSON.stringify({ threats: this.shownThreats });
+    this.shownThreats = [];
+    const url = `${this.apiBaseUrl}/api/threats/shown`;
+    const blob = new Blob([body], { type: 'application/json' });
+    if (navigator.sendBeacon && navigator.sendBeacon(url, blob)) return;
+    fetch(url, {
+      method: 'POST',
+      body: blob,
+      keepalive: true,
+    }).catch((error) => {
+      console.error('Failed to report shown threats:', error);
+    });
+  }
+
   displayNewThreat(threat) {
     const threatText = document.getElementById('threatText');
     if (!threatText) return;
@@ -179,18 +268,10 @@ class ImperialThreatGenerator {
     }, 3000);
   }
 
-  async updateThreatStats() {
-    try {
-      const response = await fetch(`${this.apiBaseUrl}/api/threat/count`);
-      if (response.ok) {
-        const data = await response.json();
-        const countElement = document.getElementById('threatCount');
-        if (countElement) {
-          countElement.textContent = data.total_threats;
-        }
-      }
-    } catch (error) {
-      console.error('Failed to update threat stats:', error);
+  updateThreatStats(totalThreats) {
+    const countElement = document.getElementById('threatCount');
+    if (countElement && totalThreats !== undefined) {
+      countElement.textContent = totalThreats;
     }
   }
 
@@ -257,6 +338,13 @@ document.head.appendChild(styleSheet);
 document.addEventListener('DOMContentLoaded', () => {
   window.imperialThreatGenerator = new ImperialThreatGenerator();
 
+  // Cache the app shell and a threat batch for instant repeat loads and offline use
+  if ('serviceWorker' in navigator) {
+    navigator.serviceWorker.register('/sw.js').catch((error) => {
+      console.log('Service worker registration failed:', error);
+    });
+  }
+
   // Add keyboard shortcut hint
   console.log('🌟 Imperial Tip: Press SPACE or ENTER to generate new threats!');
   console.log("🌟 Click on Vader's helmet for breathing effects!");
@@ -0,0 +1,236 @@
+/**
+ * Imperial Threat Generator Service Worker
+ * Precaches the app shell and a pool of threats so repeat visits load from
+ * cache and the page keeps working offline. While the pool is fresh, threat
+ * batches are served from it and it is refilled in the background.
+ *
+ * Served at /sw.js (scope /); the server fills in __APP_SHELL_VERSION__ with
+ * a hash of the static files and template, so any change installs a fresh
+ * cache and the old one is dropped on activate.
+ */
+
+const CACHE_VERSION = '__APP_SHELL_VERSION__';
+const SHELL_CACHE = `imperial-shell-${CACHE_VERSION}`;
+const THREAT_CACHE = 'imperial-threats';
+
+const SHELL_URLS = ['/', '/static/css/imperial.css', '/static/js/imperial.js'];
+const FONT_ORIGINS = ['https://fonts.googleapis.com', 'https://fonts.gstatic.com'];
+const FONT_CSS =
+  'https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700;900&display=swap';
+
+const THREAT_BATCH_PATH = '/api/threats/batch';
+const THREAT_POOL_SIZE = 50;
+const THREAT_BATCH_KEY = `${THREAT_BATCH_PATH}?count=${THREAT_POOL_SIZE}`;
+
+// Cached responses younger than this are served without touching the network
+const REVALIDATE_AFTER_MS = 5 * 60 * 1000;
+const CACHED_AT_HEADER = 'X-SW-Cached-At';
+
+self.addEventListener('install', (event) => {
+  event.waitUntil(
+    (async () => {
+      const shell = await caches.open(SHELL_CACHE);
+      await Promise.all(SHELL_URLS.map((url) => cacheFresh(shell, url)));
+      // Fonts and the threat batch are nice-to-have; don't fail install on them
+      await cacheFresh(shell, new Request(FONT_CSS, { mode: 'no-cors' })).catch(
+        () => {}
+      );
+      await refreshThreatBatch().catch(() => {});
+      await self.skipWaiting();
+    })()
+  );
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil(
+    (async () => {
+      const names = await caches.keys();
+      await Promise.all(
+        names
+          .filter((name) => name.startsWith('imperial-shell-') && name !== SHELL_CACHE)
+          .map((name) => caches.delete(name))
+      );
+      await self.clients.claim();
+    })()
+  );
+});
+
+self.addEventListener('fetch', (event) => {
+  const request = event.request;
+  if (request.method !== 'GET') return;
+
+  const url = new URL(request.url);
+  if (url.origin === self.location.origin) {
+    if (request.mode === 'navigate' && url.pathname === '/') {
+      event.respondWith(staleWhileRevalidate(event, '/'));
+    } else if (url.pathname.startsWith('/static/')) {
+      event.respondWith(staleWhileRevalidate(event, request));
+    } else if (url.pathname === THREAT_BATCH_PATH) {
+      event.respondWith(threatBatch(event, request));
+    }
+  } else if (FONT_ORIGINS.includes(url.origin)) {
+    event.respondWith(staleWhileRevalidate(event, request));
+  }
+});
+
+async function cacheFresh(cache, request) {
+  const response = await fetch(request, { cache: 'no-cache' });
+  if (!response.ok && response.type !== 'opaque') {
+    throw new Error(`HTTP ${response.status} for ${request.url || request}`);
+  }
+  await cache.put(request, await stamp(response));
+  return response;
+}
+
+async function stamp(response) {
+  // Opaque (cross-origin) responses can't be read; they just never go stale early
+  if (response.type === 'opaque') return response;
+  const headers = new Headers(response.headers);
+  headers.set(CACHED_AT_HEADER, String(Date.now()));
+  return new Response(await response.blob(), {
+    status: response.status,
+    statusText: response.statusText,
+    headers,
+  });
+}
+
+function isStale(response) {
+  const cachedAt = Number(response.headers.get(CACHED_AT_HEADER));
+  return !cachedAt || Date.now() - cachedAt > REVALIDATE_AFTER_MS;
+}
+
+async function staleWhileRevalidate(event, request) {
+  const cache = await caches.open(SHELL_CACHE);
+  const cached = await cache.match(request);
+  if (cached) {
+    if (isStale(cached)) {
+      event.waitUntil(cacheFresh(cache, request).catch(() => {}));
+    }
+    return cached;
+  }
+  try {
+    const response = await fetch(request);
+    if (response.ok || response.type === 'opaque') {
+      event.waitUntil(
+        stamp(response.clone()).then((stamped) => cache.put(request, stamped))
+      );
+    }
+    return response;
+  } catch (error) {
+    if (request === '/' || request.mode === 'navigate') {
+      const shell = await cache.match('/');
+      if (shell) return shell;
+    }
+    throw error;
+  }
+}
+
+async function refreshThreatBatch() {
+  const cache = await caches.open(THREAT_CACHE);
+  const response = await fetch(THREAT_BATCH_KEY, { cache: 'no-cache' });
+  if (!response.ok) throw new Error(`HTTP ${response.status}`);
+  const stamped = await stamp(response);
+  await withThreatPool(() => cache.put(THREAT_BATCH_KEY, stamped));
+}
+
+// The cached batch is a pool of prefetched threats plus a `next` offset past
+// the ones already handed out; reads and writes are serialized so concurrent
+// batch requests never get the same threats
+let threatPoolQueue = Promise.resolve();
+let threatPoolRefill = null;
+
+function withThreatPool(task) {
+  const run = threatPoolQueue.then(task);
+  threatPoolQueue = run.catch(() => {});
+  return run;
+}
+
+function refillThreatPool() {
+  // Coalesce concurrent refills into the one in-flight request
+  if (!threatPoolRefill) {
+    threatPoolRefill = refreshThreatBatch().finally(() => {
+      threatPoolRefill = null;
+    });
+  }
+  return threatPoolRefill;
+}
+
+function takeThreats(count) {
+  return withThreatPool(async () => {
+    const cache = await caches.open(THREAT_CACHE);
+    const cached = await cache.match(THREAT_BATCH_KEY);
+    if (!cached || isStale(cached)) return null;
+    const { next = 0, ...data } = await cached.json();
+    // A small corpus fills the pool with fewer threats; never ask for more than it holds
+    const taken = Math.min(count, data.threats.length);
+    const remaining = data.threats.length - next - taken;
+    if (remaining < 0) return null;
+    // Keep the original stamp: freshness is when the threats were fetched
+    await cache.put(
+      THREAT_BATCH_KEY,
+      new Response(JSON.stringify({ ...data, next: next + taken }), {
+        headers: cached.headers,
+      })
+    );
+    return { ...data, threats: data.threats.slice(next, next + taken), remaining };
+  });
+}
+
+// The pool only holds random corpus threats, so only plain random batches
+// (?count and ?mode=random, nothing else) can be served from it
+function isPooledBatch(params) {
+  for (const key of params.keys()) {
+    if (key !== 'count' && key !== 'mode') return false;
+  }
+  return (params.get('mode') ?? 'random') === 'random';
+}
+
+async function threatBatch(event, request) {
+  // Cache-first while the pool is fresh; refill it in the background
+  const params = new URL(request.url).searchParams;
+  const count = Math.max(1, Number(params.get('count')) || 10);
+  if (isPooledBatch(params) && count <= THREAT_POOL_SIZE) {
+    let batch = await takeThreats(count);
+    if (!batch) {
+      batch = await refillThreatPool()
+        .then(() => takeThreats(count))
+        .catch(() => null);
+    }
+    if (batch) {
+      const { remaining, ...data } = batch;
+      if (remaining < THREAT_POOL_SIZE / 2) {
+        event.waitUntil(refillThreatPool().catch(() => {}));
+      }
+      return jsonResponse(data);
+    }
+  }
+  try {
+    return await fetch(request);
+  } catch (error) {
+    return offlineThreatBatch(request);
+  }
+}
+
+async function offlineThreatBatch(request) {
+  const cache = await caches.open(THREAT_CACHE);
+  const cached = await cache.match(THREAT_BATCH_KEY);
+  if (!cached) {
+    return jsonResponse({ error: 'Offline and no threats cached' }, 503);
+  }
+  const { next, ...data } = await cached.json();
+  const count = Number(new URL(request.url).searchParams.get('count')) || 10;
+  // Shuffle so repeated offline batches don't replay the same order
+  const pool = data.threats.slice();
+  for (let i = pool.length - 1; i > 0; i--) {
+    const j = Math.floor(Math.random() * (i + 1));
+    [pool[i], pool[j]] = [pool[j], pool[i]];
+  }
+  return jsonResponse({ ...data, threats: pool.slice(0, count), offline: true });
+}
+
+function jsonResponse(body, status = 200) {
+  return new Response(JSON.stringify(body), {
+    status,
+    headers: { 'Content-Type': 'application/json' },
+  });
+}
@@ -2,15 +2,23 @@
 """
 hello world app - Quick Test Runner
 Fast development testing for immediate feedback
+
+Endpoint checks go through the shared transport (tests/transport.py) and run
+concurrently; repeat --base-url to smoke-test several nodes at once:
+
+    python3 tests/quick_test.py --base-url http://node1:5000 --base-url http://node2:5000
+    python3 tests/quick_test.py --in-process
 """
 
+import argparse
 import sys
 import os
-import requests
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from transport import fan_out, make_transports
+
 def quick_backend_test():
     """Test core backend functions"""
     try:
@@ -25,62 +33,65 @@ def quick_backend_test():
         print(f"❌ Backend test failed: {e}")
         return False
 
-def quick_api_test():
+def check_paths(transports, paths, workers):
+    """GET every path on every node concurrently; True if all returned 200"""
+    label = len(transports) > 1
+    all_ok = True
+    for result in fan_out(((transport, path) for transport in transports for path in paths), workers):
+        target = f"{result.transport.name} {result.path}" if label else result.path
+        if result.error:
+            print(f"❌ {target} (error: {result.error})")
+            all_ok = False
+        elif result.response.status_code != 200:
+            print(f"❌ {target} (status: {result.response.status_code})")
+            all_ok = False
+        else:
+            print(f"✅ {target} ({result.elapsed_ms:.0f} ms)")
+    return all_ok
+
+def quick_api_test(transports, workers=32):
     """Test core API endpoints"""
-    base_url = "http://localhost:5000"
-    
     endpoints = [
         "/health",
+        "/health/ready",
+        "/api/threat",
         # Add your core endpoints here
     ]
     
-    for endpoint in endpoints:
-        try:
-            response = requests.get(f"{base_url}{endpoint}", timeout=5)
-            if response.status_code == 200:
-                print(f"✅ {endpoint}")
-            else:
-                print(f"❌ {endpoint} (status: {response.status_code})")
-                return False
-        except Exception as e:
-            print(f"❌ {endpoint} (error: {e})")
-            return False
-    
-    return True
+    return check_paths(transports, endpoints, workers)
 
-def quick_frontend_test():
+def quick_frontend_test(transports, workers=32):
     """Test core frontend pages"""
-    base_url = "http://localhost:5000"
-    
     pages = [
         "/",
         # Add your core pages here
     ]
     
-    for page in pages:
-        try:
-            response = requests.get(f"{base_url}{page}", timeout=5)
-            if response.status_code == 200:
-                print(f"✅ {page}")
-            else:
-                print(f"❌ {page} (status: {response.status_code})")
-                return False
-        except Exception as e:
-            print(f"❌ {page} (error: {e})")
-            return False
-    
-    return True
+    return check_paths(transports, pages, workers)
 
 def main():
     """Run quick tests"""
+    parser = argparse.ArgumentParser(description="hello world app quick smoke tests")
+    parser.add_argument("--base-url", action="append",
+                        help="Node to test; repeat for several (default: TEST_BASE_URL, then "
+                             ".env_port, then http://localhost:5000)")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Use the Flask test client instead of a running server")
+    parser.add_argument("--workers", type=int, default=32,
+                        help="Concurrent requests across all nodes")
+    args = parser.parse_args()
+    
+    transports = make_transports(args.base_url or (), in_process=args.in_process)
+    
     print("🏃‍♂️ QUICK TEST RUNNER")
     print("========================================")
+    print(f"Target: {', '.join(transport.name for transport in transports)}")
     print()
     
     tests = [
         ("🔬 Testing Backend Functions...", quick_backend_test),
-        ("🌐 Testing API Endpoints...", quick_api_test),
-        ("🖥️ Testing Frontend Pages...", quick_frontend_test),
+        ("🌐 Testing API Endpoints...", lambda: quick_api_test(transports, args.workers)),
+        ("🖥️ Testing Frontend Pages...", lambda: quick_frontend_test(transports, args.workers)),
     ]
     
     all_passed = True
@@ -91,6 +102,9 @@ def main():
             all_passed = False
         print()
     
+    for transport in transports:
+        transport.close()
+    
     if all_passed:
         print("🎉 ALL QUICK TESTS PASSED!")
     else:
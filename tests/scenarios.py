@@ -0,0 +1,298 @@
+"""
+hello world app - Test Scenarios
+Multi-step backend checks for test_suite.py
+
+Phase 1 entries call a module function and check its result with one
+assertion expression per line. Checks that need setup (temp files, a
+local server, patched functions) live here as plain functions instead:
+each one drives the scenario, cleans up after itself and returns a dict
+of what it observed, which the suite's assertions then check one fact at
+a time.
+"""
+
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "modules"))
+
+from werkzeug.test import Client
+
+from modules import capture, corpusmap, generator, memory, replay, sharedstats, utils
+from modules.core import CorpusSnapshot
+from modules.generator import MarkovModel
+
+# Run in a fresh interpreter (from the project root) by app_import_state:
+# prints what importing the app left loaded
+_IMPORT_STATE_PROBE = """
+import json
+import hello_world_app, generator
+print(json.dumps({"corpus_source": hello_world_app.corpus_source,
+                  "model_built": generator.cached_model() is not None,
+                  "readiness": hello_world_app.readiness.state}))
+"""
+
+def app_import_state() -> Dict[str, Any]:
+    """
+    Import the app in a fresh interpreter and report what it set up
+
+    The child gets its own shared stats segment, removed afterwards.
+
+    Returns:
+        Dict with the child's exit code and, if it succeeded, the corpus
+        source, whether the generator model was built and the readiness state
+    """
+    fd, stats_path = tempfile.mkstemp(prefix="test_suite-import-", suffix=".stats")
+    os.close(fd)
+    try:
+        child = subprocess.run([sys.executable, "-c", _IMPORT_STATE_PROBE], cwd=PROJECT_ROOT,
+                               env={**os.environ, "APP_SHARED_STATS_PATH": stats_path},
+                               capture_output=True, text=True)
+    finally:
+        os.remove(stats_path)
+    observed: Dict[str, Any] = {"returncode": child.returncode}
+    if child.returncode == 0:
+        observed.update(json.loads(child.stdout.strip().splitlines()[-1]))
+    return observed
+
+def memory_guard_eviction_order() -> Dict[str, Any]:
+    """
+    Drive MemoryGuard.check with scripted RSS readings
+
+    rss_bytes is patched for the duration (run this serially) and the
+    guard's recycle messages are captured rather than printed. Two more
+    guards, whose on_recycle fails, check that a failed recycle is retried
+    only once its backoff has passed.
+
+    Returns:
+        Dict with the result of each check, the caches dropped, the recycles
+        requested and the attempts made by the failing guards
+    """
+    dropped = []
+    registry = memory.CacheRegistry()
+    registry.register("cheap", lambda: [], lambda: dropped.append("cheap"))
+    registry.register("report_only", lambda: [])
+    registry.register("busy", lambda: [], lambda: False)
+    registry.register("medium", lambda: [], lambda: dropped.append("medium"))
+    registry.register("costly", lambda: [], lambda: dropped.append("costly"))
+    guard = memory.MemoryGuard(registry, budget_bytes=1000, evict_at=0.85)
+    recycled = []
+    guard.on_recycle = recycled.append
+
+    real_rss_bytes = memory.rss_bytes
+    output = io.StringIO()
+    observed: Dict[str, Any] = {}
+    try:
+        with contextlib.redirect_stdout(output):
+            memory.rss_bytes = lambda: 800
+            observed["below_threshold"] = guard.check()
+            readings = iter([950, 900, 800])
+            memory.rss_bytes = lambda: next(readings)
+            observed["partial"] = guard.check()
+            observed["dropped_partial"] = list(dropped)
+            observed["recycled_partial"] = list(recycled)
+            readings = iter([1200, 1150, 1100, 1050])
+            observed["over_budget"] = guard.check()
+            guard.recycle("again")
+
+            attempts = {0: [], 3600: []}
+            for retry, attempted in attempts.items():
+                failing = memory.MemoryGuard(registry, recycle_retry=retry)
+                failing.on_recycle = lambda reason, attempted=attempted: attempted.append(reason) or False
+                failing.recycle("first")
+                failing.recycle("second")
+                observed[f"failed_reason_{retry}"] = failing.recycle_reason
+    finally:
+        memory.rss_bytes = real_rss_bytes
+    observed.update(dropped=dropped, recycled=recycled, recycle_reason=guard.recycle_reason,
+                    retried=attempts[0], backed_off=attempts[3600], output=output.getvalue())
+    return observed
+
+def shared_stats_counters() -> Dict[str, Any]:
+    """
+    Count into a private shared stats segment and read it back twice
+
+    Returns:
+        Dict with both snapshots and how many slot liveness checks (kill(0)
+        plus /proc read) the second one made
+    """
+    path = os.path.join(tempfile.gettempdir(), f"test_suite-{os.getpid()}-{threading.get_ident()}.stats")
+    stats = sharedstats.open_shared_stats(path, "test_suite", 0)
+    try:
+        stats.incr("requests", 3)
+        first = stats.snapshot()
+        checks = []
+        slot_alive = stats._slot_alive
+        stats._slot_alive = lambda base: checks.append(base) or slot_alive(base)
+        second = stats.snapshot()
+    finally:
+        stats.close()
+        os.remove(path)
+    return {"first": first, "second": second, "liveness_checks": len(checks)}
+
+def snapshot_generator_model() -> Dict[str, Any]:
+    """
+    Build a snapshot, map it and compare its model with a freshly trained one
+
+    Returns:
+        Dict with the build info, whether seeded samples match, novelty
+        lookups and the model offered for another order
+    """
+    threats = ["You have failed me.", "You have failed me for the last time.",
+               "I find your lack of faith disturbing."]
+    fd, path = tempfile.mkstemp(prefix="test_suite-", suffix=".vtcs")
+    os.close(fd)
+    try:
+        info = corpusmap.build_snapshot(threats, path)
+        mapped = corpusmap.MappedThreats(path)
+        model = mapped.markov_model(1)
+        trained = MarkovModel.train(threats, 1)
+        return {
+            "info": info,
+            "mapped_samples": [model.generate(random.Random(seed)) for seed in range(50)],
+            "trained_samples": [trained.generate(random.Random(seed)) for seed in range(50)],
+            "original_found": "You  have failed me." in model.originals,
+            "novel_found": "You have failed." in model.originals,
+            "other_order": mapped.markov_model(2),
+        }
+    finally:
+        os.remove(path)
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    """Answers every GET with an empty 200 after 50 ms"""
+
+    def do_GET(self):
+        time.sleep(0.05)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+def replay_coordinated_omission() -> Dict[str, Any]:
+    """
+    Replay six requests 10 ms apart, one at a time, against a 50 ms server
+
+    Each request queues behind the previous one, so latency measured from
+    the schedule should grow while the service time stays near 50 ms.
+
+    Returns:
+        The replay() report
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    records = [{"m": "GET", "p": "/", "t": 1000.0 + 10 * i, "s": 200} for i in range(6)]
+    try:
+        return replay.replay(records, f"http://127.0.0.1:{server.server_port}", speed=1.0, concurrency=1)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def generator_background_retrain() -> Dict[str, Any]:
+    """
+    Ask for the model of a changed corpus and wait for its background retrain
+
+    Uses its own snapshots rather than swapping the served corpus, but it
+    replaces the process-wide model (run this serially); the model is
+    dropped again at the end.
+
+    Returns:
+        Dict with the versions served before, during and after the retrain
+    """
+    old = CorpusSnapshot("0000000000000001", ("You have failed me.", "I find your lack of faith disturbing."))
+    new = CorpusSnapshot("0000000000000002", old.threats + ("Do not underestimate the Force.",))
+    try:
+        generator.clear_model()
+        before = generator.get_model(1, old)
+        during = generator.get_model(1, new)
+        deadline = time.monotonic() + 5
+        while generator.cached_model().version != new.version and time.monotonic() < deadline:
+            time.sleep(0.01)
+        after = generator.get_model(1, new)
+        return {"before": before.version, "during": during.version, "after": after.version,
+                "words": after.words}
+    finally:
+        generator.clear_model()
+
+def _ok_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [b"ok"]
+
+def capture_sampling_rotation() -> Dict[str, Any]:
+    """
+    Drive TrafficCapture sampling, skipping and rotation
+
+    30 sampled requests (plus 30 skipped ones) are flushed five at a time
+    into a 300-byte file, so every flush rotates and only the newest
+    max_files=2 archives survive. Sampling is then counted at rates 0 and
+    0.5 over 200 requests.
+
+    Returns:
+        Dict with the archives kept, the records read back from them and
+        the number of requests sampled per rate
+    """
+    directory = tempfile.mkdtemp(prefix="test_suite-capture-")
+    recorder = capture.TrafficCapture(_ok_app, directory, sample_rate=1.0, headers=["Accept"],
+                                      max_bytes=300, max_files=2, flush_interval=3600,
+                                      skip=lambda environ: environ.get("PATH_INFO") == "/skip")
+    client = Client(recorder)
+    try:
+        for i in range(30):
+            client.get(f"/api/threat?i={i}", headers={"Accept": "application/json", "Cookie": "secret"},
+                       buffered=True)
+            client.get("/skip", buffered=True)
+            if i % 5 == 4:
+                recorder.flush()
+        archives = sorted(name for name in os.listdir(directory) if name.endswith(".ndjson.gz"))
+        records = capture.load_captures([directory])
+    finally:
+        recorder.stop()
+        shutil.rmtree(directory)
+
+    sampled = {}
+    for rate in (0.0, 0.5):
+        sampler = capture.TrafficCapture(_ok_app, directory, sample_rate=rate, flush_interval=3600)
+        client = Client(sampler)
+        for _ in range(200):
+            client.get("/api/threat", buffered=True)
+        sampled[rate] = len(sampler.buffer)
+        sampler.buffer.clear()
+        sampler.stop()
+    return {"archives": archives, "records": records, "sampled": sampled}
+
+def sanitize_filename_cases() -> Dict[str, Any]:
+    """
+    Run sanitize_filename over truncation and Windows-name edge cases
+
+    Returns:
+        Dict of case name to the sanitized name, or the exception type
+        name if the call raised
+    """
+    cases = {
+        "reserved_truncated": ("CONSOLE.txt", True, 3),
+        "trailing_dot_space": ("abc. xyz", True, 4),
+        "trailing_space": ("ab cdef", True, 3),
+        "keeps_extension": ("report.final.txt", False, 10),
+        "reserved_device": ("lpt1.log", True),
+        "zero_length": ("name", True, 0),
+    }
+    results = {}
+    for name, args in cases.items():
+        try:
+            results[name] = utils.sanitize_filename(*args)
+        except Exception as e:
+            results[name] = type(e).__name__
+    return results
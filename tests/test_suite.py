@@ -6,13 +6,35 @@ Template for 4-phase testing methodology
 
 import sys
 import os
+import argparse
 import requests
 import json
+import signal
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Tuple, Any
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Any
 
-# Add project root to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from transport import HTTPTransport, WSGITransport
+
+# Add project root and modules directory to path (modules import each other by name)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "modules"))
+
+# Assertion strings compiled once per process, shared by every run and worker
+_compiled_assertions: Dict[str, Any] = {}
+
+def compile_assertion(assertion: str):
+    """Compile an assertion string once and reuse the code object"""
+    code = _compiled_assertions.get(assertion)
+    if code is None:
+        code = _compiled_assertions[assertion] = compile(assertion, "<assertion>", "exec")
+    return code
 
 class TestSuite:
     """
@@ -24,15 +46,31 @@ class TestSuite:
     
     Note: Utility functions (format_response, sanitize_filename, etc.) 
     are automatically excluded from mandatory testing requirements.
+    
+    Endpoint phases go through a shared transport (tests/transport.py): pooled
+    keep-alive connections to base_url (default: from .env_port), or with
+    in_process=True the Flask test client (no server needed). workers > 1 runs
+    the phases and their independent tests concurrently on a thread pool.
+    
+    restart=True adds Phase 4, which starts its own server and checks that a
+    rolling restart under load completes with zero failed requests.
     """
     
-    def __init__(self, base_url: str = "http://localhost:5000"):
-        self.base_url = base_url
+    def __init__(self, base_url: Optional[str] = None,
+                 in_process: bool = False, workers: int = 1, restart: bool = False):
+        self.in_process = in_process
+        self.workers = workers
+        self.restart = restart
+        self.transport = WSGITransport() if in_process else HTTPTransport(base_url, pool_size=max(1, workers))
+        self._executor = None
+        # Log lines of the test or phase running on this thread (None = print directly)
+        self._log_state = threading.local()
         self.results = {
             "phase_1_backend": {},
             "phase_2_api": {},
             "phase_2_5_contracts": {},
             "phase_3_frontend": {},
+            **({"phase_4_restart": {}} if restart else {}),
             "summary": {"total_tests": 0, "passed": 0, "failed": 0, "errors": []}
         }
     
@@ -40,7 +78,40 @@ class TestSuite:
         """Log test message with timestamp"""
         timestamp = datetime.now().strftime('%H:%M:%S')
         icon = {"TEST": "🧪", "INFO": "ℹ️", "PASS": "✅", "FAIL": "❌", "WARN": "⚠️"}
-        print(f"{icon.get(level, 'ℹ️')} [{timestamp}] {message}")
+        self._emit([f"{icon.get(level, 'ℹ️')} [{timestamp}] {message}"])
+    
+    def _emit(self, lines: List[str]):
+        """Print lines, or hold them for in-order output if this thread is buffering"""
+        buffer = getattr(self._log_state, "lines", None)
+        if buffer is not None:
+            buffer.extend(lines)
+        else:
+            for line in lines:
+                print(line)
+    
+    def _buffered(self, func: Callable, *args) -> List[str]:
+        """Run func collecting its log lines instead of printing them; returns the lines"""
+        outer = getattr(self._log_state, "lines", None)
+        self._log_state.lines = lines = []
+        try:
+            func(*args)
+        finally:
+            self._log_state.lines = outer
+        return lines
+    
+    def _get(self, path: str):
+        """GET a path through the suite's transport (live server or in-process app)"""
+        return self.transport.get(path)
+    
+    def _run_each(self, run_test: Callable, tests: Iterable[Tuple]):
+        """Run independent tests, on the worker pool when one is active"""
+        if self._executor is None:
+            for test in tests:
+                run_test(*test)
+        else:
+            # Concurrent tests log into their own buffers, emitted in test order
+            for lines in self._executor.map(lambda test: self._buffered(run_test, *test), list(tests)):
+                self._emit(lines)
     
     def phase_1_backend_tests(self):
         """Phase 1: Test all backend functions directly"""
@@ -54,6 +125,7 @@ class TestSuite:
                 "module": "modules.core",
                 "function": "get_random_threat",
                 "assertions": [
+                    "assert 'threat_id' in result",
                     "assert 'threat' in result",
                     "assert 'source' in result",
                     "assert result['source'] == 'Darth Vader'",
@@ -74,21 +146,335 @@ class TestSuite:
                     "assert result >= 10"  # We have 15 threats
                 ]
             },
+            "threat_lookup": {
+                "description": "Test threat lookup by id",
+                "module": "modules.core",
+                "function": "get_threat",
+                "args": [0],
+                "assertions": [
+                    "assert isinstance(result, str)",
+                    "assert len(result) > 0"
+                ]
+            },
+            "corpus_listing": {
+                "description": "Test cursor-paginated corpus listing",
+                "module": "modules.core",
+                "function": "list_threats",
+                "args": [None, 5],
+                "assertions": [
+                    "assert len(result['threats']) == 5",
+                    "assert result['threats'][0]['threat_id'] == 0",
+                    "assert result['next_cursor'] is not None",
+                    "assert result['total'] >= 10",
+                    "assert 'corpus_version' in result"
+                ]
+            },
+            "versioned_threat_lookup": {
+                "description": "Test threat ids resolve against the corpus version they came from",
+                "module": "modules.core",
+                "function": "get_random_threat",
+                "args": [],
+                "assertions": [
+                    "assert module.get_threat_at(result['corpus_version'], result['threat_id']) == result['threat']",
+                    "assert module.get_threat_at('retired', result['threat_id']) == ''",
+                    "assert module.get_threat_at(result['corpus_version'], -1) == ''"
+                ]
+            },
+            "batch_validation": {
+                "description": "Test batch input validation",
+                "module": "modules.core",
+                "function": "validate_many",
+                "args": [["ok", "", None, "   ", 42]],
+                "assertions": [
+                    "assert list(result['mask']) == [True, False, False, False, True]",
+                    "assert result['valid_count'] == 2",
+                    "assert result['invalid_count'] == 3",
+                    "assert result['reasons'] == {'none': 1, 'blank_string': 2}"
+                ]
+            },
+            "config_snapshot": {
+                "description": "Test layered config snapshot",
+                "module": "modules.config",
+                "function": "get_config",
+                "assertions": [
+                    "assert result.service_name == result['service_name']",
+                    "assert 'port' in result",
+                    "assert result.version >= 1"
+                ]
+            },
+            "recent_traces": {
+                "description": "Test trace ring buffer listing",
+                "module": "modules.tracing",
+                "function": "get_recent_traces",
+                "args": [5],
+                "assertions": [
+                    "assert isinstance(result, list)",
+                    "assert len(result) <= 5"
+                ]
+            },
+            "sampling_profile": {
+                "description": "Test on-demand sampling profiler",
+                "module": "modules.profiling",
+                "function": "profile_for",
+                "args": [0.05, 0.005, True],
+                "assertions": [
+                    "assert result['samples'] > 0",
+                    "assert isinstance(result['collapsed'], str)",
+                    "assert result['duration'] >= 0.05"
+                ]
+            },
+            "delivery_stats": {
+                "description": "Test stats computed from compacted aggregates",
+                "module": "modules.analytics",
+                "function": "compute_stats",
+                "args": [{"total": 8, "counts": {"00000000000000a1": 3, "00000000000000b2": 5},
+                          "minutes": {"100": {"00000000000000a1": 3}, "200": {"00000000000000b2": 5}},
+                          "minute_clients": {"100": [9, 11], "200": [9]},
+                          "names": {"00000000000000a1": "Obey.", "00000000000000b2": "Kneel."},
+                          "compacted_at": None}, 1],
+                "assertions": [
+                    "assert result['total_deliveries'] == 8",
+                    "assert result['top'] == [{'threat_key': '00000000000000b2', 'threat': 'Kneel.', 'count': 5}]",
+                    "assert result['unique_clients'] == 2"
+                ]
+            },
+            "delivery_stats_window": {
+                "description": "Test windowed stats count only the window's deliveries and clients",
+                "module": "modules.analytics",
+                "function": "compute_stats",
+                "args": [{"total": 8, "counts": {"00000000000000a1": 3, "00000000000000b2": 5},
+                          "minutes": {"100": {"00000000000000a1": 3}, "200": {"00000000000000b2": 5}},
+                          "minute_clients": {"100": [9, 11], "200": [9]},
+                          "names": {"00000000000000a1": "Obey.", "00000000000000b2": "Kneel."},
+                          "compacted_at": None}, 10, 60, 200 * 60 + 30],
+                "assertions": [
+                    "assert result['total_deliveries'] == 5",
+                    "assert list(result['counts']) == ['00000000000000b2']",
+                    "assert result['unique_clients'] == 1"
+                ]
+            },
+            "import_merge": {
+                "description": "Test import validation and deduplication",
+                "module": "modules.importer",
+                "function": "merge_threats",
+                "args": [["Your defiance will be your downfall."],
+                         ["your  defiance will be your downfall.", "A brand new threat.", "", None, 5]],
+                "assertions": [
+                    "assert result['added'] == ['A brand new threat.']",
+                    "assert result['stats']['received'] == 5",
+                    "assert result['stats']['duplicates'] == 1",
+                    "assert result['stats']['invalid'] == 3",
+                    "assert result['stats']['reasons'] == {'not_text': 1, 'none': 1, 'blank_string': 1}"
+                ]
+            },
+            "generated_threat": {
+                "description": "Test n-gram threat synthesis",
+                "module": "modules.generator",
+                "function": "get_generated_threat",
+                "assertions": [
+                    "assert result['mode'] == 'generated'",
+                    "assert isinstance(result['threat'], str) and result['threat']",
+                    "assert result['threat_id'] is None"
+                ]
+            },
+            "snapshot_generator_model": {
+                "description": "Test corpus snapshots carry the compiled generator model",
+                "module": "scenarios",
+                "function": "snapshot_generator_model",
+                "assertions": [
+                    "assert result['info']['model_order'] == 1",
+                    "assert result['mapped_samples'] == result['trained_samples']",
+                    "assert result['original_found']",
+                    "assert not result['novel_found']",
+                    "assert result['other_order'] is None"
+                ]
+            },
+            "bulk_render_csv": {
+                "description": "Test bulk fixture serialization",
+                "module": "modules.bulkgen",
+                "function": "render_lines",
+                "args": [[(0, 'Kneel, "rebel".'), (None, "Obey.")], "csv"],
+                "assertions": [
+                    "assert result == ['0,\"Kneel, \"\"rebel\"\".\"\\n', ',Obey.\\n']"
+                ]
+            },
+            "shared_stats": {
+                "description": "Test shared-memory cross-worker counters and cached worker liveness",
+                "module": "scenarios",
+                "function": "shared_stats_counters",
+                "assertions": [
+                    "assert result['first']['totals']['requests'] == 3",
+                    "assert result['first']['workers'] == 1",
+                    "assert result['second'] == result['first']",
+                    "assert result['liveness_checks'] == 0"
+                ]
+            },
+            "threat_search": {
+                "description": "Test corpus search over word postings",
+                "module": "modules.core",
+                "function": "search_threats",
+                "args": ["dark side"],
+                "assertions": [
+                    "assert result['total'] >= 2",
+                    "assert all('dark side' in m['threat'].lower() for m in result['matches'])"
+                ]
+            },
+            "near_duplicates": {
+                "description": "Test MinHash/LSH near-duplicate clustering",
+                "module": "modules.dedupe",
+                "function": "find_near_duplicates",
+                "args": [["The dark side is stronger than you know, young one.",
+                          "Your defiance will be your downfall.",
+                          "The dark side is stronger than you know, young one!",
+                          "the dark side is STRONGER than you know young one"]],
+                "assertions": [
+                    "assert result == [[0, 2, 3]]"
+                ]
+            },
+            "near_duplicates_no_shingles": {
+                "description": "Test punctuation-only texts are not clustered as near-duplicates",
+                "module": "modules.dedupe",
+                "function": "find_near_duplicates",
+                "args": [["!!!", "???", "...", "", "Obey me.", "Obey me!"]],
+                "assertions": [
+                    "assert result == [[4, 5]]"
+                ]
+            },
+            "warmup_readiness": {
+                "description": "Test warmup step timing and readiness gating",
+                "module": "modules.readiness",
+                "function": "warmup_report",
+                "args": [[("noop", lambda: None), ("fails", lambda: 1 / 0)]],
+                "assertions": [
+                    "assert result['ready'] is False and result['state'] == 'failed'",
+                    "assert result['warmup']['steps']['noop']['ok'] is True",
+                    "assert 'ZeroDivisionError' in result['warmup']['steps']['fails']['error']"
+                ]
+            },
+            "replay_schedule": {
+                "description": "Test replay scheduling of captured arrivals at 2x speed",
+                "module": "modules.replay",
+                "function": "schedule",
+                "args": [[{"t": 1000.0, "p": "/"}, {"t": 2000.0, "p": "/api/threat"},
+                          {"t": 4000.0, "p": "/"}], 2.0],
+                "assertions": [
+                    "assert result == [0.0, 0.5, 1.5]"
+                ]
+            },
+            "replay_latency_summary": {
+                "description": "Test replay latency percentiles",
+                "module": "modules.replay",
+                "function": "latency_summary",
+                "args": [[float(ms) for ms in range(100, 0, -1)]],
+                "assertions": [
+                    "assert result['count'] == 100 and result['mean'] == 50.5",
+                    "assert (result['p50'], result['p90'], result['p99'], result['max']) == (50.0, 90.0, 99.0, 100.0)"
+                ]
+            },
+            "replay_coordinated_omission": {
+                "description": "Test replay latency counts time queued behind a slow server",
+                "module": "scenarios",
+                "function": "replay_coordinated_omission",
+                "assertions": [
+                    "assert result['errors'] == 0",
+                    "assert result['service_ms']['max'] < 150",
+                    "assert result['overall']['max'] > result['service_ms']['max'] + 100",
+                    "assert result['schedule_lag_ms']['max'] > 100"
+                ]
+            },
+            "capture_sampling_rotation": {
+                "description": "Test traffic capture sampling, skipping and file rotation",
+                "module": "scenarios",
+                "function": "capture_sampling_rotation",
+                "assertions": [
+                    "assert len(result['archives']) == 2",
+                    "assert [record['q'] for record in result['records']] == [f'i={i}' for i in range(20, 30)]",
+                    "assert all(record['p'] == '/api/threat' and record['s'] == 200 for record in result['records'])",
+                    "assert result['records'][-1]['h'] == {'Accept': 'application/json'}",
+                    "assert result['sampled'][0.0] == 0",
+                    "assert 60 <= result['sampled'][0.5] <= 140"
+                ]
+            },
+            "sanitize_filename_policy": {
+                "description": "Test Windows filename rules hold after truncation",
+                "module": "scenarios",
+                "function": "sanitize_filename_cases",
+                "assertions": [
+                    "assert result['reserved_truncated'] == '_CO'",
+                    "assert result['trailing_dot_space'] == 'abc'",
+                    "assert result['trailing_space'] == 'ab'",
+                    "assert result['keeps_extension'] == 'report.txt'",
+                    "assert result['reserved_device'] == '_lpt1.log'",
+                    "assert result['zero_length'] == 'ValueError'"
+                ]
+            },
+            "import_is_cheap": {
+                "description": "Test importing the app leaves corpus loading and the model to warmup",
+                "module": "scenarios",
+                "function": "app_import_state",
+                "assertions": [
+                    "assert result['returncode'] == 0",
+                    "assert result['corpus_source'] is None",
+                    "assert result['model_built'] is False",
+                    "assert result['readiness'] == 'starting'"
+                ]
+            },
+            "memory_deep_sizeof": {
+                "description": "Test cache size accounting counts shared objects once",
+                "module": "modules.memory",
+                "function": "deep_sizeof",
+                "args": [{"shared": ["x" * 1000] * 3}],
+                "assertions": [
+                    "assert 1000 < result < 1500"
+                ]
+            },
+            "memory_guard_eviction_order": {
+                "description": "Test the memory guard evicts cheapest-first, stops once under, then recycles with backoff",
+                "module": "scenarios",
+                "function": "memory_guard_eviction_order",
+                "serial": True,  # patches memory.rss_bytes
+                "assertions": [
+                    "assert result['below_threshold'] == {'rss_bytes': 800, 'evicted': []}",
+                    "assert result['partial'] == {'rss_bytes': 800, 'evicted': ['cheap', 'medium']}",
+                    "assert result['dropped_partial'] == ['cheap', 'medium']",
+                    "assert result['recycled_partial'] == []",
+                    "assert result['over_budget']['evicted'] == ['cheap', 'medium', 'costly']",
+                    "assert len(result['recycled']) == 1",
+                    "assert result['recycle_reason'] == result['recycled'][0]",
+                    "assert result['retried'] == ['first', 'second']",
+                    "assert result['backed_off'] == ['first']",
+                    "assert result['failed_reason_0'] is None",
+                    "assert 'retrying in' in result['output']",
+                    "assert 'Recycling worker' in result['output']"
+                ]
+            },
+            "generator_background_retrain": {
+                "description": "Test the generator serves the previous model while a changed corpus retrains",
+                "module": "scenarios",
+                "function": "generator_background_retrain",
+                "serial": True,  # replaces the process-wide model
+                "assertions": [
+                    "assert result['before'] == '0000000000000001'",
+                    "assert result['during'] == '0000000000000001'",
+                    "assert result['after'] == '0000000000000002'",
+                    "assert 'Force.' in result['words']"
+                ]
+            },
             # Add more backend tests here
         }
         
-        for test_name, test_config in backend_tests.items():
+        def run_test(test_name, test_config):
             self.log(f"Testing {test_config['description']}...")
             
             try:
                 # Dynamic import and execution
                 module = __import__(test_config['module'], fromlist=[test_config['function']])
                 func = getattr(module, test_config['function'])
-                result = func()
+                result = func(*test_config.get('args', []))
                 
-                # Run assertions
+                # Run assertions (compiled once, executed against this result)
                 for assertion in test_config['assertions']:
-                    exec(assertion)
+                    exec(compile_assertion(assertion), {"result": result, "module": module})
                 
                 self.results["phase_1_backend"][test_name] = {
                     "success": True,
@@ -104,6 +490,17 @@ class TestSuite:
                     "error": str(e)
                 }
                 self.log(f"❌ {test_name}: FAILED - {e}", "FAIL")
+        
+        # Import test modules up front: concurrent first imports can see half-initialized modules
+        for test_config in backend_tests.values():
+            __import__(test_config['module'])
+        
+        # Serial tests patch shared state, so they run alone after the rest
+        self._run_each(run_test, [(name, config) for name, config in backend_tests.items()
+                                  if not config.get("serial")])
+        for name, config in backend_tests.items():
+            if config.get("serial"):
+                run_test(name, config)
     
     def phase_2_api_tests(self):
         """Phase 2: Test all API endpoints"""
@@ -113,24 +510,72 @@ class TestSuite:
         api_tests = {
             "health_endpoint": {
                 "endpoint": "/health",
-                "expected_fields": ["status", "service", "timestamp"]
+                "expected_fields": ["status", "service", "timestamp", "cluster"]
+            },
+            "liveness_endpoint": {
+                "endpoint": "/health/live",
+                "expected_fields": ["status", "pid", "uptime_seconds", "service"]
+            },
+            "readiness_endpoint": {
+                "endpoint": "/health/ready",
+                "expected_fields": ["ready", "state", "warmup", "dependencies", "service"]
             },
             "threat_endpoint": {
                 "endpoint": "/api/threat",
-                "expected_fields": ["threat", "source", "empire", "threat_level", "timestamp"]
+                "expected_fields": ["threat_id", "threat", "source", "empire", "threat_level", "corpus_version", "timestamp"]
+            },
+            "generated_threat_endpoint": {
+                "endpoint": "/api/threat?mode=generated",
+                "expected_fields": ["threat", "source", "mode", "corpus_version", "timestamp"]
+            },
+            "threat_batch_endpoint": {
+                "endpoint": "/api/threats/batch?count=5",
+                "expected_fields": ["threats", "total_threats", "service"]
             },
             "threat_count_endpoint": {
                 "endpoint": "/api/threat/count",
-                "expected_fields": ["total_threats", "service"]
+                "expected_fields": ["total_threats", "cluster", "service"]
+            },
+            "threat_stats_endpoint": {
+                "endpoint": "/api/threat/stats",
+                "expected_fields": ["total_deliveries", "top", "counts", "unique_clients", "service"]
+            },
+            "threats_listing_endpoint": {
+                "endpoint": "/api/threats/all?limit=5",
+                "expected_fields": ["threats", "next_cursor", "corpus_version", "total", "service"]
+            },
+            "import_jobs_endpoint": {
+                "endpoint": "/api/admin/import",
+                "expected_fields": ["jobs", "service"]
+            },
+            "search_endpoint": {
+                "endpoint": "/api/threats/search?q=rebel",
+                "expected_fields": ["query", "matches", "total", "corpus_version", "service"]
+            },
+            "duplicates_endpoint": {
+                "endpoint": "/api/threats/duplicates?limit=5&wait=10",
+                "expected_fields": ["threshold", "clusters_found", "redundant_threats", "clusters", "service"]
+            },
+            "traces_endpoint": {
+                "endpoint": "/debug/traces",
+                "expected_fields": ["sample_rate", "buffered", "traces"]
+            },
+            "profile_endpoint": {
+                "endpoint": "/debug/profile?seconds=0.1&format=json",
+                "expected_fields": ["collapsed", "samples", "stacks", "duration"]
+            },
+            "memory_endpoint": {
+                "endpoint": "/debug/memory",
+                "expected_fields": ["worker", "caches", "tracemalloc"]
             },
             # Add more API tests here
         }
         
-        for test_name, test_config in api_tests.items():
+        def run_test(test_name, test_config):
             self.log(f"Testing {test_config['endpoint']}...")
             
             try:
-                response = requests.get(f"{self.base_url}{test_config['endpoint']}", timeout=10)
+                response = self._get(test_config['endpoint'])
                 
                 if response.status_code != 200:
                     raise Exception(f"HTTP {response.status_code}")
@@ -162,6 +607,8 @@ class TestSuite:
                     "error": str(e)
                 }
                 self.log(f"❌ {test_config['endpoint']}: FAILED - {e}", "FAIL")
+        
+        self._run_each(run_test, api_tests.items())
     
     def phase_2_5_contract_validation(self):
         """Phase 2.5: Validate API-Frontend data contracts"""
@@ -184,6 +631,7 @@ class TestSuite:
             "threat_contract": {
                 "api_endpoint": "/api/threat",
                 "expected_structure": {
+                    "threat_id": "int",
                     "threat": "string",
                     "source": "string", 
                     "empire": "string",
@@ -195,6 +643,32 @@ class TestSuite:
                     "data.source"
                 ]
             },
+            "generated_threat_contract": {
+                "api_endpoint": "/api/threat?mode=generated",
+                "expected_structure": {
+                    "threat": "string",
+                    "source": "string",
+                    "mode": "string",
+                    "corpus_version": "string",
+                    "timestamp": "string"
+                },
+                "frontend_expectations": [
+                    "data.threat",
+                    "data.source"
+                ]
+            },
+            "threat_batch_contract": {
+                "api_endpoint": "/api/threats/batch?count=5",
+                "expected_structure": {
+                    "threats": "list",
+                    "total_threats": "int",
+                    "service": "string"
+                },
+                "frontend_expectations": [
+                    "data.threats",
+                    "data.total_threats"
+                ]
+            },
             "threat_count_contract": {
                 "api_endpoint": "/api/threat/count",
                 "expected_structure": {
@@ -205,14 +679,83 @@ class TestSuite:
                     "data.total_threats"
                 ]
             },
+            "threat_stats_contract": {
+                "api_endpoint": "/api/threat/stats",
+                "expected_structure": {
+                    "total_deliveries": "int",
+                    "top": "list",
+                    "counts": "dict",
+                    "unique_clients": "int",
+                    "service": "string"
+                },
+                "frontend_expectations": []
+            },
+            "threats_listing_contract": {
+                "api_endpoint": "/api/threats/all",
+                "expected_structure": {
+                    "threats": "list",
+                    "next_cursor": "string",
+                    "corpus_version": "string",
+                    "total": "int",
+                    "service": "string"
+                },
+                "frontend_expectations": []
+            },
+            "import_jobs_contract": {
+                "api_endpoint": "/api/admin/import",
+                "expected_structure": {
+                    "jobs": "list",
+                    "service": "string"
+                },
+                "frontend_expectations": []
+            },
+            "search_contract": {
+                "api_endpoint": "/api/threats/search?q=rebel",
+                "expected_structure": {
+                    "query": "string",
+                    "matches": "list",
+                    "total": "int",
+                    "service": "string"
+                },
+                "frontend_expectations": []
+            },
+            "duplicates_contract": {
+                "api_endpoint": "/api/threats/duplicates?wait=10",
+                "expected_structure": {
+                    "threshold": "float",
+                    "clusters_found": "int",
+                    "redundant_threats": "int",
+                    "clusters": "list",
+                    "service": "string"
+                },
+                "frontend_expectations": []
+            },
+            "traces_contract": {
+                "api_endpoint": "/debug/traces",
+                "expected_structure": {
+                    "sample_rate": "float",
+                    "buffered": "int",
+                    "traces": "list"
+                },
+                "frontend_expectations": []
+            },
+            "memory_contract": {
+                "api_endpoint": "/debug/memory",
+                "expected_structure": {
+                    "worker": "dict",
+                    "caches": "dict",
+                    "tracemalloc": "dict"
+                },
+                "frontend_expectations": []
+            },
             # Add more contract tests here
         }
         
-        for test_name, test_config in contract_tests.items():
+        def run_test(test_name, test_config):
             self.log(f"Validating {test_config['api_endpoint']} contract...")
             
             try:
-                response = requests.get(f"{self.base_url}{test_config['api_endpoint']}", timeout=10)
+                response = self._get(test_config['api_endpoint'])
                 data = response.json()
                 
                 # Validate structure
@@ -249,6 +792,8 @@ class TestSuite:
                     "error": str(e)
                 }
                 self.log(f"❌ {test_name}: CONTRACT ERROR - {e}", "FAIL")
+        
+        self._run_each(run_test, contract_tests.items())
     
     def phase_3_frontend_tests(self):
         """Phase 3: Test frontend functionality"""
@@ -261,10 +806,11 @@ class TestSuite:
             ("imperial_ui_elements", self._test_imperial_ui_elements),
             ("threat_display", self._test_threat_display),
             ("interactive_features", self._test_interactive_features),
+            ("service_worker", self._test_service_worker),
             # Add more frontend tests here
         ]
         
-        for test_name, test_func in frontend_tests:
+        def run_test(test_name, test_func):
             self.log(f"Testing {test_name}...")
             
             try:
@@ -288,11 +834,13 @@ class TestSuite:
                     "error": str(e)
                 }
                 self.log(f"❌ {test_name}: ERROR - {e}", "FAIL")
+        
+        self._run_each(run_test, frontend_tests)
     
     def _test_page_load(self) -> Tuple[bool, str]:
         """Test main page loading"""
         try:
-            response = requests.get(self.base_url, timeout=10)
+            response = self._get("/")
             if response.status_code == 200:
                 return True, "Main page loaded successfully"
             else:
@@ -303,7 +851,7 @@ class TestSuite:
     def _test_imperial_ui_elements(self) -> Tuple[bool, str]:
         """Test Imperial UI elements are present"""
         try:
-            response = requests.get(self.base_url, timeout=10)
+            response = self._get("/")
             if response.status_code != 200:
                 return False, f"HTTP {response.status_code}"
             
@@ -331,7 +879,7 @@ class TestSuite:
     def _test_threat_display(self) -> Tuple[bool, str]:
         """Test threat is displayed in UI"""
         try:
-            response = requests.get(self.base_url, timeout=10)
+            response = self._get("/")
             if response.status_code != 200:
                 return False, f"HTTP {response.status_code}"
             
@@ -353,7 +901,7 @@ class TestSuite:
         """Test interactive JavaScript features are included"""
         try:
             # Test if JavaScript file is accessible
-            js_response = requests.get(f"{self.base_url}/static/js/imperial.js", timeout=10)
+            js_response = self._get("/static/js/imperial.js")
             if js_response.status_code != 200:
                 return False, f"JavaScript file not accessible: HTTP {js_response.status_code}"
             
@@ -361,8 +909,10 @@ class TestSuite:
             required_js_features = [
                 'ImperialThreatGenerator',
                 'getNewThreat',
+                'refillBuffer',
                 'fetch',
-                '/api/threat'
+                '/api/threats/batch',
+                '/api/threats/shown'
             ]
             
             missing_features = []
@@ -377,6 +927,138 @@ class TestSuite:
         except Exception as e:
             return False, str(e)
     
+    def _test_service_worker(self) -> Tuple[bool, str]:
+        """Test the service worker is served at the root with a versioned cache"""
+        try:
+            response = self._get("/sw.js")
+            if response.status_code != 200:
+                return False, f"Service worker not accessible: HTTP {response.status_code}"
+            if response.headers.get("Service-Worker-Allowed") != "/":
+                return False, "Missing Service-Worker-Allowed: / header"
+            if "__APP_SHELL_VERSION__" in response.text or "staleWhileRevalidate" not in response.text:
+                return False, "Service worker cache version not filled in"
+            if "refillThreatPool" not in response.text:
+                return False, "Service worker does not serve threat batches from its pool"
+            return True, "Service worker served with versioned app shell cache"
+        except Exception as e:
+            return False, str(e)
+    
+    def phase_4_restart_tests(self):
+        """Phase 4 (opt-in): Rolling restart under load"""
+        self.log("\n🔄 PHASE 4: ROLLING RESTART UNDER LOAD", "TEST")
+        self.log("=" * 60)
+        self.log("Testing rolling_restart...")
+        try:
+            success, result = self._test_rolling_restart()
+            self.results["phase_4_restart"]["rolling_restart"] = {
+                "success": success,
+                "result": result,
+                "error": None if success else result
+            }
+            if success:
+                self.log(f"✅ rolling_restart: PASSED - {result}", "PASS")
+            else:
+                self.log(f"❌ rolling_restart: FAILED - {result}", "FAIL")
+        except Exception as e:
+            self.results["phase_4_restart"]["rolling_restart"] = {
+                "success": False,
+                "result": None,
+                "error": str(e)
+            }
+            self.log(f"❌ rolling_restart: ERROR - {e}", "FAIL")
+    
+    def _test_rolling_restart(self) -> Tuple[bool, str]:
+        """Drive load at a fresh server while it swaps itself out (SIGUSR2, as manage.sh restart does)"""
+        def wait_until(condition, timeout: float):
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                value = condition()
+                if value:
+                    return value
+                time.sleep(0.05)
+            return None
+        
+        def read_pid():
+            try:
+                with open(pid_file) as f:
+                    return int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                return 0
+        
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        base_url = f"http://127.0.0.1:{port}"
+        
+        with tempfile.TemporaryDirectory() as workdir:
+            pid_file = os.path.join(workdir, "app.pid")
+            env = {**os.environ, "PORT": str(port), "PID_FILE": pid_file}
+            with open(os.path.join(workdir, "app.log"), "w") as log:
+                server = subprocess.Popen([sys.executable, os.path.join(PROJECT_ROOT, "hello_world_app.py")],
+                                          cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+            new_pid = 0
+            try:
+                old_pid = wait_until(read_pid, 30)
+                if old_pid != server.pid:
+                    return False, "Server did not become ready"
+                
+                stop = threading.Event()
+                served = []
+                errors = []
+                
+                def load():
+                    paths = ("/api/threat", "/api/threats/batch?count=5", "/")
+                    while not stop.is_set():
+                        for path in paths:
+                            try:
+                                # A fresh connection per request, so every accept is exercised
+                                response = requests.get(f"{base_url}{path}", timeout=10)
+                                if response.status_code == 200:
+                                    served.append(response.headers.get("Content-Length"))
+                                else:
+                                    errors.append(f"{path}: HTTP {response.status_code}")
+                            except requests.RequestException as e:
+                                errors.append(f"{path}: {type(e).__name__}")
+                
+                clients = [threading.Thread(target=load) for _ in range(8)]
+                for client in clients:
+                    client.start()
+                with ThreadPoolExecutor(max_workers=1) as slow_pool:
+                    # In flight on the old process when it is told to stop
+                    slow = slow_pool.submit(requests.get, f"{base_url}/debug/profile?seconds=1.5", timeout=15)
+                    time.sleep(0.5)
+                    os.kill(old_pid, signal.SIGUSR2)
+                    new_pid = wait_until(lambda: read_pid() not in (0, old_pid) and read_pid(), 30)
+                    try:
+                        old_exit = server.wait(timeout=20)
+                    except subprocess.TimeoutExpired:
+                        old_exit = None
+                    time.sleep(0.5)
+                    stop.set()
+                    for client in clients:
+                        client.join()
+                    slow_status = slow.result().status_code
+            finally:
+                if new_pid:
+                    os.kill(new_pid, signal.SIGTERM)
+                if server.poll() is None:
+                    server.kill()
+                    server.wait()
+            # The replacement removes the pid file only after draining and flushing
+            new_stopped = bool(new_pid) and wait_until(lambda: not os.path.exists(pid_file), 20)
+        
+        if not new_pid:
+            return False, "Replacement never took over the pid file"
+        if errors:
+            return False, f"{len(errors)} of {len(errors) + len(served)} requests failed, e.g. {errors[0]}"
+        if old_exit != 0:
+            return False, f"Old process exit code {old_exit} (expected a clean drain)"
+        if slow_status != 200:
+            return False, f"In-flight request got HTTP {slow_status}"
+        if not new_stopped:
+            return False, "Replacement did not shut down gracefully on SIGTERM"
+        return True, f"{len(served)} requests served across the restart, 0 errors"
+    
     def generate_summary(self):
         """Generate test summary"""
         total_tests = 0
@@ -410,15 +1092,42 @@ class TestSuite:
         """Run complete test suite"""
         self.log("🚀 hello world app - COMPREHENSIVE TEST SUITE", "TEST")
         self.log("=" * 80)
-        self.log(f"Target: {self.base_url}")
+        self.log(f"Target: {self.transport.name}")
+        self.log(f"Workers: {self.workers}")
         self.log(f"Started: {datetime.now().isoformat()}")
         self.log("")
         
-        # Run all phases
-        self.phase_1_backend_tests()
-        self.phase_2_api_tests()
-        self.phase_2_5_contract_validation()
-        self.phase_3_frontend_tests()
+        phases = [
+            self.phase_1_backend_tests,
+            self.phase_2_api_tests,
+            self.phase_2_5_contract_validation,
+            self.phase_3_frontend_tests,
+        ]
+        if self.restart:
+            phases.append(self.phase_4_restart_tests)
+        started = time.perf_counter()
+        
+        # Run all phases (concurrently, with tests fanned out to a shared pool, when workers > 1)
+        if self.workers > 1:
+            # Import the app and the scenario helpers on this thread first:
+            # concurrent first imports can see half-initialized modules
+            if self.in_process:
+                self.transport.app
+            import scenarios  # noqa: F401
+            with ThreadPoolExecutor(max_workers=self.workers) as executor, \
+                    ThreadPoolExecutor(max_workers=len(phases)) as phase_runner:
+                self._executor = executor
+                try:
+                    for future in [phase_runner.submit(self._buffered, phase) for phase in phases]:
+                        self._emit(future.result())
+                finally:
+                    self._executor = None
+        else:
+            for phase in phases:
+                phase()
+        
+        elapsed = time.perf_counter() - started
+        self.transport.close()
         
         # Generate summary
         total, passed, failed = self.generate_summary()
@@ -428,6 +1137,7 @@ class TestSuite:
         self.log(f"Total Tests: {total}")
         self.log(f"Passed: {passed}", "PASS")
         self.log(f"Failed: {failed}", "FAIL" if failed > 0 else "PASS")
+        self.log(f"Duration: {elapsed:.3f}s")
         self.log("")
         
         # Save results
@@ -450,7 +1160,20 @@ class TestSuite:
 
 def main():
     """Main test runner"""
-    suite = TestSuite()
+    parser = argparse.ArgumentParser(description="hello world app 4-phase test suite")
+    parser.add_argument("--base-url",
+                        help="Server to test (default: TEST_BASE_URL, then .env_port, then "
+                             "http://localhost:5000; ignored with --in-process)")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Use the Flask test client instead of a running server")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Run phases and tests concurrently on this many threads")
+    parser.add_argument("--restart", action="store_true",
+                        help="Also run Phase 4: load across a rolling restart (starts its own server)")
+    args = parser.parse_args()
+    
+    suite = TestSuite(args.base_url, in_process=args.in_process, workers=args.workers,
+                      restart=args.restart)
     success = suite.run_all_tests()
     sys.exit(0 if success else 1)
 
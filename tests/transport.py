@@ -0,0 +1,176 @@
+"""
+hello world app - Test Transport
+Shared HTTP plumbing for quick_test.py and test_suite.py
+
+HTTPTransport keeps one keep-alive requests.Session per thread, so repeated
+checks reuse pooled connections instead of opening one per request.
+WSGITransport calls the Flask app in-process through its test client, so no
+server is needed. fan_out() runs many (transport, path) GETs on a thread
+pool, so the same smoke checks against many nodes take about as long as
+against one.
+
+The default base URL comes from TEST_BASE_URL, then from the port that
+manage.sh wrote to .env_port, then http://localhost:5000.
+"""
+
+import atexit
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASE_URL = "http://localhost:5000"
+DEFAULT_TIMEOUT = 10
+
+def resolve_base_url(explicit: Optional[str] = None) -> str:
+    """
+    Pick the server to test
+
+    Args:
+        explicit: URL given on the command line (wins if set)
+
+    Returns:
+        str: Base URL without a trailing slash
+    """
+    if explicit:
+        return explicit.rstrip("/")
+    if os.environ.get("TEST_BASE_URL"):
+        return os.environ["TEST_BASE_URL"].rstrip("/")
+    try:
+        with open(os.path.join(PROJECT_ROOT, ".env_port")) as f:
+            port = int(f.read().strip())
+        return f"http://localhost:{port}"
+    except (OSError, ValueError):
+        return DEFAULT_BASE_URL
+
+class InProcessResponse:
+    """Adapts a Flask test-client response to the parts of requests.Response we use"""
+
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.text = response.get_data(as_text=True)
+        self._response = response
+
+    def json(self):
+        return self._response.get_json()
+
+class HTTPTransport:
+    """GETs against a live server over pooled keep-alive connections"""
+
+    def __init__(self, base_url: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT,
+                 pool_size: int = 16):
+        self.base_url = resolve_base_url(base_url)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.base_url
+
+    def _session(self) -> requests.Session:
+        # Sessions aren't documented as thread-safe; one per thread, each with its own pool
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size))
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size))
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def get(self, path: str):
+        return self._session().get(f"{self.base_url}{path}", timeout=self.timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+
+class WSGITransport:
+    """GETs against the Flask app in-process (no server, no sockets)"""
+
+    def __init__(self, load_app: Optional[Callable[[], Any]] = None):
+        """
+        Args:
+            load_app: Returns the WSGI app; called once, on first use
+                (default: import hello_world_app and run its warmup)
+        """
+        self._load_app = load_app or load_hello_world_app
+        self._app = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return "in-process Flask test client"
+
+    @property
+    def app(self):
+        with self._lock:
+            if self._app is None:
+                self._app = self._load_app()
+            return self._app
+
+    def get(self, path: str) -> InProcessResponse:
+        with self.app.test_client().get(path) as response:
+            return InProcessResponse(response)
+
+    def close(self) -> None:
+        pass
+
+def load_hello_world_app():
+    """Import the app and warm it up, as the server does before reporting ready"""
+    if not os.environ.get("APP_SHARED_STATS_PATH"):
+        # A private stats segment, so tests never count into a live server's counters
+        path = os.path.join(tempfile.gettempdir(), f"hello_world_app-test-{os.getpid()}.stats")
+        os.environ["APP_SHARED_STATS_PATH"] = path
+        atexit.register(lambda: os.path.exists(path) and os.remove(path))
+    from hello_world_app import app, warm_up
+    warm_up()
+    return app
+
+class Result(NamedTuple):
+    transport: Any
+    path: str
+    response: Any
+    error: Optional[str]
+    elapsed_ms: float
+
+def fan_out(targets: Iterable[Tuple[Any, str]], workers: int = 32) -> List[Result]:
+    """
+    GET many (transport, path) pairs concurrently
+
+    Returns:
+        One Result per pair, in input order; error is set instead of raising
+    """
+    def fetch(target: Tuple[Any, str]) -> Result:
+        transport, path = target
+        started = time.perf_counter()
+        try:
+            response, error = transport.get(path), None
+        except Exception as e:
+            response, error = None, f"{type(e).__name__}: {e}"
+        return Result(transport, path, response, error, (time.perf_counter() - started) * 1000)
+
+    targets = list(targets)
+    if workers <= 1 or len(targets) <= 1:
+        return [fetch(target) for target in targets]
+    with ThreadPoolExecutor(max_workers=min(workers, len(targets))) as pool:
+        return list(pool.map(fetch, targets))
+
+def make_transports(base_urls: Sequence[str] = (), in_process: bool = False,
+                    pool_size: int = 16) -> List[Any]:
+    """One transport per node (or a single in-process transport)"""
+    if in_process:
+        return [WSGITransport()]
+    return [HTTPTransport(url, pool_size=pool_size) for url in (base_urls or [None])]